@@ -82,6 +82,47 @@ def test_percentile_doy(tas_series):
     assert p1.attrs["units"] == "K"
 
 
+@pytest.mark.parametrize("window", [1, 4, 5])
+def test_percentile_doy_engine(tas_series, window):
+    values = np.random.RandomState(0).normal(size=365 * 4)
+    values[::17] = np.nan
+    tas = tas_series(values, start="1/1/2001")
+    tas = xr.concat((tas, tas + 1), "dim0")
+
+    # Reference implementation from the constructed rolling windows
+    rr = tas.rolling(min_periods=1, center=True, time=window).construct("window")
+    exp = rr.groupby("time.dayofyear").reduce(
+        np.nanpercentile, dim=("time", "window"), q=90
+    )
+    exp = exp.sel(dayofyear=exp.dayofyear < 366)
+
+    p = percentile_doy(tas, window=window, per=0.9)
+    assert p.dims == exp.dims
+    np.testing.assert_allclose(p.sel(dayofyear=exp.dayofyear), exp)
+
+    pc = percentile_doy(tas.chunk({"dim0": 1, "time": 365}), window=window, per=0.9)
+    np.testing.assert_allclose(pc.compute(), p)
+
+
+def test_percentile_doy_multiple(tas_series):
+    values = np.random.RandomState(0).normal(size=366 * 4)
+    tas = tas_series(values, start="1/1/2000")
+    p = percentile_doy(tas, window=5, per=[0.1, 0.5, 0.9])
+    assert p.dims == ("dayofyear", "percentiles")
+    np.testing.assert_array_equal(p.percentiles, [0.1, 0.5, 0.9])
+    for per in [0.1, 0.5, 0.9]:
+        np.testing.assert_allclose(
+            p.sel(percentiles=per), percentile_doy(tas, window=5, per=per)
+        )
+
+
+@pytest.mark.parametrize("per", [-0.1, 1.5, [0.5, 1.01], np.nan])
+def test_percentile_doy_invalid(tas_series, per):
+    tas = tas_series(np.arange(365), start="1/1/2001")
+    with pytest.raises(ValueError, match="range"):
+        percentile_doy(tas, window=5, per=per)
+
+
 def test_adjust_doy_360_to_366():
     source = xr.DataArray(np.arange(360), coords=[np.arange(1, 361)], dims="dayofyear")
     time = pd.date_range("2000-01-01", "2001-12-31", freq="D")
@@ -203,6 +244,34 @@ def test_convert_calendar_360_days(source, target, freq, align_on):
         assert conv.size == 359 if freq == "D" else 359 * 4
 
 
+@pytest.mark.parametrize(
+    "source,target,align_on",
+    [
+        ("standard", "noleap", None),
+        ("julian", "proleptic_gregorian", None),
+        ("all_leap", "default", None),
+        ("360_day", "julian", "date"),
+        ("360_day", "default", "year"),
+        ("default", "360_day", "year"),
+        ("noleap", "360_day", "date"),
+    ],
+)
+@pytest.mark.parametrize("start", ["2000-01-01", "1500-01-01"])
+def test_convert_calendar_vectorized(source, target, align_on, start):
+    from xclim.core.calendar import _convert_calendar_loop
+
+    if "default" in [source, target] and start < "1678":
+        pytest.skip("Out of bounds for numpy datetimes.")
+    times = date_range(start, periods=1500, freq="7H", calendar=source)
+    da = xr.DataArray(np.arange(times.size), dims=("time",), coords={"time": times})
+
+    out = convert_calendar(da, target, align_on=align_on)
+    exp = _convert_calendar_loop(da, target, source, target, align_on)
+    assert out.time.size == exp.time.size
+    assert_array_equal(out.indexes["time"], exp.indexes["time"])
+    assert_array_equal(out, exp)
+
+
 @pytest.mark.parametrize(
     "source,target",
     [
@@ -299,3 +368,22 @@ def test_datetime_to_decimal_year(source_cal, exp180):
     )
     decy = datetime_to_decimal_year(times, calendar=source_cal)
     np.testing.assert_almost_equal(decy[180] - 2004, exp180)
+
+
+@pytest.mark.parametrize("calendar", ["default", "noleap", "360_day", "standard"])
+def test_time_fields(calendar):
+    from xclim.core.calendar import time_field
+    from xclim.core.calendar import time_fields
+
+    times = date_range("1999-11-27T06", periods=500, freq="D", calendar=calendar)
+    da = xr.DataArray(np.arange(500), dims=("time",), coords={"time": times})
+
+    fields = time_fields(da)
+    for name in ["year", "month", "day", "hour", "dayofyear"]:
+        assert_array_equal(fields[name], getattr(da.time.dt, name))
+    assert_array_equal(time_field(da, "season"), da.time.dt.season)
+    assert fields["days_in_year"][0] == days_in_year(1999, calendar)
+    assert not fields["dayofyear"].flags.writeable
+
+    # The same arrays are returned as long as the index lives
+    assert time_fields(da.indexes["time"])["month"] is fields["month"]
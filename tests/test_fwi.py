@@ -4,6 +4,7 @@ import numpy as np
 import pytest
 import xarray as xr
 
+from xclim import set_options
 from xclim.indices.fwi import _shut_down_and_start_ups
 from xclim.indices.fwi import build_up_index
 from xclim.indices.fwi import day_length
@@ -108,6 +109,27 @@ def test_day_lengh_factor():
     assert day_length_factor(44, 1) == -1.6
 
 
+def test_fire_weather_ufunc_dtype(tas_series, pr_series):
+    tas = tas_series(np.full(100, 20, dtype="float32"), start="2017-03-01")
+    pr = pr_series(np.ones(100, dtype="float32"), start="2017-03-01")
+    lat = xr.full_like(tas.isel(time=0), 45)
+    dc0 = xr.full_like(tas.isel(time=0), 15)
+
+    out = fire_weather_ufunc(tas=tas, pr=pr, lat=lat, dc0=dc0, indexes=["DC"])
+    assert out["DC"].dtype == np.float32
+
+    out = fire_weather_ufunc(
+        tas=tas.astype(int), pr=pr, lat=lat, dc0=dc0, indexes=["DC"]
+    )
+    assert out["DC"].dtype == np.float64
+
+    with set_options(precision="float32"):
+        out = fire_weather_ufunc(
+            tas=tas.astype("float64"), pr=pr, lat=lat, dc0=dc0, indexes=["DC"]
+        )
+    assert out["DC"].dtype == np.float32
+
+
 def test_fire_weather_ufunc_errors(tas_series, pr_series, rh_series, ws_series):
     tas = tas_series(np.ones(100), start="2017-01-01")
     pr = pr_series(np.ones(100), start="2017-01-01")
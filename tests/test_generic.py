@@ -1,9 +1,14 @@
 import cftime
 import numpy as np
 import pandas as pd
+import pytest
 import xarray as xr
+from scipy.stats import gumbel_r
 from scipy.stats import lognorm
 
+from xclim.core.calendar import percentile_doy
+from xclim.core.calendar import resample_doy
+from xclim import indices as xci
 from xclim.indices import generic
 
 
@@ -60,6 +65,53 @@ class TestFA(object):
         assert np.isnan(out[:, 0, 0]).all()
 
 
+class TestFitMethods:
+    @pytest.mark.parametrize(
+        "dist,params",
+        [
+            ("norm", (3, 2)),
+            ("gumbel_r", (10, 3)),
+            ("genextreme", (-0.1, 10, 3)),
+            ("pearson3", (0.8, 5, 2)),
+            ("gamma", (3, 1, 2)),
+            ("lognorm", (0.5, 2, 3)),
+            ("weibull_min", (2, 1, 3)),
+        ],
+    )
+    @pytest.mark.parametrize("method", ["lmoments", "mom"])
+    def test_vectorized(self, dist, params, method):
+        dc = generic.get_dist(dist)
+        x = dc(*params).rvs(size=(20000, 2), random_state=0)
+        x[:10, 1] = np.nan
+        da = xr.DataArray(x, dims=("time", "x"))
+
+        p = generic.fit(da, dist, method=method)
+        assert p.dims == ("dparams", "x")
+        assert p.attrs["estimator"] in ["L-moments", "Method of moments"]
+        np.testing.assert_allclose(p.isel(x=0), params, rtol=0.1, atol=0.1)
+
+        # NaNs are ignored
+        p1 = generic.fit(da.isel(time=slice(10, None)), dist, method=method)
+        np.testing.assert_allclose(p.isel(x=1), p1.isel(x=1))
+
+        pc = generic.fit(da.chunk({"time": 1000}), dist, method=method)
+        np.testing.assert_allclose(pc, p)
+
+    def test_ml_init(self):
+        x = lognorm(0.5, 2, 3).rvs(size=(50, 2), random_state=0)
+        da = xr.DataArray(x, dims=("time", "x"))
+        p0 = generic.fit(da, "lognorm")
+        p = generic.fit(da, "lognorm", init="lmoments")
+        np.testing.assert_allclose(p, p0, rtol=1e-3)
+
+    def test_errors(self):
+        da = xr.DataArray(np.random.rand(10), dims=("time",))
+        with pytest.raises(ValueError):
+            generic.fit(da, "norm", method="bayes")
+        with pytest.raises(ValueError):
+            generic.fit(da, "beta", method="lmoments")
+
+
 class TestFrequencyAnalysis:
     def test_simple(self, ndq_series):
         q = ndq_series.copy()
@@ -74,6 +126,71 @@ class TestFrequencyAnalysis:
         assert np.isnan(v[:, 0, 0])
         assert ~np.isnan(v[:, 1, 1])
 
+    def test_params(self, ndq_series):
+        sel = generic.select_resample_op(ndq_series, op="max", freq="YS")
+        p = generic.fit(sel, "gumbel_r")
+        exp = generic.frequency_analysis(
+            ndq_series, mode="max", t=[2, 10], dist="gumbel_r", freq="YS"
+        )
+        out = generic.frequency_analysis(
+            ndq_series, mode="max", t=[2, 10], dist="gumbel_r", params=p
+        )
+        np.testing.assert_allclose(out, exp)
+
+        out = generic.fa(sel, [2, 10], "gumbel_r", mode="min", params=p)
+        np.testing.assert_allclose(
+            out.isel(x=0, y=0), gumbel_r.ppf(1 / np.array([2, 10]), *p[:, 0, 0])
+        )
+
+        with pytest.raises(ValueError, match="fitted for `gumbel_r`"):
+            generic.frequency_analysis(
+                ndq_series, mode="max", t=2, dist="genextreme", params=p
+            )
+        with pytest.raises(ValueError, match="cannot be given with `params`"):
+            generic.frequency_analysis(
+                ndq_series, mode="max", t=2, dist="gumbel_r", freq="YS", params=p
+            )
+        with pytest.raises(ValueError, match="cannot be given with `params`"):
+            generic.frequency_analysis(
+                ndq_series, mode="max", t=2, dist="gumbel_r", month=[6], params=p
+            )
+
+
+class TestFABootstrap:
+    def setup_method(self):
+        x = gumbel_r(10, 3).rvs(size=(50, 2, 3), random_state=0)
+        x[:, 0, 0] = np.nan
+        x[:10, 1, 1] = np.nan
+        self.da = xr.DataArray(x, dims=("time", "x", "y"), attrs={"units": "mm"})
+
+    def test_simple(self):
+        out = generic.fa_bootstrap(self.da, [2, 10], "gumbel_r", nboot=200, seed=1)
+        assert out.dims == ("bounds", "return_period", "x", "y")
+        assert out.attrs["units"] == "mm"
+        assert out.isel(x=0, y=0).isnull().all()
+
+        p = generic.fit(self.da, "gumbel_r", method="lmoments")
+        q = generic.fa(self.da, [2, 10], "gumbel_r", params=p)
+        valid = q.notnull()
+        assert (out.sel(bounds="lower") < q).where(valid, True).all()
+        assert (out.sel(bounds="upper") > q).where(valid, True).all()
+
+        # Reproducible
+        out2 = generic.fa_bootstrap(self.da, [2, 10], "gumbel_r", nboot=200, seed=1)
+        np.testing.assert_array_equal(out, out2)
+
+    def test_dask(self):
+        da = self.da.chunk({"x": 1})
+        out = generic.fa_bootstrap(da, 10, "gumbel_r", nboot=200, seed=1)
+        assert out.chunks is not None
+        np.testing.assert_array_equal(
+            out, generic.fa_bootstrap(da, 10, "gumbel_r", nboot=200, seed=1)
+        )
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            generic.fa_bootstrap(self.da, 10, "gumbel_r", method="ml")
+
 
 class TestSelectResampleOp:
     def test_month(self, q_series):
@@ -101,6 +218,201 @@ class TestThresholdCount:
         np.testing.assert_array_equal(out, [50, 0])
 
 
+class TestCompareDoy:
+    def test_simple(self, tas_series):
+        values = np.random.RandomState(0).normal(size=366 * 3)
+        tas = tas_series(values, start="1/1/2000")
+        tas = xr.concat((tas, tas + 1), "dim0")
+        t = percentile_doy(tas, per=[0.1, 0.9])
+
+        exp = tas > resample_doy(t, tas)
+        out = generic.compare_doy(tas, ">", t)
+        assert out.dims == ("dim0", "time", "percentiles")
+        np.testing.assert_array_equal(out, exp)
+
+        out = generic.compare_doy(tas.chunk({"time": 100}), "gt", t.chunk())
+        assert out.chunks is not None
+        np.testing.assert_array_equal(out.compute(), exp)
+
+    def test_errors(self, tas_series):
+        tas = tas_series(np.arange(365), start="1/1/2001")
+        t = percentile_doy(tas, per=0.5)
+        with pytest.raises(ValueError):
+            generic.compare_doy(tas, "!=", t)
+        with pytest.raises(AttributeError):
+            generic.compare_doy(tas, ">", t.drop_vars("dayofyear"))
+
+
+class TestThresholdCube:
+    def test_exceedance(self, tas_series):
+        values = np.random.RandomState(0).normal(size=366 * 3) * 10 + 280
+        tas = xr.concat((tas_series(values), tas_series(values + 5)), "dim0")
+        cube = generic.ThresholdCube(tas, ">", [275, "10 degC"])
+        assert 275 in cube
+        assert 285 not in cube
+        assert cube.nbytes == 2 * 2 * np.ceil(tas.time.size / 8)
+        np.testing.assert_array_equal(cube.exceedance(275), tas > 275)
+        np.testing.assert_array_equal(cube.exceedance(283.15), tas > 283.15)
+        with pytest.raises(KeyError):
+            cube.exceedance(285)
+
+    @pytest.mark.parametrize("freq", ["YS", "MS", "QS-DEC"])
+    def test_count(self, tas_series, freq):
+        values = np.random.RandomState(0).normal(size=366 * 3) * 10 + 280
+        tas = tas_series(values)
+        exp = generic.threshold_count(tas, "<=", 275, freq)
+
+        cube = generic.ThresholdCube(tas, "le", [275])
+        xr.testing.assert_identical(cube.count(275, freq), exp)
+
+        cube = generic.ThresholdCube(tas.chunk({"time": 100}), "<=", [275])
+        assert sum(cube.packed.chunks[1]) == np.ceil(tas.time.size / 8)
+        out = cube.count(275, freq)
+        assert out.chunks is not None
+        xr.testing.assert_identical(out.compute(), exp)
+
+        # Missing periods
+        gap = tas.where(tas.time.dt.month != 3, drop=True)
+        cube = generic.ThresholdCube(gap, "<=", [275])
+        xr.testing.assert_identical(
+            cube.count(275, freq), generic.threshold_count(gap, "<=", 275, freq)
+        )
+
+    def test_indices(self, tasmax_series):
+        values = np.random.RandomState(0).normal(size=366 * 3) * 10 + 290
+        tasmax = tasmax_series(values)
+        exp = [
+            xci.tx_days_above(tasmax, "25 degC"),
+            xci.hot_spell_frequency(tasmax, "30 degC"),
+        ]
+        cube = generic.ThresholdCube(tasmax, ">", ["25 degC", "30 degC"])
+        out = [
+            xci.tx_days_above(tasmax, "25 degC", cube=cube),
+            xci.hot_spell_frequency(tasmax, "30 degC", cube=cube),
+        ]
+        for o, e in zip(out, exp):
+            xr.testing.assert_identical(o, e)
+
+        with pytest.raises(KeyError):
+            xci.tx_days_above(tasmax, "20 degC", cube=cube)
+        with pytest.raises(ValueError, match="not `<`"):
+            xci.tn_days_below(tasmax, "25 degC", cube=cube)
+        with pytest.raises(ValueError, match="dimensions"):
+            xci.tx_days_above(tasmax[:100], "25 degC", cube=cube)
+
+
+class TestDegreeDays:
+    @pytest.mark.parametrize("freq", ["YS", "MS", "7D"])
+    def test_simple(self, tas_series, freq):
+        values = np.random.RandomState(0).normal(size=366 * 3) * 10 + 280
+        values[5] = np.nan
+        tas = tas_series(values)
+        thresh = [273.15, 283.15, 291.15]
+        ops = [">", "gt", "<"]
+
+        out = generic.degree_days(tas, thresh, freq, op=ops)
+        assert out.dims == ("threshold", "time")
+        np.testing.assert_array_equal(out.threshold, thresh)
+        for k, (t, o) in enumerate(zip(thresh, ops)):
+            deg = (tas - t) if o in [">", "gt"] else (t - tas)
+            exp = deg.clip(min=0).resample(time=freq).sum(dim="time")
+            np.testing.assert_allclose(out.isel(threshold=k), exp)
+
+        out_dask = generic.degree_days(tas.chunk({"time": 100}), thresh, freq, op=ops)
+        assert out_dask.chunks is not None
+        xr.testing.assert_allclose(out_dask.compute(), out)
+
+    def test_cap(self, tas_series):
+        tas = tas_series(np.random.RandomState(0).normal(size=366 * 3) * 10 + 280)
+        out = generic.degree_days(tas, [273.15, 283.15], "YS", cap=[np.nan, 290])
+        exp = (tas.clip(max=290) - 283.15).clip(min=0).resample(time="YS").sum()
+        np.testing.assert_allclose(out.isel(threshold=1), exp)
+        np.testing.assert_array_equal(out.cap, [np.nan, 290])
+
+        with pytest.raises(ValueError):
+            generic.degree_days(tas, [273.15], "YS", op=">=")
+
+
+class TestRollingSumMax:
+    @pytest.mark.parametrize("freq", ["YS", "MS", "7D"])
+    def test_simple(self, pr_series, freq):
+        values = np.random.RandomState(0).gamma(0.5, 8, size=366 * 3)
+        values[40:42] = np.nan
+        pr = pr_series(values)
+        windows = [1, 3, 5, 10]
+
+        out = generic.rolling_sum_max(pr, windows, freq)
+        assert out.dims == ("window", "time")
+        for w in windows:
+            exp = pr.rolling(time=w).sum(skipna=False).resample(time=freq).max()
+            np.testing.assert_allclose(out.sel(window=w), exp)
+
+        # Windows straddle the chunks
+        out_dask = generic.rolling_sum_max(pr.chunk({"time": 100}), windows, freq)
+        assert out_dask.chunks is not None
+        xr.testing.assert_allclose(out_dask.compute(), out)
+
+    def test_errors(self, pr_series):
+        pr = pr_series(np.ones(10))
+        with pytest.raises(ValueError):
+            generic.rolling_sum_max(pr, [0, 3], "YS")
+
+
+class TestMovingAverageMinMean:
+    @pytest.mark.parametrize("window,center", [(7, True), (4, True), (5, False)])
+    def test_simple(self, q_series, window, center):
+        values = np.random.RandomState(0).gamma(2, 8, size=366 * 3)
+        values[40:42] = np.nan
+        q = q_series(values)
+
+        mavg = q.rolling(time=window, center=center).mean(skipna=False)
+        exp_min = mavg.resample(time="MS").min()
+        exp_mean = q.resample(time="MS").mean()
+
+        out_min, out_mean = generic.moving_average_min_mean(q, window, "MS", center)
+        np.testing.assert_allclose(out_min, exp_min)
+        np.testing.assert_allclose(out_mean, exp_mean)
+
+        # Halos are exchanged between the chunks
+        out_min, out_mean = generic.moving_average_min_mean(
+            q.chunk({"time": 100}), window, "MS", center
+        )
+        assert out_min.chunks is not None
+        np.testing.assert_allclose(out_min, exp_min)
+        np.testing.assert_allclose(out_mean, exp_mean)
+
+
+class TestDetectPattern:
+    @pytest.mark.parametrize(
+        "pattern", [[True], [False] * 7 + [True], [True, False, True, True, False]]
+    )
+    def test_simple(self, pattern):
+        values = np.random.RandomState(0).rand(2, 200) > 0.4
+        da = xr.DataArray(values, dims=("x", "time"))
+
+        # Brute force
+        n = len(pattern)
+        exp = np.zeros_like(values)
+        for i in range(n - 1, values.shape[1]):
+            exp[:, i] = (values[:, i - n + 1 : i + 1] == pattern).all(axis=1)
+
+        out = generic.detect_pattern(da, pattern)
+        assert out.dims == da.dims
+        np.testing.assert_array_equal(out, exp)
+
+        out = generic.detect_pattern(da.chunk({"time": 20}), pattern)
+        assert out.chunks is not None
+        np.testing.assert_array_equal(out, exp)
+
+    def test_short(self):
+        da = xr.DataArray([False, True], dims=("time",))
+        np.testing.assert_array_equal(
+            generic.detect_pattern(da, [False, False, True]), [False, False]
+        )
+        with pytest.raises(ValueError):
+            generic.detect_pattern(da, [])
+
+
 class TestDailyDownsampler:
     def test_std_calendar(self):
 
@@ -15,6 +15,7 @@
 # a first line of defense.
 import calendar
 import os
+import tracemalloc
 
 import numpy as np
 import pandas as pd
@@ -67,6 +68,16 @@ class TestMaxNDayPrecipitationAmount:
         assert len(rxnday) == 1
         assert rxnday.time.dt.year == 2000
 
+    def test_multi_window(self, pr_series):
+        a = pr_series(np.array([3, 4, 20, 20, 0, 6, 15, 25, 0, 0]))
+        rxnday = xci.max_n_day_precipitation_amount(a, [1, 2, 3, 11])
+        assert rxnday.dims == ("window", "time")
+        np.testing.assert_array_equal(rxnday.window, [1, 2, 3, 11])
+        np.testing.assert_array_equal(
+            rxnday.isel(time=0), np.array([25, 40, 46, np.nan]) * 3600 * 24
+        )
+        assert rxnday.units == "mm"
+
 
 class TestMax1DayPrecipitationAmount:
     @staticmethod
@@ -326,6 +337,35 @@ class TestFreshetStart:
         np.testing.assert_equal(out, [np.nan])
 
 
+class TestDegreeDays:
+    def test_simple(self, tas_series):
+        a = np.zeros(365) + 10
+        a[:7] += [-12, -6, -1, 0, 1, 6, 12]
+        da = tas_series(a + K2C)
+        out = xci.degree_days(
+            da,
+            thresh=["0 degC", "5 degC", "17 degC", "17 degC"],
+            op=[">", ">", "<", ">"],
+            cap=[None, "15 degC", None, None],
+            freq="MS",
+        )
+        assert out.dims == ("threshold", "time")
+        assert list(out.op.values) == [">", ">", "<", ">"]
+        np.testing.assert_array_equal(
+            out.isel(time=0), [24 * 10 + 72, 24 * 5 + 35, 24 * 7 + 54, 5]
+        )
+        np.testing.assert_allclose(
+            out.sel(threshold="5 degC"),
+            xci.growing_degree_days(da.clip(max=15 + K2C), "5 degC", freq="MS"),
+        )
+        np.testing.assert_allclose(
+            out.isel(threshold=2), xci.heating_degree_days(da, "17 degC", freq="MS")
+        )
+        np.testing.assert_allclose(
+            out.isel(threshold=3), xci.cooling_degree_days(da, "17 degC", freq="MS")
+        )
+
+
 class TestGrowingDegreeDays:
     def test_simple(self, tas_series):
         a = np.zeros(365)
@@ -504,6 +544,30 @@ class TestHeatWaveTotalLength:
         np.testing.assert_allclose(hwml.values, expected)
 
 
+class TestHeatWaveStatistics:
+    def test_simple(self, tasmax_series, tasmin_series):
+        values = np.random.RandomState(0).normal(size=366 * 2) * 5
+        tn = tasmin_series(values + 22 + K2C)
+        tx = tasmax_series(values + 30 + K2C)
+        kws = dict(thresh_tasmin="22.5 degC", thresh_tasmax="30.5 degC", window=2)
+
+        out = xci.heat_wave_statistics(
+            tn, tx, thresh_index="29 degC", window_index=4, freq="MS", **kws
+        )
+        exp = {
+            "heat_wave_frequency": xci.heat_wave_frequency(tn, tx, freq="MS", **kws),
+            "heat_wave_max_length": xci.heat_wave_max_length(tn, tx, freq="MS", **kws),
+            "heat_wave_total_length": xci.heat_wave_total_length(
+                tn, tx, freq="MS", **kws
+            ),
+            "heat_wave_index": xci.heat_wave_index(tx, "29 degC", 4, freq="MS"),
+        }
+        assert set(out.data_vars) == set(exp)
+        for name, da in exp.items():
+            np.testing.assert_array_equal(out[name], da)
+            assert out[name].units == da.units
+
+
 class TestHotSpellFrequency:
     @pytest.mark.parametrize(
         "thresh_tasmax,window,expected",
@@ -787,6 +851,19 @@ class TestTGXN90p:
         assert out[1] == 29
         assert out[5] == 25
 
+    def test_tx90p_percentiles(self, tasmax_series):
+        tas = tasmax_series(np.arange(366.0), start="1/1/2000")
+        t = percentile_doy(tas, per=[0.1, 0.9])
+
+        out = xci.tx90p(tas, t, freq="MS")
+        assert out.dims == ("time", "percentiles")
+        np.testing.assert_array_equal(
+            out.sel(percentiles=0.1), xci.tx90p(tas, t.sel(percentiles=0.1), freq="MS")
+        )
+        np.testing.assert_array_equal(
+            out.sel(percentiles=0.9), xci.tx90p(tas, t.sel(percentiles=0.9), freq="MS")
+        )
+
     def test_tn90p_simple(self, tasmin_series):
         i = 366
         tas = np.array(range(i))
@@ -1188,6 +1265,19 @@ def test_saturation_vapor_pressure(tas_series, method, ice_thresh, exp0):
     np.testing.assert_allclose(e_sat, e_sat_exp, atol=0.5, rtol=0.005)
 
 
+@pytest.mark.parametrize("method", ["tetens30", "sonntag90", "goffgratch46", "wmo08"])
+def test_saturation_vapor_pressure_ice_and_water(tas_series, method):
+    # Long enough to be computed over several slabs, with both references in each of them.
+    tas = tas_series(np.tile([-20, -1, 0.5, 10, np.nan, 30], 6000) + K2C)
+
+    water = xci.saturation_vapor_pressure(tas=tas, method=method)
+    ice = xci.saturation_vapor_pressure(tas=tas, method=method, ice_thresh="50 degC")
+    e_sat = xci.saturation_vapor_pressure(
+        tas=tas.chunk({"time": 10000}), method=method, ice_thresh="0 degC"
+    )
+    np.testing.assert_array_equal(e_sat, water.where(tas > K2C, ice))
+
+
 @pytest.mark.parametrize("method", ["tetens30", "sonntag90", "goffgratch46", "wmo08"])
 @pytest.mark.parametrize(
     "invalid_values,exp0", [("clip", 100), ("mask", np.nan), (None, 188)]
@@ -1236,3 +1326,131 @@ def test_specific_humidity(
         ice_thresh="0 degC",
     )
     np.testing.assert_allclose(huss, huss_exp, atol=1e-4, rtol=0.05)
+
+
+def test_specific_humidity_broadcast():
+    # Inputs broadcast against each other are read slab by slab, without full-size copies.
+    tas = xr.DataArray(
+        np.random.RandomState(0).uniform(250, 300, (100, 10000)),
+        dims=("x", "time"),
+        attrs={"units": "K"},
+    )
+    rh = xr.DataArray(np.linspace(0.1, 1, 10000), dims=("time",), attrs={"units": "1"})
+    ps = xr.DataArray(np.linspace(9e4, 1e5, 100), dims=("x",), attrs={"units": "Pa"})
+
+    tracemalloc.start()
+    try:
+        huss = xci.specific_humidity(tas=tas, rh=rh, ps=ps)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1.5 * huss.nbytes
+
+    rh, ps = xr.broadcast(rh, ps)
+    exp = xci.specific_humidity(
+        tas=tas, rh=rh.transpose(*tas.dims).copy(), ps=ps.transpose(*tas.dims).copy()
+    )
+    np.testing.assert_array_equal(huss, exp)
+
+
+class TestConversionPipeline:
+    def dataset(self, tas_series, rh_series, ps_series):
+        tas = tas_series(np.array([-20, -10, -1, 10, 20, 25, 30, 40, np.nan]) + K2C)
+        hurs = rh_series([80, 95, 100, 50, 20, 110, 60, 30, np.nan])
+        ps = ps_series([101325] * 9)
+        uas = xr.full_like(tas, 1)
+        uas.attrs["units"] = "m s-1"
+        return xr.Dataset(dict(tas=tas, hurs=hurs, ps=ps, uas=uas, vas=-uas))
+
+    @pytest.mark.parametrize("method", ["tetens30", "sonntag90", "goffgratch46"])
+    @pytest.mark.parametrize("ice_thresh", [None, "0 degC"])
+    def test_humidity(self, tas_series, rh_series, ps_series, method, ice_thresh):
+        ds = self.dataset(tas_series, rh_series, ps_series)
+        out = xci.ConversionPipeline(
+            ds.chunk({"time": 4}),
+            ["hurs", "huss", "tdps"],
+            ice_thresh=ice_thresh,
+            method=method,
+        ).run()
+        assert out.huss.chunks is not None
+        assert out.tdps.attrs["units"] == "K"
+        xr.testing.assert_identical(out.hurs, ds.hurs)
+
+        huss = xci.specific_humidity(
+            tas=ds.tas,
+            rh=ds.hurs,
+            ps=ds.ps,
+            ice_thresh=ice_thresh,
+            method=method,
+            invalid_values="clip",
+        )
+        np.testing.assert_allclose(out.huss, huss, rtol=1e-12)
+
+        # The dewpoint gives back the relative humidity, and is the temperature at saturation.
+        rh = xci.relative_humidity(
+            tas=ds.tas,
+            dtas=out.tdps,
+            ice_thresh=ice_thresh,
+            method=method,
+            invalid_values=None,
+        )
+        np.testing.assert_allclose(rh, ds.hurs, rtol=1e-10)
+        np.testing.assert_allclose(out.tdps[2], ds.tas[2], rtol=1e-10)
+
+        ds = ds.drop_vars("hurs").assign(huss=out.huss)
+        out = xci.ConversionPipeline(
+            ds, ["hurs"], ice_thresh=ice_thresh, method=method
+        ).run()
+        rh = xci.relative_humidity(
+            tas=ds.tas, huss=ds.huss, ps=ds.ps, ice_thresh=ice_thresh, method=method,
+        )
+        np.testing.assert_allclose(out.hurs, rh, rtol=1e-12)
+
+    @pytest.mark.parametrize(
+        "method", ["tetens30", "wmo08", "sonntag90", "goffgratch46"]
+    )
+    @pytest.mark.parametrize("ice_thresh", [None, "0 degC"])
+    def test_dewpoint_extremes(
+        self, tas_series, rh_series, ps_series, method, ice_thresh
+    ):
+        t = np.array([200, 200, 230, 273.16, 300, 320, 320])
+        rh = np.array([1e-4, 1, 1e-3, 0.5, 1e-4, 1, 0.01])
+        ds = xr.Dataset(
+            dict(tas=tas_series(t), hurs=rh_series(rh * 100), ps=ps_series([1e5] * 7))
+        )
+        out = xci.ConversionPipeline(
+            ds, ["tdps"], method=method, ice_thresh=ice_thresh
+        ).run()
+
+        if ice_thresh is None and method in ["tetens30", "wmo08"]:
+            # Closed-form inverse of a exp(b (T - 273.16) / (T - c)).
+            b, c = {"tetens30": (17.269388, 35.86), "wmo08": (17.62, 30.04)}[method]
+            log_e = np.log(rh) + b * (t - 273.16) / (t - c)
+            exp = (c * log_e - 273.16 * b) / (log_e - b)
+            np.testing.assert_allclose(out.tdps, exp, rtol=1e-13)
+
+        back = xci.relative_humidity(
+            tas=ds.tas,
+            dtas=out.tdps,
+            method=method,
+            ice_thresh=ice_thresh,
+            invalid_values=None,
+        )
+        np.testing.assert_allclose(back, ds.hurs, rtol=1e-13)
+
+    def test_wind(self, tas_series, rh_series, ps_series):
+        ds = self.dataset(tas_series, rh_series, ps_series)
+        out = xci.ConversionPipeline(ds, ["sfcWindfromdir", "sfcWind"]).run()
+        wind, windfromdir = xci.uas_vas_2_sfcwind(ds.uas, ds.vas)
+        assert list(out.data_vars) == ["sfcWindfromdir", "sfcWind"]
+        np.testing.assert_array_equal(out.sfcWind, wind)
+        np.testing.assert_array_equal(out.sfcWindfromdir, windfromdir)
+
+    def test_errors(self, tas_series, rh_series, ps_series):
+        ds = self.dataset(tas_series, rh_series, ps_series)
+        with pytest.raises(ValueError, match="not in"):
+            xci.ConversionPipeline(ds, ["hurs", "pr"])
+        with pytest.raises(ValueError, match="missing"):
+            xci.ConversionPipeline(ds.drop_vars("ps"), ["huss"])
+        with pytest.raises(ValueError, match="one of"):
+            xci.ConversionPipeline(ds.drop_vars("hurs"), ["tdps"])
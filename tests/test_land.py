@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 from xclim import land
+from xclim.indices import generic
 
 
 def test_base_flow_index(ndq_series):
@@ -34,6 +35,17 @@ class Test_FA:
         )
         assert np.isnan(out.values[:, 0, 0]).all()
 
+    def test_params(self, ndq_series):
+        # Same extremes as the frequency analysis, without the missing values mask of `stats`
+        ts = generic.select_resample_op(ndq_series, op="max", freq="YS")
+        p = land.fit(ts, dist="gamma")
+        exp = land.freq_analysis(ndq_series, mode="max", t=[2, 5], dist="gamma")
+        out = land.freq_analysis(
+            ndq_series, mode="max", t=[2, 5], dist="gamma", params=p
+        )
+        np.testing.assert_allclose(out, exp)
+        assert out.attrs["units"] == "m^3 s-1"
+
 
 class TestStats:
     def test_simple(self, ndq_series):
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 # Tests for `xclim.core.options`
+import numpy as np
 import pytest
 
 from xclim import set_options
@@ -22,6 +23,10 @@ from xclim.core.options import register_missing_method
         ("missing_options", {"wmo": {"nm": 10, "nc": 3}}),
         ("missing_options", {"pct": {"tolerance": 0.1}}),
         ("missing_options", {"wmo": {"nm": 10, "nc": 3}, "pct": {"tolerance": 0.1}}),
+        ("precision", "float32"),
+        ("mask_cache_size", 0),
+        ("mask_cache_dir", "masks"),
+        ("grid_tree_cache_size", 0),
     ],
 )
 def test_set_options_valid(option, value):
@@ -43,6 +48,10 @@ def test_set_options_valid(option, value):
         ("metadata_locales", [("tlh", "not/a/real/klingo/file.json")]),
         ("data_validation", True),
         ("cf_compliance", False),
+        ("precision", "float16"),
+        ("mask_cache_size", -1),
+        ("mask_cache_dir", 1),
+        ("grid_tree_cache_size", 1.5),
         ("missing_options", {"pct": {"nm": 45}}),
         ("missing_options", {"wmo": {"nm": 45, "nc": 3}}),
         (
@@ -77,3 +86,21 @@ def test_register_missing_method():
 
     with set_options(check_missing="test"):
         assert OPTIONS["check_missing"] == "test"
+
+
+def test_precision(tas_series, tasmin_series):
+    from xclim import atmos
+
+    values = np.linspace(250, 290, 365).astype(np.float32)
+    tas = tas_series(values, start="1/1/2000")
+    tasmin = tasmin_series(values, start="1/1/2000")
+    ref = atmos.frost_days(tasmin.astype(np.float64))
+    assert ref.dtype == np.float64
+
+    with set_options(precision="float32"):
+        fd = atmos.frost_days(tasmin)
+        tg = atmos.tg_mean(tas)
+    assert fd.dtype == np.float32
+    assert tg.dtype == np.float32
+    np.testing.assert_array_equal(fd, ref)
+    np.testing.assert_allclose(tg, atmos.tg_mean(tas.astype(np.float64)), rtol=1e-6)
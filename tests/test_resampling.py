@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from xclim.core.resampling import map_period_blocks
+from xclim.core.resampling import period_bins
+from xclim.core.resampling import resample_reduce
+
+
+def time_series(calendar, n=800):
+    if calendar == "default":
+        time = pd.date_range("1999-11-15", periods=n, freq="D")
+    else:
+        time = xr.cftime_range("1999-11-15", periods=n, freq="D", calendar=calendar)
+    values = np.random.RandomState(0).normal(size=(2, n))
+    values[0, ::7] = np.nan
+    values[1, :40] = np.nan
+    return xr.DataArray(
+        values,
+        dims=("x", "time"),
+        coords={"time": time, "x": [1, 2]},
+        attrs={"units": "K"},
+        name="tas",
+    )
+
+
+@pytest.mark.parametrize("calendar", ["default", "noleap", "360_day"])
+@pytest.mark.parametrize("freq", ["YS", "MS", "QS-DEC", "AS-JUL", "AS-DEC", "Y"])
+@pytest.mark.parametrize("op", ["sum", "count", "mean", "max", "min"])
+def test_resample_reduce(calendar, freq, op):
+    da = time_series(calendar)
+    # With a gap of whole periods
+    da = da.sel(time=~da.time.dt.month.isin([2, 3, 4]))
+
+    for arr in [da, (da > 0) * 1]:
+        exp = getattr(arr.resample(time=freq), op)(dim="time", keep_attrs=True)
+        out = resample_reduce(arr, op, freq, keep_attrs=True)
+        assert out.dtype == exp.dtype
+        assert out.indexes["time"].equals(exp.indexes["time"])
+        xr.testing.assert_allclose(out, exp)
+        assert out.attrs == exp.attrs
+
+        out = resample_reduce(arr.chunk({"time": 97}), op, freq)
+        assert out.chunks is not None
+        xr.testing.assert_allclose(out.compute(), exp)
+
+
+def test_resample_reduce_float32():
+    # Sequential single precision sums would lose the small values.
+    da = time_series("default", n=365).isel(x=0).astype(np.float32)
+    da[:] = 1
+    da[0] = 1e8
+    out = resample_reduce(da, "sum", "YS")
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, np.float32([1e8 + 46, 318]))
+    out = resample_reduce(da, "mean", "YS")
+    np.testing.assert_allclose(out[0], (1e8 + 46) / 47, rtol=1e-7)
+
+
+def test_period_bins(tas_series):
+    tas = tas_series(np.arange(366), start="1/1/2000")
+    starts, present, labels = period_bins(tas, "MS")
+    np.testing.assert_array_equal(starts[:3], [0, 31, 60])
+    np.testing.assert_array_equal(present, np.arange(12))
+    assert labels[1] == pd.Timestamp("2000-02-01")
+    assert period_bins(tas, "MS") is period_bins(tas.time, "MS")
+
+    assert period_bins(tas, "2MS") is None
+    assert period_bins(tas.isel(time=slice(None, None, -1)), "MS") is None
+
+
+def _before_period(arr, starts, axis, lead=0, trail=0):
+    # Value preceding each period and value following it.
+    x = np.moveaxis(arr, axis, -1)
+    stops = np.append(starts[1:], x.shape[-1] - lead - trail) + lead
+    before = np.where(starts + lead > 0, x[..., starts + lead - 1], np.nan)
+    after = np.where(
+        stops < x.shape[-1], x[..., np.minimum(stops, x.shape[-1] - 1)], np.nan
+    )
+    return np.moveaxis(np.stack((before, after)), -1, axis + 1)
+
+
+@pytest.mark.parametrize("chunk", [20, 100, 400])
+def test_map_period_blocks(chunk):
+    da = time_series("default", n=400)
+    starts = period_bins(da, "MS")[0]
+    exp = map_period_blocks(_before_period, da.data, starts, 1)
+    assert np.isnan(exp[0, :, 0]).all()
+    np.testing.assert_array_equal(exp[0, 1, 1:], da[1, starts[1:] - 1])
+
+    data = da.chunk({"time": chunk}).data
+    out = map_period_blocks(
+        _before_period, data, starts, 1, new_axis=2, lead=1, trail=1, dtype=float
+    )
+    assert out.chunks[0] == (2,)
+    np.testing.assert_array_equal(out.compute(), exp)
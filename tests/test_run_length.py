@@ -211,6 +211,34 @@ class TestWindowedRunCount:
         np.testing.assert_array_equal(lt_orig, lt_Ndim)
 
 
+class TestRunStatistics:
+    @pytest.mark.parametrize("freq", ["MS", "QS-DEC", "7D"])
+    def test_simple(self, freq):
+        values = np.random.RandomState(0).rand(3, 400) > 0.3
+        da = xr.DataArray(
+            values,
+            dims=("x", "time"),
+            coords={"time": pd.date_range("2000-01-01", periods=400, freq="D")},
+        )
+        # Drop a whole month
+        da = da.isel(time=da.time.dt.month != 3)
+
+        exp = da.resample(time=freq)
+        out = rl.run_statistics(da, 3, freq)
+        for name, func, kwargs in [
+            ("windowed_run_events", rl.windowed_run_events, {"window": 3}),
+            ("longest_run", rl.longest_run, {}),
+            ("windowed_run_count", rl.windowed_run_count, {"window": 3}),
+        ]:
+            np.testing.assert_array_equal(
+                out[name].transpose("x", "time"),
+                exp.map(func, dim="time", ufunc_1dim=False, **kwargs),
+            )
+
+        out_dask = rl.run_statistics(da.chunk({"time": 50}), 3, freq)
+        xr.testing.assert_equal(out_dask.compute(), out)
+
+
 class TestLastRun:
     @pytest.mark.parametrize(
         "coord,expected",
@@ -1,10 +1,18 @@
 import os
+import warnings
+from collections import OrderedDict
+from functools import wraps
 
 import geopandas as gpd
 import numpy as np
 import pytest
 import xarray as xr
+from shapely import vectorized
+from shapely.geometry import MultiPolygon
+from shapely.geometry import Polygon
+from shapely.geometry import box
 
+from xclim import set_options
 from xclim import subset
 
 TESTS_HOME = os.path.abspath(os.path.dirname(__file__))
@@ -261,6 +269,68 @@ class TestSubsetGridPoint:
         np.testing.assert_almost_equal(gp.lat, lat)
         assert gp.site == 0
 
+    def test_irregular_sites(self):
+        rlon, rlat = np.meshgrid(np.linspace(-30, 30, 40), np.linspace(-20, 20, 30))
+        lon = -70 + 1.2 * rlon + 0.3 * rlat
+        lat = 48 + rlat + 0.2 * rlon
+        da = xr.DataArray(
+            np.random.rand(3, 30, 40),
+            dims=("time", "rlat", "rlon"),
+            coords={"lon": (("rlat", "rlon"), lon), "lat": (("rlat", "rlon"), lat)},
+        )
+        rng = np.random.default_rng(0)
+        slon = rng.uniform(-90, -50, 50)
+        slat = rng.uniform(35, 60, 50)
+
+        out = subset.subset_gridpoint(da, lon=slon, lat=slat, add_distance=True)
+        assert out.dims == ("site", "time")
+
+        # Same as the closest point of the distance field of each site.
+        dist = subset.distance(
+            da, lon=xr.DataArray(slon, dims="site"), lat=xr.DataArray(slat, dims="site")
+        )
+        dist = dist.transpose("site", ...).values.reshape(50, -1)
+        k = dist.argmin(axis=1)
+        np.testing.assert_array_equal(out.lon, lon.ravel()[k])
+        np.testing.assert_array_equal(out.lat, lat.ravel()[k])
+        np.testing.assert_array_equal(out, da.values.reshape(3, -1)[:, k].T)
+        np.testing.assert_allclose(out.distance, dist.min(axis=1))
+
+        # Longitudes from 0 to 360 and tolerance.
+        out = subset.subset_gridpoint(
+            da.assign_coords(lon=da.lon + 360), lon=slon, lat=slat, tolerance=5e4
+        )
+        np.testing.assert_array_equal(out.lon, lon.ravel()[k] + 360)
+        far = dist.min(axis=1) >= 5e4
+        assert 0 < far.sum() < far.size
+        np.testing.assert_array_equal(out.isnull().all("time"), far)
+
+    def test_grid_tree_cache(self, monkeypatch):
+        lon, lat = np.meshgrid(np.linspace(-80, -60, 21), np.linspace(40, 55, 16))
+        da = xr.DataArray(
+            np.random.rand(16, 21),
+            dims=("y", "x"),
+            coords={"lon": (("y", "x"), lon), "lat": (("y", "x"), lat)},
+        )
+        monkeypatch.setattr(subset, "_GRID_TREES", OrderedDict())
+
+        subset.subset_gridpoint(da, lon=[-75, -70], lat=[45, 50])
+        tree = subset._grid_tree(da.lon, da.lat)
+        assert list(subset._GRID_TREES.values()) == [tree]
+
+        # Another grid, with the same values under other dimensions.
+        subset.subset_gridpoint(da.rename(x="x2"), lon=[-75, -70], lat=[45, 50])
+        assert len(subset._GRID_TREES) == 2
+        with set_options(grid_tree_cache_size=1):
+            subset.subset_gridpoint(da, lon=[-75, -70], lat=[45, 50])
+        assert list(subset._GRID_TREES.values()) == [tree]
+
+        subset._GRID_TREES.clear()
+        with set_options(grid_tree_cache_size=0):
+            out = subset.subset_gridpoint(da, lon=[-75, -70], lat=[45, 50])
+        assert not subset._GRID_TREES
+        np.testing.assert_array_equal(out.lon, [-75, -70])
+
     def test_positive_lons(self):
         da = xr.open_dataset(self.nc_poslons).tas
         lon = -72.4
@@ -775,6 +845,259 @@ class TestSubsetShape:
         ds_sub = subset.subset_shape(ds, shape=regions)
         assert ds_sub.notnull().sum() == 58 + 250 + 22
 
+    def test_mask_vectorize_windows(self):
+        outer = Polygon(
+            [(-70.03, 45.01), (-60.02, 44.03), (-62.01, 52.02), (-68.04, 50)]
+        )
+        polys = gpd.GeoDataFrame(
+            geometry=[
+                Polygon(
+                    outer.exterior.coords,
+                    [[(-66.03, 47.01), (-63.02, 46.97), (-64.01, 49.03)]],
+                ),
+                MultiPolygon(
+                    [
+                        Polygon([(-75.02, 40.01), (-72.03, 39.98), (-73.51, 43.02)]),
+                        Polygon(
+                            [
+                                (-64.02, 48.01),
+                                (-58.03, 47.98),
+                                (-57.99, 55.02),
+                                (-64.01, 55),
+                            ]
+                        ),
+                    ]
+                ),
+            ],
+            index=[3, 7],
+            crs=4326,
+        )
+        lon = xr.DataArray(np.arange(-80, -50, 0.25), dims="lon")
+        lat = xr.DataArray(np.arange(35, 60, 0.25)[::-1], dims="lat")
+        lon, lat = lon.assign_coords(lon=lon), lat.assign_coords(lat=lat)
+
+        # Brute force, the last polygon containing a point gives its value.
+        lon2d, lat2d = xr.broadcast(lon, lat)
+        exp = np.full(lon2d.shape, np.nan)
+        for pp, vv in zip(polys.index, polys.geometry):
+            exp[vectorized.contains(vv, lon2d.values, lat2d.values)] = pp
+
+        mask = subset.create_mask_vectorize(x_dim=lon, y_dim=lat, poly=polys)
+        assert mask.dims == ("lon", "lat")
+        np.testing.assert_array_equal(mask, exp)
+        assert set(np.unique(exp[~np.isnan(exp)])) == {3, 7}
+
+        mask = subset.create_mask_vectorize(
+            x_dim=lon, y_dim=lat, poly=polys, scanline=True
+        )
+        np.testing.assert_array_equal(mask, exp)
+
+        lon2d = lon2d.drop_vars(["lon", "lat"]).rename(lon="x", lat="y")
+        lat2d = lat2d.drop_vars(["lon", "lat"]).rename(lon="x", lat="y")
+        mask = subset.create_mask_vectorize(x_dim=lon2d, y_dim=lat2d, poly=polys)
+        np.testing.assert_array_equal(mask, exp)
+
+        with pytest.raises(ValueError, match="scanline"):
+            subset.create_mask_vectorize(
+                x_dim=lon2d, y_dim=lat2d, poly=polys, scanline=True
+            )
+
+    def test_create_weights(self):
+        polys = gpd.GeoDataFrame(
+            geometry=[
+                Polygon(
+                    [(-70.03, 45.01), (-60.02, 44.03), (-62.01, 52.02), (-68.04, 50)],
+                    [[(-66.03, 47.01), (-63.02, 46.97), (-64.01, 49.03)]],
+                ),
+                Polygon([(-64.02, 48.01), (-58.03, 47.98), (-57.99, 55.02)]),
+            ],
+            index=["a", "b"],
+            crs=4326,
+        )
+        lon = np.arange(-75.5, -55, 1.0)
+        lat = np.arange(59.5, 40, -1.0)
+        ds = xr.Dataset(coords=dict(lon=lon, lat=lat))
+
+        # Brute force, with the area of 1 degree cells on the unit sphere.
+        exp = np.zeros((2, lon.size, lat.size))
+        for k, geom in enumerate(polys.geometry):
+            for i, x in enumerate(lon):
+                for j, y in enumerate(lat):
+                    cell = box(x - 0.5, y - 0.5, x + 0.5, y + 0.5)
+                    exp[k, i, j] = geom.intersection(cell).area * (
+                        np.radians(1)
+                        * (np.sin(np.radians(y + 0.5)) - np.sin(np.radians(y - 0.5)))
+                    )
+
+        weights = subset.create_weights(x_dim=ds.lon, y_dim=ds.lat, poly=polys)
+        assert weights.shape == (2, lon.size * lat.size)
+        np.testing.assert_allclose(weights.toarray(), exp.reshape(2, -1), atol=1e-15)
+
+        # Grid with 2D coordinates and the vertices of the cells, areas are approximated.
+        lon2d, lat2d = np.meshgrid(lon, lat)
+        x_bnds = np.stack([lon2d - 0.5, lon2d + 0.5, lon2d + 0.5, lon2d - 0.5], -1)
+        y_bnds = np.stack([lat2d - 0.5, lat2d - 0.5, lat2d + 0.5, lat2d + 0.5], -1)
+        weights = subset.create_weights(
+            x_dim=xr.DataArray(lon2d, dims=("y", "x")),
+            y_dim=xr.DataArray(lat2d, dims=("y", "x")),
+            poly=polys,
+            x_bnds=x_bnds,
+            y_bnds=y_bnds,
+        )
+        np.testing.assert_allclose(
+            weights.toarray(), exp.transpose(0, 2, 1).reshape(2, -1), rtol=1e-4
+        )
+
+        with pytest.raises(ValueError):
+            subset.create_weights(
+                x_dim=xr.DataArray(lon2d, dims=("y", "x")),
+                y_dim=xr.DataArray(lat2d, dims=("y", "x")),
+                poly=polys,
+            )
+
+    def test_zonal_stats(self):
+        ds = xr.open_dataset(self.nc_file)
+        polys = gpd.GeoDataFrame(
+            geometry=[
+                Polygon([(-77.3, 42.1), (-64.2, 45.7), (-70.9, 57.3)]),
+                Polygon([(-75.2, 50.6), (-61.1, 50.6), (-61.1, 58.2), (-75.2, 58.2)]),
+            ],
+            index=[4, 2],
+            crs=4326,
+        )
+        # A missing value in the first region only.
+        ds.tas[0, np.abs(ds.lat - 45).argmin(), np.abs(ds.lon - 291).argmin()] = np.nan
+        weights = subset.create_weights(
+            x_dim=ds.lon, y_dim=ds.lat, poly=polys, wrap_lons=True
+        )
+        assert weights.nnz > 0
+
+        out = subset.zonal_stats(ds, polys)
+        assert out.tas.dims == ("time", "region")
+        np.testing.assert_array_equal(out.region, [4, 2])
+        assert "lon" not in out.coords and "lat" not in out.coords
+
+        # Same as the mean of the weighted values, skipping missing values.
+        tas = ds.tas.transpose("time", "lon", "lat").values.reshape(ds.time.size, -1)
+        w = weights.toarray()
+        valid = ~np.isnan(tas)
+        exp = np.nan_to_num(tas) @ w.T / (valid @ w.T)
+        np.testing.assert_allclose(out.tas, exp)
+
+        out = subset.zonal_stats(
+            ds.tas.chunk({"time": 4}), polys, weights=weights, skipna=False
+        )
+        assert out.chunks is not None
+        exp[0, (~valid[0] @ w.T) > 0] = np.nan
+        np.testing.assert_allclose(out, exp)
+        np.testing.assert_array_equal(np.isnan(out[0]), [True, False])
+
+        with pytest.raises(ValueError):
+            subset.zonal_stats(ds, polys.iloc[:1], weights=weights)
+
+        # Polygons in a projected CRS are reprojected to longitudes and latitudes.
+        tas = ds.tas.assign_coords(lon=ds.lon - 360)
+        out = subset.zonal_stats(tas, polys.to_crs(3857))
+        np.testing.assert_allclose(out, subset.zonal_stats(tas, polys), rtol=1e-6)
+        assert out.notnull().all()
+
+    def test_mask_cache(self, tmp_path, monkeypatch):
+        lon = np.arange(-80, -50, 0.5)
+        lat = np.arange(40, 60, 0.5)
+        ds = xr.Dataset(
+            {"tas": (("lat", "lon"), np.ones((lat.size, lon.size)))},
+            coords={"lon": lon, "lat": lat},
+        )
+        poly = gpd.GeoDataFrame(
+            geometry=[Polygon([(-70.03, 45.01), (-60.02, 44.03), (-62.01, 52.02)]),],
+            crs=4326,
+        )
+
+        calls = []
+        create_mask_vectorize = subset.create_mask_vectorize
+
+        @wraps(create_mask_vectorize)
+        def counting(**kwargs):
+            calls.append(kwargs)
+            return create_mask_vectorize(**kwargs)
+
+        monkeypatch.setattr(subset, "create_mask_vectorize", counting)
+        monkeypatch.setattr(subset, "_MASK_CACHE", OrderedDict())
+
+        exp = subset.subset_shape(ds, poly)
+        xr.testing.assert_identical(subset.subset_shape(ds, poly), exp)
+        assert len(calls) == 1
+
+        # Another geometry, grid or CRS gives another mask.
+        subset.subset_shape(ds, poly.set_crs(3857, allow_override=True))
+        subset.subset_shape(ds.assign_coords(lon=lon + 0.25), poly)
+        subset.subset_shape(ds, gpd.GeoDataFrame(geometry=poly.translate(0.5)))
+        assert len(calls) == 4
+
+        with set_options(mask_cache_size=0):
+            subset.subset_shape(ds, poly)
+        assert len(calls) == 5
+
+        with set_options(mask_cache_size=1):
+            subset.subset_shape(ds, poly)
+        assert len(calls) == 5
+        assert len(subset._MASK_CACHE) == 1
+
+        with set_options(mask_cache_dir=tmp_path):
+            subset._MASK_CACHE.clear()
+            subset.subset_shape(ds, poly)
+            assert len(calls) == 6
+            assert len(list(tmp_path.glob("*.npz"))) == 1
+
+            subset._MASK_CACHE.clear()
+            xr.testing.assert_identical(subset.subset_shape(ds, poly), exp)
+            assert len(calls) == 6
+
+    def test_mask_cache_warnings(self, tmp_path, monkeypatch):
+        lon = np.arange(-80, -50, 0.5)
+        lat = np.arange(40, 60, 0.5)
+        ds = xr.Dataset(
+            {"tas": (("lat", "lon"), np.ones((lat.size, lon.size)))},
+            coords={"lon": lon, "lat": lat},
+        )
+        poly = gpd.GeoDataFrame(
+            geometry=[Polygon([(-70.03, 45.01), (-60.02, 44.03), (-62.01, 52.02)]),],
+            crs=4326,
+        )
+        create_mask_vectorize = subset.create_mask_vectorize
+
+        @wraps(create_mask_vectorize)
+        def warning(**kwargs):
+            warnings.warn("Deprecated.", FutureWarning)
+            return create_mask_vectorize(**kwargs)
+
+        monkeypatch.setattr(subset, "create_mask_vectorize", warning)
+        monkeypatch.setattr(subset, "_MASK_CACHE", OrderedDict())
+
+        def categories():
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                subset.subset_shape(ds, poly)
+            return [w.category for w in caught if str(w.message) == "Deprecated."]
+
+        with set_options(mask_cache_dir=tmp_path):
+            # Computed, then from memory, then from disk, the category is kept.
+            assert categories() == [FutureWarning]
+            assert categories() == [FutureWarning]
+            subset._MASK_CACHE.clear()
+            assert categories() == [FutureWarning]
+
+            # Replayed under the active filters.
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", FutureWarning)
+                with pytest.raises(FutureWarning):
+                    subset.subset_shape(ds, poly)
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                warnings.simplefilter("ignore", FutureWarning)
+                subset.subset_shape(ds, poly)
+            assert not [w for w in caught if str(w.message) == "Deprecated."]
+
 
 class TestDistance:
     def test_values(self):
@@ -808,3 +1131,24 @@ class TestDistance:
         k = d.argmin()
         i, j = np.unravel_index(k, da.data.shape)
         assert d[i, j] == d.min()
+
+    def test_method_and_dask(self):
+        lon, lat = np.meshgrid(np.linspace(-80, -60, 21), np.linspace(40, 55, 16))
+        ds = xr.Dataset(
+            coords={"lon": (("y", "x"), lon), "lat": (("y", "x"), lat)}
+        ).chunk({"y": 5})
+
+        d = subset.distance(ds, lon=[-75, -34], lat=[45, 56])
+        assert d.chunks is not None
+        assert d.dims == ("y", "x", "site")
+        exp = subset.distance(ds.compute(), lon=[-75, -34], lat=[45, 56])
+        np.testing.assert_allclose(d, exp)
+
+        h = subset.distance(ds, lon=[-75, -34], lat=[45, 56], method="haversine")
+        assert h.chunks is not None
+        assert h.units == "m"
+        np.testing.assert_allclose(h, exp, rtol=5e-3)
+        np.testing.assert_allclose(h.isel(y=5, x=5, site=0), 0, atol=1e-6)
+
+        with pytest.raises(ValueError):
+            subset.distance(ds, lon=-75, lat=45, method="vincenty")
@@ -5,6 +5,8 @@ import pytest
 import xarray as xr
 
 from xclim import atmos
+from xclim.core import indicator
+from xclim.core.checks import missing_from_context
 from xclim.core.calendar import percentile_doy
 
 TESTS_HOME = os.path.abspath(os.path.dirname(__file__))
@@ -710,6 +712,50 @@ class TestHeatWaveTotalLength:
         np.testing.assert_allclose(hwf.values[:1], 0)
 
 
+class TestHeatWaveStatistics:
+    def test_simple(self, tasmax_series, tasmin_series):
+        tn1 = np.zeros(366)
+        tx1 = np.zeros(366)
+        tn1[:10] = np.array([20, 23, 23, 23, 23, 21, 23, 23, 23, 23])
+        tx1[:10] = np.array([29, 31, 31, 31, 29, 31, 31, 31, 31, 31])
+        tn = tasmin_series(tn1 + K2C, start="1/1/2000")
+        tx = tasmax_series(tx1 + K2C, start="1/1/2000")
+
+        out = atmos.heat_wave_statistics(
+            tn, tx, thresh_tasmin="22 C", thresh_tasmax="30 C", window_index=3
+        )
+        for ind in [
+            atmos.heat_wave_frequency,
+            atmos.heat_wave_max_length,
+            atmos.heat_wave_total_length,
+        ]:
+            exp = ind(tn, tx, thresh_tasmin="22 C", thresh_tasmax="30 C")
+            np.testing.assert_array_equal(out[ind.identifier], exp)
+            assert out[ind.identifier].long_name == exp.long_name
+        exp = atmos.heat_wave_index(tx, window=3)
+        np.testing.assert_array_equal(out.heat_wave_index, exp)
+        assert out.heat_wave_index.description == exp.description
+
+    def test_missing(self, tasmax_series, tasmin_series, monkeypatch):
+        tn1 = np.full(731, 25.0)
+        tn1[400] = np.nan
+        tn = tasmin_series(tn1 + K2C, start="1/1/2000")
+        tx = tasmax_series(np.full(731, 35.0) + K2C, start="1/1/2000")
+
+        calls = []
+
+        def missing(da, freq, **indexer):
+            calls.append(da.name)
+            return missing_from_context(da, freq, **indexer)
+
+        monkeypatch.setattr(indicator, "missing_from_context", missing)
+        out = atmos.heat_wave_statistics(tn, tx)
+        # One mask per input, shared by the members.
+        assert sorted(calls) == ["tasmax", "tasmin"]
+        np.testing.assert_array_equal(out.heat_wave_frequency.isnull(), [False, True])
+        np.testing.assert_array_equal(out.heat_wave_index.isnull(), [False, False])
+
+
 class TestHeatWaveIndex:
     def test_simple(self, tasmax_series):
         tx = np.zeros(366)
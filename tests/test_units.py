@@ -78,6 +78,17 @@ class TestConvertUnitsTo:
         out = convert_units_to(pr, "mm/day")
         assert isinstance(out.data, dsk.Array)
 
+    @pytest.mark.parametrize("dtype", [np.float32, np.float64])
+    def test_dtype_and_chunks(self, tas_series, dtype):
+        tas = tas_series(np.arange(365, dtype=dtype), start="1/1/2001")
+        out = convert_units_to(tas.chunk({"time": 100}), "degC")
+        assert out.dtype == dtype
+        assert out.chunks == ((100, 100, 100, 65),)
+        np.testing.assert_allclose(out, tas.values - 273.15, rtol=1e-6)
+
+        out = convert_units_to(convert_units_to(tas, "degF"), "K")
+        np.testing.assert_allclose(out, tas, atol=1e-3)
+
 
 class TestUnitConversion:
     def test_pint2cfunits(self):
@@ -134,3 +145,17 @@ class TestCheckUnits:
 
             with pytest.raises(ValidationError):
                 check_units("m3", "[discharge]")
+
+    def test_cached(self):
+        from xclim.core.units import _dimensionality_mismatch
+
+        check_units("25 degC", "[temperature]")
+        hits = _dimensionality_mismatch.cache_info().hits
+        check_units("25 degC", "[temperature]")
+        assert _dimensionality_mismatch.cache_info().hits == hits + 1
+
+        # Failures are not cached as exceptions, they are raised on every call.
+        with set_options(data_validation="raise"):
+            for _ in range(2):
+                with pytest.raises(ValidationError):
+                    check_units("mm", "[precipitation]")
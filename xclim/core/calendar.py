@@ -6,6 +6,8 @@ Calendar handling utilities
 Helper function to handle dates, times and different calendars with xarray.
 """
 import datetime as pydt
+import weakref
+from typing import Mapping
 from typing import Optional
 from typing import Sequence
 from typing import Union
@@ -25,6 +27,8 @@ from xarray.coding.cftime_offsets import YearEnd
 from xarray.coding.cftimeindex import CFTimeIndex
 from xarray.core.resample import DataArrayResample
 
+from .options import float_dtype
+
 
 # cftime and datetime classes to use for each calendar name
 datetime_classes = {
@@ -71,7 +75,8 @@ def get_calendar(arr: Union[xr.DataArray, xr.Dataset]) -> str:
       The cftime calendar name or "default" when the data is using numpy's datetime type (numpy.datetime64.
     """
     if arr.time.dtype == "O":  # Assume cftime, if it fails, not our fault
-        non_na_item = arr.time.where(arr.time.notnull(), drop=True)[0].item()
+        times = arr.time.values.ravel()
+        non_na_item = times[pd.notnull(times)][0]
         cal = non_na_item.calendar
     elif "datetime64" in arr.time.dtype.name:
         cal = "default"
@@ -82,6 +87,105 @@ def get_calendar(arr: Union[xr.DataArray, xr.Dataset]) -> str:
     return cal
 
 
+# Integer datetime fields of time indexes, keyed by the id of the index. See `time_fields`.
+_TIME_FIELDS_CACHE = {}
+
+# Names of the seasons, indexed by the season code of `time_fields`.
+_SEASONS = np.array(["DJF", "MAM", "JJA", "SON"])
+
+
+def time_fields(
+    time: Union[xr.DataArray, xr.Dataset, pd.DatetimeIndex, CFTimeIndex]
+) -> Mapping[str, np.ndarray]:
+    """Return the datetime fields of a time index as integer arrays.
+
+    The fields are extracted in a single pass over the timestamps and cached for as long as the time index exists,
+    so that indices working on the same data, and in particular on data with cftime calendars, do not loop over
+    the Python datetime objects again.
+
+    Parameters
+    ----------
+    time : Union[xr.DataArray, xr.Dataset, pd.DatetimeIndex, CFTimeIndex]
+      A time index or an object with a `time` coordinate.
+
+    Returns
+    -------
+    Mapping[str, np.ndarray]
+      Read-only arrays of "year", "month", "day", "hour", "minute", "second", "microsecond", "dayofyear",
+      "days_in_year", "days_in_month" and "season" (0: DJF, 1: MAM, 2: JJA, 3: SON).
+    """
+    if isinstance(time, (xr.DataArray, xr.Dataset)):
+        time = time.indexes["time"]
+
+    key = id(time)
+    cached = _TIME_FIELDS_CACHE.get(key)
+    if cached is not None and cached[0]() is time:
+        return dict(cached[1])
+
+    fields = _compute_time_fields(time)
+
+    def _drop(ref, key=key):
+        if _TIME_FIELDS_CACHE.get(key, (None,))[0] is ref:
+            del _TIME_FIELDS_CACHE[key]
+
+    _TIME_FIELDS_CACHE[key] = (weakref.ref(time, _drop), fields)
+    return dict(fields)
+
+
+def time_field(da: Union[xr.DataArray, xr.Dataset], name: str) -> xr.DataArray:
+    """Return a datetime field of the time coordinate, as `da.time.dt.<name>` would, but from cached arrays.
+
+    Fields not available through `time_fields` are delegated to the `dt` accessor.
+    """
+    fields = time_fields(da)
+    if name == "season":
+        values = _SEASONS[fields["season"]]
+    elif name in fields:
+        values = fields[name]
+    else:
+        return getattr(da.time.dt, name)
+    return xr.DataArray(values, dims=("time",), coords={"time": da.time}, name=name)
+
+
+def _compute_time_fields(time_idx: Union[pd.DatetimeIndex, CFTimeIndex]) -> dict:
+    names = ["year", "month", "day", "hour", "minute", "second", "microsecond"]
+    if isinstance(time_idx, pd.DatetimeIndex):
+        calendar = "default"
+        fields = {name: getattr(time_idx, name).values for name in names}
+        fields["dayofyear"] = time_idx.dayofyear.values
+    else:
+        calendar = time_idx[0].calendar if time_idx.size else "standard"
+        raw = np.array(
+            [
+                (
+                    t.year,
+                    t.month,
+                    t.day,
+                    t.hour,
+                    t.minute,
+                    t.second,
+                    t.microsecond,
+                    t.dayofyr,
+                )
+                for t in time_idx
+            ],
+            dtype=np.int64,
+        ).reshape(-1, len(names) + 1)
+        fields = {name: raw[:, i] for i, name in enumerate(names + ["dayofyear"])}
+
+    fields = {
+        name: field.astype(np.int64, copy=False) for name, field in fields.items()
+    }
+    fields["days_in_year"] = _days_in_year_array(fields["year"], calendar)
+    fields["days_in_month"] = _days_in_month_array(
+        fields["year"], fields["month"], calendar
+    )
+    fields["season"] = (fields["month"] // 3) % 4
+    for field in fields.values():
+        field.flags.writeable = False
+    return fields
+
+
 def convert_calendar(
     source: Union[xr.DataArray, xr.Dataset],
     target: Union[xr.DataArray, str],
@@ -157,7 +261,6 @@ def convert_calendar(
     if cal_src == cal_tgt:
         return source
 
-    out = source.copy()
     if (cal_src == "360_day" or cal_tgt == "360_day") and align_on is None:
         raise ValueError(
             "Argument `align_on` must be specified with either 'date'  or 'year' when converting to or from a '360_day' calendar."
@@ -168,7 +271,57 @@ def convert_calendar(
         )
         align_on = None
 
+    time_idx = source.time.indexes["time"]
+    fields = time_fields(time_idx)
+    if cal_tgt in ["standard", "gregorian"] and fields["year"].min() <= 1582:
+        # The integer arithmetic assumes the proleptic Gregorian rules, invalid before the Julian-Gregorian transition.
+        return _convert_calendar_loop(source, target, cal_src, cal_tgt, align_on)
+
     # TODO Maybe the 5-6 days to remove could be given by the user?
+    if align_on == "year":
+        # Nearest day in the target calendar of the corresponding "decimal year" in the source calendar
+        new_doy = np.round(
+            _days_in_year_array(fields["year"], cal_tgt)
+            * fields["dayofyear"]
+            / fields["days_in_year"]
+        ).astype(int)
+        fields["month"], fields["day"] = _doy_to_month_day(
+            fields["year"], new_doy, cal_tgt
+        )
+        valid = np.ones(time_idx.size, dtype=bool)
+    else:
+        # Drop the dates that are invalid in the target calendar
+        valid = fields["day"] <= _days_in_month_array(
+            fields["year"], fields["month"], cal_tgt
+        )
+        fields = {name: field[valid] for name, field in fields.items()}
+
+    usecs = _fields_to_microseconds(fields, cal_tgt)
+    if align_on == "year":
+        # Remove duplicate timestamps, happens when reducing the number of days
+        usecs, keep = np.unique(usecs, return_index=True)
+    else:
+        keep = np.nonzero(valid)[0]
+
+    out = source.isel(time=keep)
+    out["time"] = xr.DataArray(
+        _microseconds_to_datetimes(usecs, cal_tgt), dims=("time",), name="time",
+    )
+
+    if isinstance(target, xr.DataArray):
+        out = out.reindex(time=target)
+    return out
+
+
+def _convert_calendar_loop(
+    source: Union[xr.DataArray, xr.Dataset],
+    target: Union[xr.DataArray, str],
+    cal_src: str,
+    cal_tgt: str,
+    align_on: Optional[str] = None,
+):
+    """Convert the calendar by converting the timestamps one by one. See `convert_calendar`."""
+    out = source.copy()
     if align_on == "year":
 
         def _yearly_interp_doy(time):
@@ -208,6 +361,103 @@ def convert_calendar(
     return out
 
 
+# Cumulative number of days at the start of each month, for non-leap and leap years.
+_cumdays = {
+    False: np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]),
+    True: np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]),
+}
+
+
+def _days_in_year_array(years: np.ndarray, calendar: str) -> np.ndarray:
+    """Return the number of days in each year of an integer array, according to the calendar."""
+    uniq, inv = np.unique(years, return_inverse=True)
+    return np.array([days_in_year(int(yr), calendar) for yr in uniq])[inv]
+
+
+def _doy_to_month_day(years: np.ndarray, doy: np.ndarray, calendar: str):
+    """Return the month and the day of the month of the given days of year, according to the calendar."""
+    if calendar == "360_day":
+        return (doy - 1) // 30 + 1, (doy - 1) % 30 + 1
+
+    leap = _days_in_year_array(years, calendar) == 366
+    month = np.where(
+        leap,
+        np.searchsorted(_cumdays[True], doy, side="left"),
+        np.searchsorted(_cumdays[False], doy, side="left"),
+    )
+    day = doy - np.where(leap, _cumdays[True][month - 1], _cumdays[False][month - 1])
+    return month, day
+
+
+def _days_in_month_array(
+    years: np.ndarray, months: np.ndarray, calendar: str
+) -> np.ndarray:
+    """Return the number of days in each month, according to the calendar."""
+    if calendar == "360_day":
+        return np.full(months.shape, 30)
+    leap = _days_in_year_array(years, calendar) == 366
+    return np.where(
+        leap, np.diff(_cumdays[True])[months - 1], np.diff(_cumdays[False])[months - 1],
+    )
+
+
+def _days_before_year(years: np.ndarray, calendar: str) -> np.ndarray:
+    """Return the number of days between 0001-01-01 and January 1st of each year, according to the calendar."""
+    y = years - 1
+    if calendar == "360_day":
+        return 360 * y
+    if calendar == "noleap":
+        return 365 * y
+    if calendar == "all_leap":
+        return 366 * y
+    if calendar == "julian":
+        return 365 * y + y // 4
+    # Proleptic gregorian rules
+    return 365 * y + y // 4 - y // 100 + y // 400
+
+
+def _fields_to_microseconds(fields: dict, calendar: str) -> np.ndarray:
+    """Return the number of microseconds since 1970-01-01 of the dates given by their fields, in the target calendar.
+
+    The fields `month` and `day` must form valid dates of the calendar.
+    """
+    doy = _doy_from_month_day(fields["year"], fields["month"], fields["day"], calendar)
+    days = (
+        _days_before_year(fields["year"], calendar)
+        - _days_before_year(np.array(1970), calendar)
+        + doy
+        - 1
+    )
+    secs = (
+        days * 86400 + fields["hour"] * 3600 + fields["minute"] * 60 + fields["second"]
+    )
+    return secs * 1000000 + fields["microsecond"]
+
+
+def _doy_from_month_day(
+    years: np.ndarray, months: np.ndarray, days: np.ndarray, calendar: str
+) -> np.ndarray:
+    """Return the day of year of the given months and days, according to the calendar."""
+    if calendar == "360_day":
+        return (months - 1) * 30 + days
+    leap = _days_in_year_array(years, calendar) == 366
+    return days + np.where(
+        leap, _cumdays[True][months - 1], _cumdays[False][months - 1]
+    )
+
+
+def _microseconds_to_datetimes(usecs: np.ndarray, calendar: str) -> np.ndarray:
+    """Return an array of datetimes of the calendar from microseconds since 1970-01-01."""
+    if calendar == "default":
+        return usecs.astype("datetime64[us]").astype("datetime64[ns]")
+    return cftime.num2date(
+        usecs,
+        "microseconds since 1970-01-01",
+        calendar=calendar,
+        only_use_cftime_datetimes=True,
+    )
+
+
 def interp_calendar(
     source: Union[xr.DataArray, xr.Dataset], target: xr.DataArray,
 ) -> xr.DataArray:
@@ -322,19 +572,20 @@ def datetime_to_decimal_year(
     if calendar == "default":
         calendar = "standard"
 
-    def _make_index(time):
-        year = int(time.dt.year[0])
-        doys = cftime.date2num(
-            ensure_cftime_array(time), f"days since {year:04d}-01-01", calendar=calendar
-        )
-        return xr.DataArray(
-            year + doys / days_in_year(year, calendar),
-            dims=time.dims,
-            coords=time.coords,
-            name="time",
-        )
-
-    return times.groupby("time.year").map(_make_index)
+    fields = time_fields(times)
+    seconds = (
+        fields["hour"] * 3600
+        + fields["minute"] * 60
+        + fields["second"]
+        + fields["microsecond"] / 1e6
+    )
+    days = fields["dayofyear"] - 1 + seconds / 86400
+    return xr.DataArray(
+        fields["year"] + days / _days_in_year_array(fields["year"], calendar),
+        dims=times.dims,
+        coords=times.coords,
+        name="time",
+    )
 
 
 def days_in_year(year: int, calendar: str = "default") -> int:
@@ -347,7 +598,7 @@ def days_in_year(year: int, calendar: str = "default") -> int:
 
 
 def percentile_doy(
-    arr: xr.DataArray, window: int = 5, per: float = 0.1
+    arr: xr.DataArray, window: int = 5, per: Union[float, Sequence[float]] = 0.1
 ) -> xr.DataArray:
     """Percentile value for each day of the year
 
@@ -359,22 +610,51 @@ def percentile_doy(
       Input data.
     window : int
       Number of days around each day of the year to include in the calculation.
-    per : float
-      Percentile between [0,1]
+    per : Union[float, Sequence[float]]
+      Percentile between [0,1], or sequence of percentiles.
 
     Returns
     -------
     xr.DataArray
-      The percentiles indexed by the day of the year.
-    """
-    # TODO: Support percentile array, store percentile in coordinates.
-    #  This is supported by DataArray.quantile, but not by groupby.reduce.
-    rr = arr.rolling(min_periods=1, center=True, time=window).construct("window")
+      The percentiles indexed by the day of the year. If `per` is a sequence, the percentiles are stacked along a
+      `percentiles` dimension, whose coordinate holds the values of `per`.
 
-    # Create empty percentile array
-    g = rr.groupby("time.dayofyear")
+    Notes
+    -----
+    The window sample of each day of the year is sorted once, whatever the number of percentiles requested.
 
-    p = g.reduce(np.nanpercentile, dim=("time", "window"), q=per * 100)
+    The percentile indices (`tg90p`, `tn10p`, etc.) accept the output for several percentiles; their own output then
+    has the same `percentiles` dimension.
+    """
+    q = np.atleast_1d(np.asarray(per, dtype=float))
+    if not np.all((q >= 0) & (q <= 1)):
+        raise ValueError(f"Percentiles must be in the range [0, 1], got {per}.")
+    doy = time_fields(arr)["dayofyear"]
+    doys = np.unique(doy)
+    # Time indexes of each day of the year and offsets of the centered window around them.
+    doy_idx = [np.nonzero(doy == d)[0] for d in doys]
+    offsets = np.arange(window) - window // 2
+
+    if arr.chunks is not None:
+        # The samples gather values across the whole time series.
+        arr = arr.chunk({"time": -1})
+
+    dtype = np.result_type(arr.dtype, float_dtype())
+    p = xr.apply_ufunc(
+        _percentile_doy_kernel,
+        arr,
+        input_core_dims=[["time"]],
+        output_core_dims=[["dayofyear", "percentiles"]],
+        dask="parallelized",
+        output_dtypes=[dtype],
+        output_sizes={"dayofyear": doys.size, "percentiles": q.size},
+        kwargs=dict(doy_idx=doy_idx, offsets=offsets, q=q, dtype=dtype),
+    )
+    p = p.assign_coords(dayofyear=doys, percentiles=q).transpose(
+        *[d if d != "time" else "dayofyear" for d in arr.dims], "percentiles"
+    )
+    if np.ndim(per) == 0:
+        p = p.isel(percentiles=0, drop=True)
 
     # The percentile for the 366th day has a sample size of 1/4 of the other days.
     # To have the same sample size, we interpolate the percentile from 1-365 doy range to 1-366
@@ -385,6 +665,43 @@ def percentile_doy(
     return p
 
 
+def _percentile_doy_kernel(arr, doy_idx, offsets, q, dtype):
+    """Compute the `q` quantiles of the windowed samples of each day of the year, over the last axis of `arr`.
+
+    For each day of the year, the values within the window around all its occurrences are gathered by index
+    arithmetic (out of bounds positions being NaNs) and sorted once. The quantile is then interpolated linearly
+    between the sorted valid values, as `np.nanpercentile` does. The quantiles are stored along a new last axis.
+    """
+    pad = np.abs(offsets).max()
+    padded = np.full(arr.shape[:-1] + (arr.shape[-1] + 2 * pad,), np.nan, dtype=dtype)
+    padded[..., pad : pad + arr.shape[-1]] = arr
+
+    out = np.empty(arr.shape[:-1] + (len(doy_idx), len(q)), dtype=dtype)
+    for i, idx in enumerate(doy_idx):
+        sample = np.sort(padded[..., (idx[:, np.newaxis] + offsets + pad).ravel()])
+        out[..., i, :] = _sorted_nanquantile(sample, q)
+    return out
+
+
+def _sorted_nanquantile(arr: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Return the `q` quantiles over the last axis of an array sorted along that axis, NaNs at the end.
+
+    The last axis of the output has the size of `q`.
+    """
+    n = (~np.isnan(arr)).sum(axis=-1, keepdims=True)
+    pos = q * (n - 1)
+    lo = np.clip(np.floor(pos), 0, None).astype(int)
+    hi = np.clip(lo + 1, None, np.clip(n - 1, 0, None))
+    t = (pos - lo).astype(arr.dtype)
+
+    a = np.take_along_axis(arr, lo, axis=-1)
+    b = np.take_along_axis(arr, hi, axis=-1)
+    # Same linear interpolation as numpy, which is exact at both ends of the interval.
+    diff = b - a
+    out = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+    return np.where(n > 0, out, np.nan)
+
+
 def _interpolate_doy_calendar(source: xr.DataArray, doy_max: int) -> xr.DataArray:
     """Interpolate from one set of dayofyear range to another
 
@@ -461,7 +778,7 @@ def resample_doy(doy: xr.DataArray, arr: xr.DataArray) -> xr.DataArray:
     -------
     xr.DataArray
       An array with the same `time` dimension as `arr` whose values are filled according to the day-of-year value in
-      `doy`.
+      `doy`. Dimensions of `doy` that are not in `arr`, like `percentiles`, are kept.
     """
     if "dayofyear" not in doy.coords:
         raise AttributeError("Source should have `dayofyear` coordinates.")
@@ -469,12 +786,13 @@ def resample_doy(doy: xr.DataArray, arr: xr.DataArray) -> xr.DataArray:
     # Adjust calendar
     adoy = adjust_doy_calendar(doy, arr)
 
-    # Create array with arr shape and coords
-    out = xr.full_like(arr, np.nan)
-
     # Fill with values from `doy`
-    d = out.time.dt.dayofyear.values
-    out.data = adoy.sel(dayofyear=d)
+    d = xr.DataArray(
+        time_fields(arr)["dayofyear"], dims=("time",), coords={"time": arr.time}
+    )
+    out = adoy.sel(dayofyear=d).drop_vars("dayofyear")
+    out = out.transpose(*[dim for dim in arr.dims if dim in out.dims], ...)
+    out.attrs = arr.attrs.copy()
 
     return out
 
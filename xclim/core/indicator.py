@@ -8,11 +8,14 @@ import re
 import warnings
 from collections import defaultdict
 from collections import OrderedDict
+from functools import reduce
 from inspect import signature
+from typing import Mapping
 from typing import Sequence
 from typing import Union
 
 import numpy as np
+import xarray as xr
 from boltons.funcutils import wraps
 
 from .checks import check_daily
@@ -24,6 +27,7 @@ from .formatting import parse_doc
 from .formatting import update_history
 from .locales import get_local_attrs
 from .locales import get_local_formatter
+from .options import float_dtype
 from .options import OPTIONS
 from .units import convert_units_to
 from .units import units
@@ -125,6 +129,18 @@ class Indicator:
         ba = self._sig.bind(*args, **kwds)
         ba.apply_defaults()
 
+        das, attrs, vname = self._metadata(ba)
+
+        # Pre-computation validation checks
+        self._check_inputs(das)
+
+        # Compute the indicator values, ignoring NaNs.
+        out = self.compute(**das, **ba.kwargs)
+
+        return self._finalize(out, attrs, self._mask(das, ba), vname)
+
+    def _metadata(self, ba):
+        """Return the input arrays, popped from the bound arguments, the output attributes and the variable name."""
         # Update attributes
         out_attrs = self.format(self.cf_attrs, ba.arguments)
         for locale in OPTIONS["metadata_locales"]:
@@ -169,8 +185,10 @@ class Indicator:
             **das,
         )
         attrs.update(out_attrs)
+        return das, attrs, vname
 
-        # Pre-computation validation checks
+    def _check_inputs(self, das):
+        """Run the pre-computation validation checks on the input arrays."""
         for da in das.values():
             self.validate(da)
         try:
@@ -180,20 +198,25 @@ class Indicator:
         else:
             self.cfprobe(*cfba.args, **cfba.kwargs)
 
-        # Compute the indicator values, ignoring NaNs.
-        out = self.compute(**das, **ba.kwargs)
+    def _mask(self, das, ba):
+        """Return the missing values mask of the output."""
+        # Bind call arguments to the `missing` function, whose signature might be different from `compute`.
+        mba = signature(self.missing).bind(*das.values(), **ba.arguments)
+        return self.missing(*mba.args, **mba.kwargs)
 
+    def _finalize(self, out, attrs, mask, vname):
+        """Convert the computed values to the output units, set their attributes and mask them."""
         # Convert to output units
         out = convert_units_to(out, self.units, self.context)
 
         # Update netCDF attributes
         out.attrs.update(attrs)
 
-        # Bind call arguments to the `missing` function, whose signature might be different from `compute`.
-        mba = signature(self.missing).bind(*das.values(), **ba.arguments)
+        # In single precision mode, cast numerical outputs since masking would promote them to float64.
+        if OPTIONS["precision"] == "float32" and out.dtype.kind in "iuf":
+            out = out.astype(float_dtype(), copy=False)
 
         # Mask results that do not meet criteria defined by the `missing` method.
-        mask = self.missing(*mba.args, **mba.kwargs)
         ma_out = out.where(~mask)
 
         return ma_out.rename(vname)
@@ -329,3 +352,83 @@ class Indicator:
 
 class Indicator2D(Indicator):
     _nvar = 2
+
+
+class IndicatorGroup:
+    r"""Group of indicators computed at once by a function returning a Dataset.
+
+    The `compute` function returns a Dataset holding one variable per member indicator, named after its identifier.
+    Each variable is given the metadata and the missing values mask of its indicator, called with the arguments of the
+    group. Member arguments named differently in `compute` are mapped in `parameters`, a dictionary of
+    {member argument: group argument} dictionaries keyed by the member identifiers. The inputs are checked and, for
+    members using the default `missing` method, their missing values are flagged once for the whole group.
+    """
+    # Unique ID for function registry.
+    identifier = ""
+
+    # Member indicators
+    indicators: Sequence[Indicator] = ()
+
+    # Names of the member arguments in the group signature, by member identifier.
+    parameters: Mapping[str, Mapping[str, str]] = {}
+
+    def __init__(self, **kwds):
+        for key, val in kwds.items():
+            setattr(self, key, val)
+
+        self._sig = signature(self.compute)
+        self.__call__ = wraps(self.compute)(self.__call__.__func__)
+
+    def __call__(self, *args, **kwds):
+        ba = self._sig.bind(*args, **kwds)
+        ba.apply_defaults()
+        ds = self.compute(**ba.arguments)
+
+        checked = set()
+        masks = {}
+        out = xr.Dataset()
+        for ind in self.indicators:
+            names = self.parameters.get(ind.identifier, {})
+            mba = ind._sig.bind(
+                **{
+                    p: ba.arguments[names.get(p, p)]
+                    for p in ind._parameters
+                    if names.get(p, p) in ba.arguments
+                }
+            )
+            mba.apply_defaults()
+            das, attrs, vname = ind._metadata(mba)
+
+            key = (_func(ind.validate), _func(ind.cfprobe)) + tuple(
+                id(da) for da in das.values()
+            )
+            if key not in checked:
+                ind._check_inputs(das)
+                checked.add(key)
+
+            if ind.missing is Indicator.missing:
+                freq = mba.arguments.get("freq")
+                indexer = mba.arguments.get("indexer") or {}
+                miss = []
+                for da in das.values():
+                    mkey = (id(da), freq, repr(indexer))
+                    if mkey not in masks:
+                        masks[mkey] = missing_from_context(da, freq, **indexer)
+                    miss.append(masks[mkey])
+                mask = reduce(np.logical_or, miss)
+            else:
+                mask = ind._mask(das, mba)
+
+            da = ind._finalize(ds[ind.identifier], attrs, mask, vname)
+            out[da.name] = da
+        return out
+
+    @staticmethod
+    def compute(*args, **kwds):
+        """The function computing the indicators."""
+        raise NotImplementedError
+
+
+def _func(method):
+    """Return the function of a bound method, so that the methods of different instances compare equal."""
+    return getattr(method, "__func__", method)
@@ -1,8 +1,10 @@
 """Global or contextual options for xclim, similar to xarray.set_options"""
 import logging
 from inspect import signature
+from os import PathLike
 from warnings import warn
 
+import numpy as np
 from boltons.funcutils import wraps
 
 from .locales import _valid_locales
@@ -16,6 +18,10 @@ DATA_VALIDATION = "data_validation"
 CF_COMPLIANCE = "cf_compliance"
 CHECK_MISSING = "check_missing"
 MISSING_OPTIONS = "missing_options"
+PRECISION = "precision"
+MASK_CACHE_SIZE = "mask_cache_size"
+MASK_CACHE_DIR = "mask_cache_dir"
+GRID_TREE_CACHE_SIZE = "grid_tree_cache_size"
 
 MISSING_METHODS = {}
 
@@ -25,9 +31,14 @@ OPTIONS = {
     CF_COMPLIANCE: "warn",
     CHECK_MISSING: "any",
     MISSING_OPTIONS: {},
+    PRECISION: "float64",
+    MASK_CACHE_SIZE: 32,
+    MASK_CACHE_DIR: None,
+    GRID_TREE_CACHE_SIZE: 8,
 }
 
 _LOUDNESS_OPTIONS = frozenset(["log", "warn", "raise"])
+_PRECISION_OPTIONS = frozenset(["float32", "float64"])
 
 
 def _valid_missing_options(mopts):
@@ -50,6 +61,10 @@ _VALIDATORS = {
     CF_COMPLIANCE: _LOUDNESS_OPTIONS.__contains__,
     CHECK_MISSING: MISSING_METHODS.__contains__,
     MISSING_OPTIONS: _valid_missing_options,
+    PRECISION: _PRECISION_OPTIONS.__contains__,
+    MASK_CACHE_SIZE: lambda size: isinstance(size, int) and size >= 0,
+    MASK_CACHE_DIR: lambda path: path is None or isinstance(path, (str, PathLike)),
+    GRID_TREE_CACHE_SIZE: lambda size: isinstance(size, int) and size >= 0,
 }
 
 
@@ -76,6 +91,11 @@ def register_missing_method(name):
     return _register_missing_method
 
 
+def float_dtype() -> np.dtype:
+    """Return the floating point dtype of computed arrays, as set by the `precision` option."""
+    return np.dtype(OPTIONS[PRECISION])
+
+
 def datacheck(func):
     @wraps(func)
     def _run_check(*args, **kwargs):
@@ -130,6 +150,21 @@ class set_options:
       Default: ``'any'``
     - ``missing_options``: Dictionary of options to pass to the missing method. Keys must the name of
         missing method and values must be mappings from option names to values.
+    - ``precision``: Floating point precision of the computations, either "float64" or "float32".
+        In "float32" mode, single precision inputs are kept in single precision through the
+        indicators, the bias-adjustment utilities and the fire weather computations,
+        halving the memory footprint of intermediate arrays. See :ref:`precision` for the
+        accuracy of this mode compared to double precision.
+      Default: ``'float64'``.
+    - ``mask_cache_size``: Number of polygon masks kept in memory by `xclim.subset.subset_shape`, to be reused
+        when subsetting the same shapes from data on the same grid. 0 disables the cache.
+      Default: ``32``.
+    - ``mask_cache_dir``: Directory where `xclim.subset.subset_shape` also stores its polygon masks, so that they
+        are reused across sessions. Masks are not stored on disk if None.
+      Default: ``None``.
+    - ``grid_tree_cache_size``: Number of spatial indexes of grids kept in memory by
+        `xclim.subset.subset_gridpoint`, to find the grid points of sites on the same grid. 0 disables the cache.
+      Default: ``8``.
 
     You can use ``set_options`` either as a context manager:
 
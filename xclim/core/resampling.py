@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+Resampling utilities
+====================
+
+Reductions over resampling periods computed from integer period codes, as a faster alternative to
+`DataArray.resample` for the most common frequencies.
+"""
+import weakref
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import dask.array as dsk
+import numpy as np
+import pandas as pd
+import xarray as xr
+from xarray.coding.cftime_offsets import to_offset as cftime_to_offset
+from xarray.coding.cftimeindex import CFTimeIndex
+
+from .calendar import time_fields
+
+# Cache of the period bins, keyed by the id of the time index and the frequency.
+_PERIOD_BINS_CACHE = {}
+
+# Reductions implemented on the period bins, the others are delegated to xarray.
+_REDUCTIONS = ("sum", "count", "mean", "max", "min")
+
+
+def period_bins(
+    time: Union[xr.DataArray, pd.DatetimeIndex, CFTimeIndex], freq: str
+) -> Optional[Tuple[np.ndarray, np.ndarray, pd.Index]]:
+    """Return the bins of the resampling periods of a time index.
+
+    The bins are computed once per time index and frequency, for the frequencies starting a period every month, every
+    quarter or every year (MS, QS-DEC, YS, AS-JUL, AS-DEC, etc.).
+
+    Parameters
+    ----------
+    time : Union[xr.DataArray, pd.DatetimeIndex, CFTimeIndex]
+      A time index or an object with a `time` coordinate.
+    freq : str
+      Resampling frequency.
+
+    Returns
+    -------
+    Optional[Tuple[np.ndarray, np.ndarray, pd.Index]]
+      The positions where each non-empty period starts, the period number of these periods and the labels of all
+      periods from the first to the last, as `DataArray.resample` labels them. None if the frequency is not supported
+      or if the time index is not monotonically increasing.
+    """
+    if isinstance(time, (xr.DataArray, xr.Dataset)):
+        time = time.indexes["time"]
+
+    key = (id(time), freq)
+    cached = _PERIOD_BINS_CACHE.get(key)
+    if cached is not None and cached[0]() is time:
+        return cached[1]
+
+    bins = _compute_period_bins(time, freq)
+
+    def _drop(ref, key=key):
+        if _PERIOD_BINS_CACHE.get(key, (None,))[0] is ref:
+            del _PERIOD_BINS_CACHE[key]
+
+    _PERIOD_BINS_CACHE[key] = (weakref.ref(time, _drop), bins)
+    return bins
+
+
+def _period_months(time: Union[pd.DatetimeIndex, CFTimeIndex], freq: str):
+    """Return the length in months and the first month (0-11) modulo that length of the periods of `freq`."""
+    try:
+        if isinstance(time, CFTimeIndex):
+            offset = cftime_to_offset(freq)
+        else:
+            offset = pd.tseries.frequencies.to_offset(freq)
+    except ValueError:
+        return None
+
+    name = type(offset).__name__
+    if offset.n != 1:
+        return None
+    if name == "MonthBegin":
+        return 1, 0
+    if name == "QuarterBegin":
+        # Pandas and cftime offsets do not name the starting month the same way.
+        month = getattr(offset, "startingMonth", None) or offset.month
+        return 3, (month - 1) % 3
+    if name == "YearBegin":
+        return 12, offset.month - 1
+    return None
+
+
+def _compute_period_bins(time: Union[pd.DatetimeIndex, CFTimeIndex], freq: str):
+    months = _period_months(time, freq)
+    if months is None or time.size == 0 or not time.is_monotonic_increasing:
+        return None
+    length, first = months
+
+    fields = time_fields(time)
+    codes = (fields["year"] * 12 + fields["month"] - 1 - first) // length
+    starts = np.concatenate(([0], np.nonzero(np.diff(codes))[0] + 1))
+    present = codes[starts] - codes[0]
+
+    # Labels of all periods, including the empty ones, in months since year 0.
+    label_months = np.arange(codes[0], codes[-1] + 1) * length + first
+    if isinstance(time, CFTimeIndex):
+        date_type = type(time[0])
+        labels = CFTimeIndex(
+            [date_type(m // 12, m % 12 + 1, 1) for m in label_months], name=time.name
+        )
+    else:
+        labels = pd.DatetimeIndex(
+            (label_months - 1970 * 12).astype("datetime64[M]").astype("datetime64[ns]"),
+            name=time.name,
+        )
+    return starts, present, labels
+
+
+def resample_reduce(
+    da: xr.DataArray, op: str, freq: str, keep_attrs: bool = False
+) -> xr.DataArray:
+    """Reduce an array over its resampling periods, as `getattr(da.resample(time=freq), op)(dim="time")` does.
+
+    Supported frequencies and reductions ("sum", "count", "mean", "max", "min") are computed with `ufunc.reduceat`
+    over the period bins of the time index. Dask arrays are rechunked along time so that chunks hold whole periods and
+    stay lazy. Other frequencies and reductions are delegated to xarray.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Input data with a `time` dimension.
+    op : str {'sum', 'count', 'mean', 'max', 'min'}
+      Reduce operation, missing values being skipped.
+    freq : str
+      Resampling frequency defining the periods
+      defined in http://pandas.pydata.org/pandas-docs/stable/timeseries.html#resampling.
+    keep_attrs : bool
+      If True, the attributes of `da` are copied to the output.
+
+    Returns
+    -------
+    xr.DataArray
+      The reduced values for each period.
+    """
+    bins = period_bins(da, freq) if op in _REDUCTIONS else None
+    if bins is None:
+        return getattr(da.resample(time=freq), op)(dim="time", keep_attrs=keep_attrs)
+    starts, present, labels = bins
+
+    out = map_period_blocks(
+        _reduceat,
+        da.data,
+        starts,
+        da.get_axis_num("time"),
+        dtype=_reduce_dtype(da.dtype, op),
+        op=op,
+    )
+
+    coords = {k: v for k, v in da.coords.items() if "time" not in v.dims}
+    coords["time"] = labels[present]
+    out = xr.DataArray(out, dims=da.dims, coords=coords, name=da.name)
+    if present.size != labels.size:
+        out = out.reindex(time=labels)
+    if keep_attrs:
+        out.attrs.update(da.attrs)
+    return out
+
+
+def map_period_blocks(
+    kernel: Callable,
+    data: Union[np.ndarray, dsk.Array],
+    starts: np.ndarray,
+    axis: int,
+    new_axis: Optional[int] = None,
+    lead: int = 0,
+    trail: int = 0,
+    dtype: Optional[np.dtype] = None,
+    **kwargs,
+) -> Union[np.ndarray, dsk.Array]:
+    """Apply a kernel reducing the periods starting at `starts` along an axis, block-wise on dask arrays.
+
+    The kernel is called as `kernel(arr, starts=starts, axis=axis, **kwargs)` and returns one value per period along
+    `axis`. Dask arrays are rechunked so that chunks hold whole periods, and the kernel is applied to each block with
+    the starts of its own periods. Kernels needing values around the periods get them from overlapping blocks and are
+    passed the number of values preceding and following the periods as `lead` and `trail`.
+
+    Parameters
+    ----------
+    kernel : Callable
+      Function reducing the periods of a numpy array.
+    data : Union[np.ndarray, dask.array.Array]
+      Input data.
+    starts : np.ndarray
+      Positions where each period starts along `axis`, as returned by `period_bins`.
+    axis : int
+      Time axis of `data`.
+    new_axis : Optional[int]
+      Size of a new first axis of the kernel output, if any.
+    lead : int
+      Number of values preceding the periods the kernel needs, if available.
+    trail : int
+      Number of values following the periods the kernel needs, if available.
+    dtype : Optional[np.dtype]
+      Data type of the kernel output, required for dask arrays.
+    **kwargs
+      Other arguments of the kernel.
+
+    Returns
+    -------
+    Union[np.ndarray, dask.array.Array]
+      The kernel output, lazy for dask arrays.
+    """
+    if not isinstance(data, dsk.Array):
+        return kernel(data, starts=starts, axis=axis, **kwargs)
+
+    depth = max(lead, trail)
+    data = _period_chunks(data, starts, axis)
+    if depth and len(data.chunks[axis]) > 1 and min(data.chunks[axis]) <= depth:
+        # Overlaps cannot be larger than the blocks.
+        data = data.rechunk({axis: -1})
+    chunks = list(data.chunks)
+    offsets = np.cumsum((0,) + chunks[axis])
+    chunks[axis] = tuple(_block_periods(starts, chunks[axis]))
+    if new_axis is not None:
+        chunks.insert(0, (new_axis,))
+    if depth:
+        data = dsk.overlap.overlap(data, depth={axis: depth}, boundary="none")
+
+    return data.map_blocks(
+        _period_block,
+        kernel=kernel,
+        starts=starts,
+        offsets=offsets,
+        depth=depth,
+        lead=lead,
+        trail=trail,
+        axis=axis,
+        new_axis=None if new_axis is None else 0,
+        chunks=tuple(chunks),
+        dtype=dtype,
+        **kwargs,
+    )
+
+
+def _period_block(
+    block, kernel, starts, offsets, depth, lead, trail, axis, block_info=None, **kwargs
+):
+    i = block_info[0]["chunk-location"][axis]
+    start, stop = offsets[i], offsets[i + 1]
+    local = starts[(starts >= start) & (starts < stop)] - start
+    if depth:
+        # The overlap adds `depth` values on the sides of the inner blocks, the kernel gets the ones it needs.
+        pre, post = min(lead, start), min(trail, offsets[-1] - stop)
+        first = (depth if i > 0 else 0) - pre
+        index = [slice(None)] * block.ndim
+        index[axis] = slice(first, first + pre + stop - start + post)
+        block = block[tuple(index)]
+        if lead:
+            kwargs["lead"] = pre
+        if trail:
+            kwargs["trail"] = post
+    return kernel(block, starts=local, axis=axis, **kwargs)
+
+
+def _period_chunks(data: dsk.Array, starts: np.ndarray, axis: int) -> dsk.Array:
+    """Rechunk along `axis` so that chunk boundaries are period boundaries, keeping chunks close to the original."""
+    bounds = np.cumsum(data.chunks[axis])[:-1]
+    # Move each boundary back to the start of its period.
+    bounds = np.unique(starts[np.searchsorted(starts, bounds, side="right") - 1])
+    bounds = np.concatenate((bounds[bounds > 0], [data.shape[axis]]))
+    return data.rechunk({axis: tuple(np.diff(bounds, prepend=0))})
+
+
+def _block_periods(starts: np.ndarray, chunks: Tuple[int]):
+    """Number of periods starting in each chunk."""
+    bounds = np.cumsum((0,) + tuple(chunks))
+    return np.diff(np.searchsorted(starts, bounds))
+
+
+def _reduce_dtype(dtype: np.dtype, op: str) -> np.dtype:
+    """Data type of the reduction `op` of an array of type `dtype`."""
+    if op == "count" or (op == "sum" and dtype.kind in "biu"):
+        return np.dtype("int64")
+    if op == "mean" and dtype.kind not in "fc":
+        return np.dtype("float64")
+    return dtype
+
+
+def _reduceat(arr: np.ndarray, starts: np.ndarray, op: str, axis: int) -> np.ndarray:
+    """Reduce the segments of `arr` starting at `starts` along `axis`, skipping NaNs."""
+    missing = np.isnan(arr) if arr.dtype.kind in "fc" else None
+    if missing is not None and not missing.any():
+        missing = None
+
+    if op in ["max", "min"]:
+        if missing is None:
+            func = np.maximum if op == "max" else np.minimum
+        else:
+            func = np.fmax if op == "max" else np.fmin
+        return func.reduceat(arr, starts, axis=axis)
+
+    if op == "count":
+        if missing is None:
+            count = _segment_lengths(starts, arr.shape, axis)
+            shape = list(arr.shape)
+            shape[axis] = starts.size
+            return np.broadcast_to(count, shape).copy()
+        return np.add.reduceat(~missing, starts, axis=axis, dtype="int64")
+
+    if missing is not None:
+        arr = arr.copy()
+        np.copyto(arr, 0, where=missing)
+    # Reduceat adds sequentially, floating point sums are accumulated in double precision.
+    if arr.dtype.kind in "fc":
+        acc = np.result_type(arr.dtype, np.float64)
+    else:
+        acc = _reduce_dtype(arr.dtype, "sum")
+    total = np.add.reduceat(arr, starts, axis=axis, dtype=acc)
+    if op == "sum":
+        return total.astype(_reduce_dtype(arr.dtype, "sum"), copy=False)
+
+    # mean
+    if missing is None:
+        count = _segment_lengths(starts, arr.shape, axis)
+    else:
+        count = np.add.reduceat(~missing, starts, axis=axis, dtype="int64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (total / count).astype(_reduce_dtype(arr.dtype, "mean"), copy=False)
+
+
+def _segment_lengths(starts: np.ndarray, shape: Tuple[int], axis: int) -> np.ndarray:
+    """Lengths of the segments starting at `starts`, along `axis` of an array of the given shape."""
+    lengths = np.diff(np.append(starts, shape[axis]))
+    return lengths.reshape([-1 if i == axis else 1 for i in range(len(shape))])
@@ -8,11 +8,13 @@ most unit handling methods.
 """
 import re
 import warnings
+from functools import lru_cache
 from inspect import signature
 from typing import Any
 from typing import Optional
 from typing import Union
 
+import numpy as np
 import pint.converters
 import pint.unit
 import xarray as xr
@@ -125,14 +127,6 @@ def units2pint(value: Union[xr.DataArray, str]) -> pint.unit.UnitDefinition:
       Units of the data array.
 
     """
-
-    def _transform(s):
-        """Convert a CF-unit string to a pint expression."""
-        if s == "%":
-            return "percent"
-
-        return re.subn(r"([a-zA-Z]+)\^?(-?\d)", r"\g<1>**\g<2>", s)[0]
-
     if isinstance(value, str):
         unit = value
     elif isinstance(value, xr.DataArray):
@@ -142,6 +136,20 @@ def units2pint(value: Union[xr.DataArray, str]) -> pint.unit.UnitDefinition:
     else:
         raise NotImplementedError(f"Value of type `{type(value)}` not supported.")
 
+    return _str2pint(unit)
+
+
+@lru_cache(maxsize=256)
+def _str2pint(unit: str):
+    """Parse a unit string into a pint Unit, caching results since parsing is the bulk of unit checks."""
+
+    def _transform(s):
+        """Convert a CF-unit string to a pint expression."""
+        if s == "%":
+            return "percent"
+
+        return re.subn(r"([a-zA-Z]+)\^?(-?\d)", r"\g<1>**\g<2>", s)[0]
+
     unit = unit.replace("%", "pct")
     if unit == "1":
         unit = ""
@@ -170,6 +178,13 @@ def pint2cfunits(value: Any) -> str:
     out : str
       Units following CF-Convention.
     """
+    if isinstance(value, units.Unit):
+        return _pint2cfunits(value)
+    return _pint2cfunits.__wrapped__(value)
+
+
+@lru_cache(maxsize=256)
+def _pint2cfunits(value: Any) -> str:
     # Print units using abbreviations (millimeter -> mm)
     s = f"{value:~}"
 
@@ -255,15 +270,16 @@ def convert_units_to(
             source.attrs["units"] = tu_u
             return source
 
-        with units.context(context or "none"):
-            out = xr.DataArray(
-                data=units.convert(source.data, fu, tu),
-                coords=source.coords,
-                attrs=source.attrs,
-                name=source.name,
-            )
-            out.attrs["units"] = tu_u
-            return out
+        scale, offset = _conversion_factors(fu, tu, context or "none")
+        out = xr.DataArray(
+            data=_affine_transform(source.data, scale, offset),
+            coords=source.coords,
+            dims=source.dims,
+            attrs=source.attrs,
+            name=source.name,
+        )
+        out.attrs["units"] = tu_u
+        return out
 
     # TODO remove backwards compatibility of int/float thresholds after v1.0 release
     if isinstance(source, (float, int)):
@@ -281,34 +297,92 @@ def convert_units_to(
     raise NotImplementedError(f"Source of type `{type(source)}` is not supported.")
 
 
+@lru_cache(maxsize=None)
+def _conversion_factors(fu: Any, tu: Any, context: str = "none"):
+    """Return the (scale, offset) pair such that `x [tu] = scale * x [fu] + offset`.
+
+    All conversions supported by the registry, including offset units and the transformations of
+    the `hydro` context, are affine. Evaluating pint on two reference values is thus enough to
+    describe the conversion, and the result only depends on the units and context. The scale is
+    measured over a wide span to limit the round-off error introduced by the offset.
+    """
+    span = 1e6
+    with units.context(context):
+        offset, ref = units.convert(np.array([0.0, span]), fu, tu)
+    return float((ref - offset) / span), float(offset)
+
+
+def _affine_transform(data: Any, scale: float, offset: float):
+    """Apply `scale * data + offset` elementwise, preserving the dtype of floating point inputs.
+
+    The factors are cast to the array's dtype so that single precision data is not promoted to double.
+    Dask arrays stay lazy and keep their chunk structure.
+    """
+    dtype = data.dtype if np.issubdtype(data.dtype, np.floating) else np.float64
+    scale = np.asarray(scale, dtype=dtype)
+    offset = np.asarray(offset, dtype=dtype)
+
+    if scale == 1:
+        out = data.astype(dtype, copy=False)
+    else:
+        out = data * scale
+    if offset != 0:
+        out = out + offset
+    return out
+
+
 @datacheck
 def check_units(val: Optional[Union[str, int, float]], dim: Optional[str]) -> None:
     if dim is None or val is None:
         return
 
-    if str(val).startswith("UNSET "):
+    if isinstance(val, str) and val.startswith("UNSET "):
         warnings.warn(
             "This index calculation will soon require user-specified thresholds.",
             FutureWarning,
             stacklevel=4,
         )
-        val = str(val).replace("UNSET ", "")
+        val = val.replace("UNSET ", "")
 
     # TODO remove backwards compatibility of int/float thresholds after v1.0 release
     if isinstance(val, (int, float)):
         return
 
+    # The outcome only depends on the units, the expected dimension and the active contexts.
+    msg = _dimensionality_mismatch(units2pint(val), dim, _active_contexts())
+    if msg is not None:
+        raise ValidationError(msg)
+
+
+def _active_contexts() -> tuple:
+    """Names of the pint contexts active in the unit registry.
+
+    pint has no public accessor for the active contexts nor for their transformation graph, which the dimension
+    check also uses. Both are read from the private `UnitRegistry._active_ctx` chain, whose `contexts` and `graph`
+    attributes are the same from pint 0.9, the minimum version required, to pint 0.17, the latest version tested.
+    """
+    return tuple(ctx.name for ctx in units._active_ctx.contexts)
+
+
+@lru_cache(maxsize=256)
+def _dimensionality_mismatch(
+    val_units: Any, dim: str, contexts: tuple = ()
+) -> Optional[str]:
+    """Return an error message if `val_units` can't be converted to dimension `dim`, None otherwise.
+
+    The `contexts` active when checking, from `_active_contexts`, are part of the cache key.
+    """
     expected = units.get_dimensionality(dim.replace("dimensionless", ""))
-    val_dim = units2pint(val).dimensionality
+    val_dim = val_units.dimensionality
     if val_dim == expected:
-        return
+        return None
 
     # Check if there is a transformation available
     start = pint.util.to_units_container(expected)
     end = pint.util.to_units_container(val_dim)
-    graph = units._active_ctx.graph
+    graph = units._active_ctx.graph  # See `_active_contexts`.
     if pint.util.find_shortest_path(graph, start, end):
-        return
+        return None
 
     if dim == "[precipitation]":
         tu = "mmday"
@@ -320,11 +394,12 @@ def check_units(val: Optional[Union[str, int, float]], dim: Optional[str]) -> No
         raise NotImplementedError(f"Dimension `{dim}` is not supported.")
 
     try:
-        (1 * units2pint(val)).to(tu, "hydro")
+        (1 * val_units).to(tu, "hydro")
     except (pint.UndefinedUnitError, pint.DimensionalityError):
-        raise ValidationError(
+        return (
             f"Value's dimension `{val_dim}` does not match expected units `{expected}`."
         )
+    return None
 
 
 def declare_units(out_units, check_output=True, **units_by_name):
@@ -355,8 +430,9 @@ def declare_units(out_units, check_output=True, **units_by_name):
         def wrapper(*args, **kwargs):
             # Match all passed in value to their proper arguments so we can check units
             bound_args = sig.bind(*args, **kwargs)
-            for name, val in bound_args.arguments.items():
-                check_units(val, bound_units.arguments.get(name, None))
+            for name, dim in bound_units.arguments.items():
+                if name in bound_args.arguments:
+                    check_units(bound_args.arguments[name], dim)
 
             out = func(*args, **kwargs)
             if check_output:
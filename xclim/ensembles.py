@@ -13,6 +13,8 @@ import xarray as xr
 from sklearn.cluster import KMeans
 
 from xclim.core.formatting import update_history
+from xclim.core.options import float_dtype
+from xclim.core.options import OPTIONS
 
 # Avoid having to include matplotlib in xclim requirements
 try:
@@ -217,6 +219,8 @@ def ensemble_percentiles(
                 dask="parallelized",
                 output_dtypes=[ens[v].dtype],
             )
+            if OPTIONS["precision"] == "float32":
+                perc = perc.astype(float_dtype(), copy=False)
 
             perc.name = f"{v}_p{p:02d}"
             ds_out[perc.name] = perc
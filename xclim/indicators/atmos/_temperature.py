@@ -5,6 +5,7 @@ from xclim import indices
 from xclim.core import checks
 from xclim.core.indicator import Indicator
 from xclim.core.indicator import Indicator2D
+from xclim.core.indicator import IndicatorGroup
 from xclim.core.units import check_units
 
 __all__ = [
@@ -15,6 +16,7 @@ __all__ = [
     "heat_wave_max_length",
     "heat_wave_total_length",
     "heat_wave_index",
+    "heat_wave_statistics",
     "hot_spell_frequency",
     "hot_spell_max_length",
     "tg_mean",
@@ -195,6 +197,20 @@ heat_wave_index = Tasmax(
     compute=indices.heat_wave_index,
 )
 
+heat_wave_statistics = IndicatorGroup(
+    identifier="heat_wave_statistics",
+    indicators=[
+        heat_wave_frequency,
+        heat_wave_max_length,
+        heat_wave_total_length,
+        heat_wave_index,
+    ],
+    parameters={
+        "heat_wave_index": {"thresh": "thresh_index", "window": "window_index"}
+    },
+    compute=indices.heat_wave_statistics,
+)
+
 hot_spell_frequency = Tasmax(
     identifier="hot_spell_frequency",
     units="",
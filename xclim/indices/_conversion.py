@@ -1,3 +1,6 @@
+from functools import partial
+from typing import Sequence
+
 import numpy as np
 import xarray as xr
 
@@ -12,6 +15,7 @@ __all__ = [
     "saturation_vapor_pressure",
     "relative_humidity",
     "specific_humidity",
+    "ConversionPipeline",
 ]
 
 
@@ -82,6 +86,22 @@ def uas_vas_2_sfcwind(
     wind.attrs["units"] = "m s-1"
     wind.attrs["standard_name"] = "wind_speed"
     wind.attrs["long_name"] = "Near-Surface Wind Speed"
+    windfromdir = _wind_from_direction(uas, vas, wind)
+
+    # Add attributes to winddir. This is done by copying uas' attributes and overwriting a few of them
+    windfromdir.attrs = uas.attrs
+    windfromdir.name = "sfcWindfromdir"
+    windfromdir.attrs["standard_name"] = "wind_from_direction"
+    windfromdir.attrs["long_name"] = "Near-Surface Wind from Direction"
+    windfromdir.attrs["units"] = "degree"
+
+    return wind, windfromdir
+
+
+def _wind_from_direction(
+    uas: xr.DataArray, vas: xr.DataArray, wind: xr.DataArray
+) -> xr.DataArray:
+    """Direction from which the wind blows [degree], given its components and speed [m s-1]."""
     # Calculate the angle
     windfromdir_math = np.degrees(np.arctan2(vas, uas))
 
@@ -92,16 +112,7 @@ def uas_vas_2_sfcwind(
     # while northerly winds have a direction of 360°
     # On the Beaufort scale, calm winds are defined as < 0.5 m/s
     windfromdir = xr.where((windfromdir.round() == 0) & (wind >= 0.5), 360, windfromdir)
-    windfromdir = xr.where(wind < 0.5, 0, windfromdir)
-
-    # Add attributes to winddir. This is done by copying uas' attributes and overwriting a few of them
-    windfromdir.attrs = uas.attrs
-    windfromdir.name = "sfcWindfromdir"
-    windfromdir.attrs["standard_name"] = "wind_from_direction"
-    windfromdir.attrs["long_name"] = "Near-Surface Wind from Direction"
-    windfromdir.attrs["units"] = "degree"
-
-    return wind, windfromdir
+    return xr.where(wind < 0.5, 0, windfromdir)
 
 
 @declare_units(None, check_output=False, wind="[speed]", windfromdir="[]")
@@ -193,73 +204,13 @@ def saturation_vapor_pressure(
     .. [voemel] http://cires1.colorado.edu/~voemel/vp.html
     .. [wmo08] World Meteorological Organization. (2008). Guide to meteorological instruments and methods of observation. Geneva, Switzerland: World Meteorological Organization. https://www.weather.gov/media/epz/mesonet/CWOP-WMO8.pdf
     """
-    if ice_thresh is not None:
-        thresh = convert_units_to(ice_thresh, "degK")
-    else:
-        thresh = convert_units_to("0 K", "degK")
-    ref_is_water = tas > thresh
-
-    if method in ["sonntag90", "SO90"]:
-        e_sat = xr.where(
-            ref_is_water,
-            100
-            * np.exp(  # Where ref_is_water is True, x100 is to convert hPa to Pa
-                -6096.9385 / tas
-                + 16.635794
-                + -2.711193e-2 * tas
-                + 1.673952e-5 * tas ** 2
-                + 2.433502 * np.log(tas)  # numpy's log is ln
-            ),
-            100
-            * np.exp(  # Where ref_is_water is False (thus ref is ice)
-                -6024.5282 / tas
-                + 24.7219
-                + 1.0613868e-2 * tas
-                + -1.3198825e-5 * tas ** 2
-                + -0.49382577 * np.log(tas)
-            ),
-        )
-    elif method in ["tetens30", "TE30"]:
-        e_sat = xr.where(
-            ref_is_water,
-            610.78 * np.exp(17.269388 * (tas - 273.16) / (tas - 35.86)),
-            610.78 * np.exp(21.8745584 * (tas - 273.16) / (tas - 7.66)),
-        )
-    elif method in ["goffgratch46", "GG46"]:
-        Tb = 373.16  # Water boiling temp [K]
-        eb = 101325  # e_sat at Tb [Pa]
-        Tp = 273.16  # Triple-point temperature [K]
-        ep = 611.73  # e_sat at Tp [Pa]
-        e_sat = xr.where(
-            ref_is_water,
-            eb
-            * 10
-            ** (
-                -7.90298 * ((Tb / tas) - 1)
-                + 5.02808 * np.log10(Tb / tas)
-                + -1.3817e-7 * (10 ** (11.344 * (1 - tas / Tb)) - 1)
-                + 8.1328e-3 * (10 ** (-3.49149 * ((Tb / tas) - 1)) - 1)
-            ),
-            ep
-            * 10
-            ** (
-                -9.09718 * ((Tp / tas) - 1)
-                + -3.56654 * np.log10(Tp / tas)
-                + 0.876793 * (1 - tas / Tp)
-            ),
-        )
-    elif method in ["wmo08", "WMO08"]:
-        e_sat = xr.where(
-            ref_is_water,
-            611.2 * np.exp(17.62 * (tas - 273.16) / (tas - 30.04)),
-            611.2 * np.exp(22.46 * (tas - 273.16) / (tas - 0.54)),
-        )
-    else:
-        raise ValueError(
-            f"Method {method} is not in ['sonntag90', 'tetens30', 'goffgratch46', 'wmo08']"
-        )
-
-    return e_sat
+    return xr.apply_ufunc(
+        partial(_slabwise, _esat_slab),
+        tas,
+        kwargs=dict(thresh=_ice_thresh(ice_thresh), method=_esat_method(method)),
+        dask="parallelized",
+        output_dtypes=[_float_dtype(tas.dtype)],
+    )
 
 
 @declare_units(
@@ -349,31 +300,41 @@ def relative_humidity(
         L = 2.501e6
         Rw = (461.5,)
         rh = 100 * np.exp(-L * (tas - dtas) / (Rw * tas * dtas))
-    elif dtas is not None:
-        e_sat_dt = saturation_vapor_pressure(
-            tas=dtas, ice_thresh=ice_thresh, method=method
-        )
-        e_sat_t = saturation_vapor_pressure(
-            tas=tas, ice_thresh=ice_thresh, method=method
+        if invalid_values == "clip":
+            rh = rh.clip(0, 100)
+        elif invalid_values == "mask":
+            rh = rh.where((rh <= 100) & (rh >= 0))
+        return rh
+
+    kwargs = dict(
+        thresh=_ice_thresh(ice_thresh),
+        method=_esat_method(method),
+        invalid_values=invalid_values,
+    )
+    if dtas is not None:
+        return xr.apply_ufunc(
+            partial(_slabwise, _rh_dewpoint_slab),
+            tas,
+            dtas,
+            kwargs=kwargs,
+            join="inner",
+            dask="parallelized",
+            output_dtypes=[_float_dtype(tas.dtype, dtas.dtype)],
         )
-        rh = 100 * e_sat_dt / e_sat_t
-    else:
-        ps = convert_units_to(ps, "Pa")
-        huss = convert_units_to(huss, "")
-        tas = convert_units_to(tas, "degK")
-
-        e_sat = saturation_vapor_pressure(tas=tas, ice_thresh=ice_thresh, method=method)
 
-        w = huss / (1 - huss)
-        w_sat = 0.62198 * e_sat / (ps - e_sat)
-        rh = 100 * w / w_sat
-
-    if invalid_values == "clip":
-        rh = rh.clip(0, 100)
-    elif invalid_values == "mask":
-        rh = rh.where((rh <= 100) & (rh >= 0))
-
-    return rh
+    ps = convert_units_to(ps, "Pa")
+    huss = convert_units_to(huss, "")
+    tas = convert_units_to(tas, "degK")
+    return xr.apply_ufunc(
+        partial(_slabwise, _rh_huss_slab),
+        tas,
+        huss,
+        ps,
+        kwargs=kwargs,
+        join="inner",
+        dask="parallelized",
+        output_dtypes=[_float_dtype(tas.dtype, huss.dtype, ps.dtype)],
+    )
 
 
 @declare_units(
@@ -432,17 +393,530 @@ def specific_humidity(
     rh = convert_units_to(rh, "")
     tas = convert_units_to(tas, "degK")
 
-    e_sat = saturation_vapor_pressure(tas=tas, ice_thresh=ice_thresh, method=method)
+    return xr.apply_ufunc(
+        partial(_slabwise, _huss_slab),
+        tas,
+        rh,
+        ps,
+        kwargs=dict(
+            thresh=_ice_thresh(ice_thresh),
+            method=_esat_method(method),
+            invalid_values=invalid_values,
+        ),
+        join="inner",
+        dask="parallelized",
+        output_dtypes=[_float_dtype(tas.dtype, rh.dtype, ps.dtype)],
+    )
+
+
+class ConversionPipeline:
+    """Derive several humidity and wind variables from the same dataset, computing their shared intermediates once.
+
+    The humidity targets are computed together by a single kernel, block by block on dask arrays. It evaluates the
+    saturation vapor pressure of `tas` and the relative humidity once, then derives each requested variable from them
+    with the formulas of `relative_humidity` and `specific_humidity`. The wind speed is likewise computed once and
+    reused for the wind direction. The outputs are lazy when the inputs are dask arrays and share a single graph.
 
-    w_sat = 0.62198 * e_sat / (ps - e_sat)
-    w = w_sat * rh
-    q = w / (1 + w)
+    Parameters
+    ----------
+    ds : xr.Dataset
+      Dataset with the input variables. Humidity targets need `tas` and one of `hurs`, `tdps` or `huss` (taken in
+      this order of preference), as well as `ps` when `huss` is either the input or a target. Wind targets need `uas`
+      and `vas`.
+    targets : Sequence[str]
+      Variables to derive, among "hurs", "huss", "tdps", "sfcWind" and "sfcWindfromdir".
+    ice_thresh : str
+      Threshold temperature under which to switch to equations in reference to ice instead of water.
+      If None (default) everything is computed with reference to water.
+    method : {"goffgratch46", "sonntag90", "tetens30", "wmo08"}
+      Which method to use to compute the saturation vapor pressure, see `saturation_vapor_pressure`.
+    invalid_values : {"clip", "mask", None}
+      What to do with relative humidity values outside the 0-100 range and specific humidity values outside the 0 -
+      q_sat range. If "clip" (default), clips them, if "mask", replaces them by np.nan, and if `None`, does nothing.
 
+    Notes
+    -----
+    The dewpoint temperature is the temperature at which the saturation vapor pressure equals the vapor pressure
+    :math:`e = RH e_{sat}(T)`. It is found by inverting the saturation vapor pressure formula with secant iterations,
+    starting from the explicit inverse of the "wmo08" formula.
+
+    Examples
+    --------
+    >>> pipe = ConversionPipeline(ds, ["hurs", "huss", "sfcWind", "sfcWindfromdir"])  # doctest: +SKIP
+    >>> out = pipe.run()  # doctest: +SKIP
+    """
+
+    humidity = ("hurs", "huss", "tdps")
+    wind = ("sfcWind", "sfcWindfromdir")
+
+    # Units in which the input variables are given to the kernels.
+    _input_units = {
+        "tas": "degK",
+        "tdps": "degK",
+        "hurs": "",
+        "huss": "",
+        "ps": "Pa",
+        "uas": "m/s",
+        "vas": "m/s",
+    }
+
+    _attrs = {
+        "hurs": {"units": "%", "standard_name": "relative_humidity"},
+        "huss": {"units": "", "standard_name": "specific_humidity"},
+        "tdps": {"units": "K", "standard_name": "dew_point_temperature"},
+        "sfcWind": {"units": "m s-1", "standard_name": "wind_speed"},
+        "sfcWindfromdir": {"units": "degree", "standard_name": "wind_from_direction"},
+    }
+
+    def __init__(
+        self,
+        ds: xr.Dataset,
+        targets: Sequence[str],
+        ice_thresh: str = None,
+        method: str = "sonntag90",
+        invalid_values: str = "clip",
+    ):
+        unknown = set(targets) - set(self.humidity + self.wind)
+        if unknown:
+            raise ValueError(
+                f"Targets {sorted(unknown)} are not in {list(self.humidity + self.wind)}"
+            )
+        self.ds = ds
+        self.targets = list(targets)
+        self.ice_thresh = ice_thresh
+        self.method = _esat_method(method)
+        self.invalid_values = invalid_values
+
+        needed = set()
+        self.source = None
+        if any(t in self.humidity for t in self.targets):
+            self.source = next((v for v in self.humidity if v in ds), None)
+            if self.source is None:
+                raise ValueError(
+                    "Humidity targets need one of 'hurs', 'tdps' or 'huss' in the dataset."
+                )
+            needed.update(["tas", self.source])
+            if "huss" in self.targets or self.source == "huss":
+                needed.add("ps")
+        if any(t in self.wind for t in self.targets):
+            needed.update(["uas", "vas"])
+        missing = needed - set(ds.data_vars)
+        if missing:
+            raise ValueError(
+                f"Variables {sorted(missing)} are missing from the dataset."
+            )
+        self.inputs = sorted(needed, key=list(self._input_units).index)
+
+        # Inputs converted to the units of the kernels and computed targets, by name.
+        self._inputs = {}
+        self._outputs = {}
+
+    def _input(self, name: str) -> xr.DataArray:
+        if name not in self._inputs:
+            self._inputs[name] = convert_units_to(
+                self.ds[name], self._input_units[name]
+            )
+        return self._inputs[name]
+
+    def _humidity(self):
+        """Compute all the humidity targets at once, except the input itself."""
+        targets = [t for t in self.humidity if t in self.targets and t != self.source]
+        if self.source in self.targets:
+            self._outputs[self.source] = self.ds[self.source]
+        if not targets:
+            return
+
+        inputs = [v for v in ("tas", self.source, "ps") if v in self.inputs]
+        arrays = [self._input(v) for v in inputs]
+        nout = len(targets)
+        out = xr.apply_ufunc(
+            partial(
+                _slabwise, _humidity_slab, nout=nout if nout > 1 else None, nscratch=10
+            ),
+            *arrays,
+            kwargs=dict(
+                inputs=inputs,
+                targets=targets,
+                thresh=_ice_thresh(self.ice_thresh),
+                method=self.method,
+                invalid_values=self.invalid_values,
+            ),
+            output_core_dims=[()] * nout,
+            join="inner",
+            dask="parallelized",
+            output_dtypes=[_float_dtype(*(a.dtype for a in arrays))] * nout,
+        )
+        self._outputs.update(zip(targets, out if nout > 1 else [out]))
+
+    def _wind(self):
+        uas, vas = self._input("uas"), self._input("vas")
+        self._outputs["sfcWind"] = wind = np.hypot(uas, vas)
+        if "sfcWindfromdir" in self.targets:
+            self._outputs["sfcWindfromdir"] = _wind_from_direction(uas, vas, wind)
+
+    def run(self) -> xr.Dataset:
+        """Return the targets, computing them on the first call.
+
+        Returns
+        -------
+        xr.Dataset
+          The target variables.
+        """
+        if any(t not in self._outputs for t in self.targets if t in self.humidity):
+            self._humidity()
+        if any(t not in self._outputs for t in self.targets if t in self.wind):
+            self._wind()
+
+        out = xr.Dataset()
+        for name in self.targets:
+            da = self._outputs[name]
+            if name != self.source:
+                da = da.copy(deep=False)
+                da.attrs = dict(self._attrs[name])
+            out[name] = da.rename(name)
+        return out
+
+
+def _ice_thresh(ice_thresh: str = None):
+    """Temperature [K] under which the saturation vapor pressure is computed with reference to ice, None if never."""
+    if ice_thresh is None:
+        return None
+    return convert_units_to(ice_thresh, "degK")
+
+
+def _float_dtype(*dtypes) -> np.dtype:
+    """Floating point type of the result of an arithmetic operation between arrays of the given types."""
+    dtype = np.result_type(*dtypes)
+    return dtype if dtype.kind == "f" else np.dtype("float64")
+
+
+# Number of elements processed at once by the humidity kernels, small enough for their scratch buffers to stay in cache.
+_SLAB = 2 ** 14
+
+# The kernels below write the saturation vapor pressure [Pa] of the temperatures `t` [K] into `out`, using `s1` and
+# `s2` as scratch buffers of the same shape. Every operation is done in place, so that no temporary is allocated.
+
+
+def _sonntag90(t, out, s1, s2, a, b, c, d, e):
+    # 100 * exp(a / t + b + c t + d t^2 + e ln(t)), the factor 100 converting hPa to Pa.
+    np.multiply(t, d, out=out)
+    out += c
+    out *= t
+    out += b
+    np.log(t, out=s1)
+    s1 *= e
+    out += s1
+    np.divide(a, t, out=s1)
+    out += s1
+    np.exp(out, out=out)
+    out *= 100
+
+
+def _magnus(t, out, s1, s2, a, b, c):
+    # a * exp(b (t - 273.16) / (t - c)), the form of the tetens30 and wmo08 formulas.
+    np.subtract(t, 273.16, out=out)
+    np.subtract(t, c, out=s1)
+    out /= s1
+    out *= b
+    np.exp(out, out=out)
+    out *= a
+
+
+def _goffgratch46_water(t, out, s1, s2):
+    Tb = 373.16  # Water boiling temp [K]
+    eb = 101325  # e_sat at Tb [Pa]
+    np.divide(Tb, t, out=s1)
+    np.log10(s1, out=out)
+    out *= 5.02808
+    s1 -= 1
+    np.multiply(s1, -7.90298, out=s2)
+    out += s2
+    s1 *= -3.49149
+    np.power(10, s1, out=s1)
+    s1 -= 1
+    s1 *= 8.1328e-3
+    out += s1
+    np.multiply(t, -11.344 / Tb, out=s1)
+    s1 += 11.344
+    np.power(10, s1, out=s1)
+    s1 -= 1
+    s1 *= -1.3817e-7
+    out += s1
+    np.power(10, out, out=out)
+    out *= eb
+
+
+def _goffgratch46_ice(t, out, s1, s2):
+    Tp = 273.16  # Triple-point temperature [K]
+    ep = 611.73  # e_sat at Tp [Pa]
+    np.divide(Tp, t, out=s1)
+    np.log10(s1, out=out)
+    out *= -3.56654
+    s1 -= 1
+    s1 *= -9.09718
+    out += s1
+    np.multiply(t, -0.876793 / Tp, out=s1)
+    s1 += 0.876793
+    out += s1
+    np.power(10, out, out=out)
+    out *= ep
+
+
+# Kernels with reference to water and to ice of each method.
+_ESAT_KERNELS = {
+    "sonntag90": (
+        partial(
+            _sonntag90,
+            a=-6096.9385,
+            b=16.635794,
+            c=-2.711193e-2,
+            d=1.673952e-5,
+            e=2.433502,
+        ),
+        partial(
+            _sonntag90,
+            a=-6024.5282,
+            b=24.7219,
+            c=1.0613868e-2,
+            d=-1.3198825e-5,
+            e=-0.49382577,
+        ),
+    ),
+    "tetens30": (
+        partial(_magnus, a=610.78, b=17.269388, c=35.86),
+        partial(_magnus, a=610.78, b=21.8745584, c=7.66),
+    ),
+    "goffgratch46": (_goffgratch46_water, _goffgratch46_ice),
+    "wmo08": (
+        partial(_magnus, a=611.2, b=17.62, c=30.04),
+        partial(_magnus, a=611.2, b=22.46, c=0.54),
+    ),
+}
+
+_ESAT_ALIASES = {
+    "SO90": "sonntag90",
+    "TE30": "tetens30",
+    "GG46": "goffgratch46",
+    "WMO08": "wmo08",
+}
+
+
+def _esat_method(method: str) -> str:
+    """Return the name of the saturation vapor pressure method, resolving the aliases."""
+    method = _ESAT_ALIASES.get(method, method)
+    if method not in _ESAT_KERNELS:
+        raise ValueError(
+            f"Method {method} is not in ['sonntag90', 'tetens30', 'goffgratch46', 'wmo08']"
+        )
+    return method
+
+
+def _slabwise(kernel, *arrays, nout: int = None, nscratch: int = 5, **kwargs):
+    """Apply an elementwise kernel to successive slabs of the broadcasted arrays.
+
+    The kernel is called as `kernel(out, *arrays, scratch, **kwargs)` on 1D slabs of at most `_SLAB` elements of the
+    output and of the broadcasted arrays, with a scratch buffer of shape (nscratch, _SLAB) reused between calls.
+    The slabs are views of the arrays when possible, otherwise only a slab of broadcasted or cast values is buffered.
+    Working slab by slab keeps the intermediate values in cache and avoids allocating temporaries the size of the
+    inputs. If `nout` is given, the kernel receives a tuple of `nout` output slabs and a tuple of `nout` arrays is
+    returned.
+    """
+    shape = np.broadcast(*arrays).shape
+    dtype = _float_dtype(*(a.dtype for a in arrays))
+    out = np.empty((nout or 1,) + shape, dtype=dtype)
+    scratch = np.empty((nscratch, min(out[0].size, _SLAB)), dtype=dtype)
+
+    it = np.nditer(
+        arrays + tuple(out),
+        flags=["external_loop", "buffered", "zerosize_ok"],
+        op_flags=[["readonly"]] * len(arrays) + [["writeonly"]] * len(out),
+        op_dtypes=[dtype] * (len(arrays) + len(out)),
+        casting="unsafe",
+        buffersize=_SLAB,
+    )
+    with it:
+        for slabs in it:
+            res = slabs[len(arrays) :]
+            kernel(res if nout else res[0], *slabs[: len(arrays)], scratch, **kwargs)
+    return tuple(out) if nout else out[0]
+
+
+def _esat_slab(out, t, scratch, thresh, method):
+    """Saturation vapor pressure [Pa] of a slab of temperatures [K].
+
+    Only the formula of the reference (water or ice) of each element is evaluated. When both are needed, the
+    temperatures of each reference are packed contiguously in the scratch buffer before being evaluated.
+    Uses the first four rows of `scratch`.
+    """
+    water, ice = _ESAT_KERNELS[method]
+    if thresh is None:
+        n_water = t.size
+    else:
+        is_water = t > thresh
+        n_water = np.count_nonzero(is_water)
+
+    if n_water in (0, t.size):
+        s1, s2 = scratch[:2, : t.size]
+        (water if n_water == t.size else ice)(t, out, s1, s2)
+        return
+
+    for mask, kernel, n in (
+        (is_water, water, n_water),
+        (~is_water, ice, t.size - n_water),
+    ):
+        sub, res, s1, s2 = scratch[:4, :n]
+        np.compress(mask, t, out=sub)
+        kernel(sub, res, s1, s2)
+        out[mask] = res
+
+
+def _check_range(out: np.ndarray, low, high, invalid_values: str):
+    """Clip or mask in place the values of `out` outside [low, high]."""
+    if invalid_values == "clip":
+        np.clip(out, low, high, out=out)
+    elif invalid_values == "mask":
+        np.copyto(out, np.nan, where=(out < low) | (out > high))
+
+
+def _rh_dewpoint_slab(out, t, td, scratch, thresh, method, invalid_values):
+    """Relative humidity [%] from the temperature and the dewpoint temperature."""
+    e_sat_dt = scratch[4, : t.size]
+    _esat_slab(e_sat_dt, td, scratch, thresh, method)
+    _esat_slab(out, t, scratch, thresh, method)
+    np.divide(e_sat_dt, out, out=out)
+    out *= 100
+    _check_range(out, 0, 100, invalid_values)
+
+
+def _rh_huss_slab(out, t, huss, ps, scratch, thresh, method, invalid_values):
+    """Relative humidity [%] from the temperature [K], the specific humidity and the pressure [Pa]."""
+    _esat_slab(out, t, scratch, thresh, method)
+    # 100 w / w_sat, with w = q / (1 - q) and w_sat = 0.62198 e_sat / (p - e_sat).
+    inv_w_sat = scratch[0, : t.size]
+    np.subtract(ps, out, out=inv_w_sat)
+    out *= 0.62198
+    np.divide(inv_w_sat, out, out=inv_w_sat)
+    np.subtract(1, huss, out=out)
+    np.divide(huss, out, out=out)
+    out *= inv_w_sat
+    out *= 100
+    _check_range(out, 0, 100, invalid_values)
+
+
+def _huss_slab(out, t, rh, ps, scratch, thresh, method, invalid_values):
+    """Specific humidity from the temperature [K], the relative humidity [1] and the pressure [Pa]."""
+    _esat_slab(out, t, scratch, thresh, method)
+    # w_sat = 0.62198 e_sat / (p - e_sat), w = w_sat rh and q = w / (1 + w).
+    q_sat, tmp = scratch[:2, : t.size]
+    np.subtract(ps, out, out=tmp)
+    out *= 0.62198
+    out /= tmp
     if invalid_values is not None:
-        q_sat = w_sat / (1 + w_sat)
-        if invalid_values == "clip":
-            q = q.clip(0, q_sat)
-        elif invalid_values == "mask":
-            q = q.where((q <= q_sat) & (q >= 0))
+        np.add(out, 1, out=q_sat)
+        np.divide(out, q_sat, out=q_sat)
+    out *= rh
+    np.add(out, 1, out=tmp)
+    out /= tmp
+    if invalid_values is not None:
+        _check_range(out, 0, q_sat, invalid_values)
+
+
+# Maximum number of secant iterations inverting the saturation vapor pressure to get the dewpoint.
+_DEWPOINT_MAX_ITERATIONS = 20
+
+
+def _magnus_inverse(log_e, b, c, out, tmp):
+    # Inverse of 611.2 exp(b (T - 273.16) / (T - c)) : T = (c L - 273.16 b) / (L - b), with L = ln(e / 611.2).
+    np.multiply(log_e, c, out=out)
+    out -= 273.16 * b
+    np.subtract(log_e, b, out=tmp)
+    out /= tmp
 
-    return q
+
+def _dewpoint_slab(out, e, scratch, thresh, method):
+    """Dewpoint [K] of the vapor pressure `e` [Pa], the temperature at which it is the saturation vapor pressure.
+
+    The saturation vapor pressure is inverted with secant iterations on :math:`ln(e_{sat}(T) / e)`, starting from
+    the explicit inverse of the "wmo08" formula, until all steps are below the square root of the machine epsilon
+    [K]. Uses rows 0 to 3 and 7 to 9 of `scratch`.
+    """
+    tol = np.sqrt(np.finfo(out.dtype).eps)
+    x0, g0, g1 = scratch[7:10, : e.size]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(e, 611.2, out=g0)
+        np.log(g0, out=g0)
+        _magnus_inverse(g0, 17.62, 30.04, out=x0, tmp=g1)
+        if thresh is not None:
+            _magnus_inverse(g0, 22.46, 0.54, out=out, tmp=g1)
+            np.copyto(x0, out, where=x0 <= thresh)
+
+        np.add(x0, 0.1, out=out)
+        _esat_slab(g0, x0, scratch, thresh, method)
+        g0 /= e
+        np.log(g0, out=g0)
+        for _ in range(_DEWPOINT_MAX_ITERATIONS):
+            _esat_slab(g1, out, scratch, thresh, method)
+            g1 /= e
+            np.log(g1, out=g1)
+            # Secant step g1 (x1 - x0) / (g1 - g0), zero once converged.
+            np.subtract(out, x0, out=x0)
+            np.subtract(g1, g0, out=g0)
+            x0 /= g0
+            x0 *= g1
+            np.copyto(x0, 0, where=~np.isfinite(x0))
+            converged = max(x0.max(), -x0.min()) < tol
+            np.subtract(out, x0, out=g0)
+            np.copyto(x0, out)
+            np.copyto(out, g0)
+            np.copyto(g0, g1)
+            if converged:
+                break
+
+
+def _humidity_slab(out, *args, inputs, targets, thresh, method, invalid_values):
+    """Humidity variables `targets` from the temperature [K] and the relative humidity [1], the dewpoint [K] or the
+    specific humidity, with the pressure [Pa].
+
+    The arrays are named by `inputs`. Uses 10 rows of `scratch`.
+    """
+    *arrays, scratch = args
+    data = dict(zip(inputs, arrays))
+    n = data["tas"].size
+    e_sat, rh, tmp, q_sat = scratch[4:8, :n]
+
+    _esat_slab(e_sat, data["tas"], scratch, thresh, method)
+    if "hurs" in data:
+        rh = data["hurs"]
+    elif "tdps" in data:
+        _esat_slab(rh, data["tdps"], scratch, thresh, method)
+        rh /= e_sat
+    else:
+        # w / w_sat, with w = q / (1 - q) and w_sat = 0.62198 e_sat / (p - e_sat).
+        huss = data["huss"]
+        np.subtract(data["ps"], e_sat, out=tmp)
+        np.multiply(e_sat, 0.62198, out=rh)
+        tmp /= rh
+        np.subtract(1, huss, out=rh)
+        np.divide(huss, rh, out=rh)
+        rh *= tmp
+
+    for name, res in zip(targets, out if isinstance(out, tuple) else (out,)):
+        if name == "hurs":
+            np.multiply(rh, 100, out=res)
+            _check_range(res, 0, 100, invalid_values)
+        elif name == "huss":
+            # w_sat = 0.62198 e_sat / (p - e_sat), w = w_sat rh and q = w / (1 + w).
+            np.subtract(data["ps"], e_sat, out=tmp)
+            np.multiply(e_sat, 0.62198, out=res)
+            res /= tmp
+            if invalid_values is not None:
+                np.add(res, 1, out=q_sat)
+                np.divide(res, q_sat, out=q_sat)
+            res *= rh
+            np.add(res, 1, out=tmp)
+            res /= tmp
+            if invalid_values is not None:
+                _check_range(res, 0, q_sat, invalid_values)
+        elif name == "tdps":
+            np.multiply(rh, e_sat, out=tmp)
+            _dewpoint_slab(res, tmp, scratch, thresh, method)
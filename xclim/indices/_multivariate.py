@@ -5,7 +5,10 @@ import xarray
 
 from . import fwi
 from . import run_length as rl
-from xclim.core.calendar import resample_doy
+from .generic import compare
+from .generic import compare_doy
+from .generic import detect_pattern
+from xclim.core.resampling import resample_reduce
 from xclim.core.units import convert_units_to
 from xclim.core.units import declare_units
 from xclim.core.units import pint_multiply
@@ -35,6 +38,7 @@ __all__ = [
     "fraction_over_precip_thresh",
     "heat_wave_frequency",
     "heat_wave_max_length",
+    "heat_wave_statistics",
     "heat_wave_total_length",
     "liquid_precip_ratio",
     "precip_accumulation",
@@ -101,10 +105,8 @@ def cold_spell_duration_index(
     """
     tn10 = convert_units_to(tn10, tasmin)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(tn10, tasmin)
-
-    below = tasmin < thresh
+    # Compare with the threshold of each day of the year.
+    below = compare_doy(tasmin, "<", tn10)
 
     return below.resample(time=freq).map(
         rl.windowed_run_count, window=window, dim="time"
@@ -693,6 +695,82 @@ def heat_wave_total_length(
     return group.map(rl.windowed_run_count, args=(window,), dim="time")
 
 
+@declare_units(
+    "",
+    check_output=False,
+    tasmin="[temperature]",
+    tasmax="[temperature]",
+    thresh_tasmin="[temperature]",
+    thresh_tasmax="[temperature]",
+    thresh_index="[temperature]",
+)
+def heat_wave_statistics(
+    tasmin: xarray.DataArray,
+    tasmax: xarray.DataArray,
+    thresh_tasmin: str = "22.0 degC",
+    thresh_tasmax: str = "30 degC",
+    window: int = 3,
+    thresh_index: str = "25.0 degC",
+    window_index: int = 5,
+    freq: str = "YS",
+) -> xarray.Dataset:
+    r"""Heat wave statistics
+
+    Frequency, maximum length and total length of heat waves, and heat wave index over a given period, computed
+    together. The heat wave condition is built once and its runs are measured in a single pass.
+
+    Parameters
+    ----------
+    tasmin : xarray.DataArray
+      Minimum daily temperature [℃] or [K]
+    tasmax : xarray.DataArray
+      Maximum daily temperature [℃] or [K]
+    thresh_tasmin : str
+      The minimum temperature threshold needed to trigger a heatwave event [℃] or [K]. Default : '22 degC'
+    thresh_tasmax : str
+      The maximum temperature threshold needed to trigger a heatwave event [℃] or [K]. Default : '30 degC'
+    window : int
+      Minimum number of days with temperatures above thresholds to qualify as a heatwave.
+    thresh_index : str
+      Threshold of the maximum temperature for the heat wave index [℃] or [K]. Default: '25.0 degC'.
+    window_index : int
+      Minimum number of days with maximum temperature above `thresh_index` for the heat wave index.
+    freq : str
+      Resampling frequency; Defaults to "YS".
+
+    Returns
+    -------
+    xarray.Dataset
+      The outputs of `heat_wave_frequency`, `heat_wave_max_length` and `heat_wave_total_length` (with `thresh_tasmin`,
+      `thresh_tasmax` and `window`) and of `heat_wave_index` (with `thresh_index` and `window_index`), as variables
+      named after these indices.
+
+    Notes
+    -----
+    See notes and references of `heat_wave_max_length`.
+    """
+    thresh_tasmax = convert_units_to(thresh_tasmax, tasmax)
+    thresh_tasmin = convert_units_to(thresh_tasmin, tasmin)
+    thresh_index = convert_units_to(thresh_index, tasmax)
+
+    cond = (tasmin > thresh_tasmin) & (tasmax > thresh_tasmax)
+    stats = rl.run_statistics(cond, window, freq)
+    max_l = stats.longest_run
+    index = rl.run_statistics(compare(tasmax, ">", thresh_index), window_index, freq)
+
+    out = xarray.Dataset(
+        {
+            "heat_wave_frequency": stats.windowed_run_events,
+            "heat_wave_max_length": max_l.where(max_l >= window, 0),
+            "heat_wave_total_length": stats.windowed_run_count,
+            "heat_wave_index": index.windowed_run_count,
+        }
+    )
+    for name, da in out.data_vars.items():
+        da.attrs["units"] = "" if name == "heat_wave_frequency" else "days"
+    return out
+
+
 @declare_units("", pr="[precipitation]", prsn="[precipitation]", tas="[temperature]")
 def liquid_precip_ratio(
     pr: xarray.DataArray,
@@ -865,15 +943,11 @@ def rain_on_frozen_ground_days(
     t = convert_units_to(thresh, pr)
     frz = convert_units_to("0 C", tas)
 
-    def func(x, axis):
-        """Check that temperature conditions are below 0 for seven days and above after."""
-        frozen = x == np.array([0, 0, 0, 0, 0, 0, 0, 1], bool)
-        return frozen.all(axis=axis)
+    # Temperature below 0 for seven days and above after.
+    tcond = detect_pattern(compare(tas, ">", frz), [False] * 7 + [True])
+    pcond = compare(pr, ">", t)
 
-    tcond = (tas > frz).rolling(time=8).reduce(func, allow_lazy=True)
-    pcond = pr > t
-
-    return (tcond * pcond * 1).resample(time=freq).sum(dim="time")
+    return resample_reduce((tcond & pcond) * 1, "sum", freq)
 
 
 @declare_units(
@@ -916,12 +990,12 @@ def days_over_precip_thresh(
     thresh = convert_units_to(thresh, pr)
 
     tp = np.maximum(per, thresh)
-    if "dayofyear" in per.coords:
-        # Create time series out of doy values.
-        tp = resample_doy(tp, pr)
 
     # Compute the days where precip is both over the wet day threshold and the percentile threshold.
-    over = pr > tp
+    if "dayofyear" in per.coords:
+        over = compare_doy(pr, ">", tp)
+    else:
+        over = pr > tp
 
     return over.resample(time=freq).sum(dim="time")
 
@@ -961,15 +1035,16 @@ def fraction_over_precip_thresh(
     thresh = convert_units_to(thresh, pr)
 
     tp = np.maximum(per, thresh)
-    if "dayofyear" in per.coords:
-        # Create time series out of doy values.
-        tp = resample_doy(tp, pr)
 
     # Total precip during wet days over period
     total = pr.where(pr > thresh).resample(time=freq).sum(dim="time")
 
     # Compute the days where precip is both over the wet day threshold and the percentile threshold.
-    over = pr.where(pr > tp).resample(time=freq).sum(dim="time")
+    if "dayofyear" in per.coords:
+        over = compare_doy(pr, ">", tp)
+    else:
+        over = pr > tp
+    over = pr.where(over).resample(time=freq).sum(dim="time")
 
     return over / total
 
@@ -999,6 +1074,7 @@ def tg90p(
     Notes
     -----
     The 90th percentile should be computed for a 5 day window centered on each calendar day for a reference period.
+    `t90` may hold several percentiles, see :py:func:`xclim.core.calendar.percentile_doy`.
 
     Example
     -------
@@ -1010,11 +1086,8 @@ def tg90p(
     """
     t90 = convert_units_to(t90, tas)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(t90, tas)
-
     # Identify the days over the 90th percentile
-    over = tas > thresh
+    over = compare_doy(tas, ">", t90)
 
     return over.resample(time=freq).sum(dim="time")
 
@@ -1044,6 +1117,7 @@ def tg10p(
     Notes
     -----
     The 10th percentile should be computed for a 5 day window centered on each calendar day for a reference period.
+    `t10` may hold several percentiles, see :py:func:`xclim.core.calendar.percentile_doy`.
 
     Example
     -------
@@ -1055,11 +1129,8 @@ def tg10p(
     """
     t10 = convert_units_to(t10, tas)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(t10, tas)
-
     # Identify the days below the 10th percentile
-    below = tas < thresh
+    below = compare_doy(tas, "<", t10)
 
     return below.resample(time=freq).sum(dim="time")
 
@@ -1089,6 +1160,7 @@ def tn90p(
     Notes
     -----
     The 90th percentile should be computed for a 5 day window centered on each calendar day for a reference period.
+    `t90` may hold several percentiles, see :py:func:`xclim.core.calendar.percentile_doy`.
 
     Example
     -------
@@ -1100,11 +1172,8 @@ def tn90p(
     """
     t90 = convert_units_to(t90, tasmin)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(t90, tasmin)
-
     # Identify the days with min temp above 90th percentile.
-    over = tasmin > thresh
+    over = compare_doy(tasmin, ">", t90)
 
     return over.resample(time=freq).sum(dim="time")
 
@@ -1135,6 +1204,7 @@ def tn10p(
     Notes
     -----
     The 10th percentile should be computed for a 5 day window centered on each calendar day for a reference period.
+    `t10` may hold several percentiles, see :py:func:`xclim.core.calendar.percentile_doy`.
 
     Example
     -------
@@ -1146,11 +1216,8 @@ def tn10p(
     """
     t10 = convert_units_to(t10, tasmin)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(t10, tasmin)
-
     # Identify the days below the 10th percentile
-    below = tasmin < thresh
+    below = compare_doy(tasmin, "<", t10)
 
     return below.resample(time=freq).sum(dim="time")
 
@@ -1180,6 +1247,7 @@ def tx90p(
     Notes
     -----
     The 90th percentile should be computed for a 5 day window centered on each calendar day for a reference period.
+    `t90` may hold several percentiles, see :py:func:`xclim.core.calendar.percentile_doy`.
 
     Example
     -------
@@ -1191,11 +1259,8 @@ def tx90p(
     """
     t90 = convert_units_to(t90, tasmax)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(t90, tasmax)
-
     # Identify the days with max temp above 90th percentile.
-    over = tasmax > thresh
+    over = compare_doy(tasmax, ">", t90)
 
     return over.resample(time=freq).sum(dim="time")
 
@@ -1225,6 +1290,7 @@ def tx10p(
     Notes
     -----
     The 10th percentile should be computed for a 5 day window centered on each calendar day for a reference period.
+    `t10` may hold several percentiles, see :py:func:`xclim.core.calendar.percentile_doy`.
 
     Example
     -------
@@ -1236,11 +1302,8 @@ def tx10p(
     """
     t10 = convert_units_to(t10, tasmax)
 
-    # Create time series out of doy values.
-    thresh = resample_doy(t10, tasmax)
-
     # Identify the days below the 10th percentile
-    below = tasmax < thresh
+    below = compare_doy(tasmax, "<", t10)
 
     return below.resample(time=freq).sum(dim="time")
 
@@ -1342,10 +1405,8 @@ def warm_spell_duration_index(
     precipitation, J. Geophys. Res., 111, D05109, doi: 10.1029/2005JD006290.
 
     """
-    # Create time series out of doy values.
-    thresh = resample_doy(tx90, tasmax)
-
-    above = tasmax > thresh
+    # Compare with the threshold of each day of the year.
+    above = compare_doy(tasmax, ">", tx90)
 
     return above.resample(time=freq).map(
         rl.windowed_run_count, window=window, dim="time"
@@ -1,6 +1,13 @@
+from typing import Sequence
+from typing import Union
+
+import numpy as np
 import xarray
 
 from . import run_length as rl
+from .generic import moving_average_min_mean
+from .generic import rolling_sum_max
+from xclim.core.resampling import resample_reduce
 from xclim.core.units import convert_units_to
 from xclim.core.units import declare_units
 from xclim.core.units import pint_multiply
@@ -63,7 +70,7 @@ def tg_max(tas: xarray.DataArray, freq: str = "YS"):
         TNx_j = max(TN_{ij})
     """
 
-    return tas.resample(time=freq).max(dim="time", keep_attrs=True)
+    return resample_reduce(tas, "max", freq, keep_attrs=True)
 
 
 @declare_units("[temperature]", tas="[temperature]")
@@ -103,8 +110,9 @@ def tg_mean(tas: xarray.DataArray, freq: str = "YS"):
     >>> tg = tg_mean(t, freq="QS-DEC")
     """
 
-    arr = tas.resample(time=freq) if freq else tas
-    return arr.mean(dim="time", keep_attrs=True)
+    if freq:
+        return resample_reduce(tas, "mean", freq, keep_attrs=True)
+    return tas.mean(dim="time", keep_attrs=True)
 
 
 @declare_units("[temperature]", tas="[temperature]")
@@ -135,7 +143,7 @@ def tg_min(tas: xarray.DataArray, freq: str = "YS"):
         TGn_j = min(TG_{ij})
     """
 
-    return tas.resample(time=freq).min(dim="time", keep_attrs=True)
+    return resample_reduce(tas, "min", freq, keep_attrs=True)
 
 
 @declare_units("[temperature]", tasmin="[temperature]")
@@ -166,7 +174,7 @@ def tn_max(tasmin: xarray.DataArray, freq: str = "YS"):
         TNx_j = max(TN_{ij})
     """
 
-    return tasmin.resample(time=freq).max(dim="time", keep_attrs=True)
+    return resample_reduce(tasmin, "max", freq, keep_attrs=True)
 
 
 @declare_units("[temperature]", tasmin="[temperature]")
@@ -197,8 +205,9 @@ def tn_mean(tasmin: xarray.DataArray, freq: str = "YS"):
         TN_{ij} = \frac{ \sum_{i=1}^{I} TN_{ij} }{I}
     """
 
-    arr = tasmin.resample(time=freq) if freq else tasmin
-    return arr.mean(dim="time", keep_attrs=True)
+    if freq:
+        return resample_reduce(tasmin, "mean", freq, keep_attrs=True)
+    return tasmin.mean(dim="time", keep_attrs=True)
 
 
 @declare_units("[temperature]", tasmin="[temperature]")
@@ -229,7 +238,7 @@ def tn_min(tasmin: xarray.DataArray, freq: str = "YS"):
         TNn_j = min(TN_{ij})
     """
 
-    return tasmin.resample(time=freq).min(dim="time", keep_attrs=True)
+    return resample_reduce(tasmin, "min", freq, keep_attrs=True)
 
 
 @declare_units("[temperature]", tasmax="[temperature]")
@@ -260,7 +269,7 @@ def tx_max(tasmax: xarray.DataArray, freq: str = "YS"):
         TXx_j = max(TX_{ij})
     """
 
-    return tasmax.resample(time=freq).max(dim="time", keep_attrs=True)
+    return resample_reduce(tasmax, "max", freq, keep_attrs=True)
 
 
 @declare_units("[temperature]", tasmax="[temperature]")
@@ -291,8 +300,9 @@ def tx_mean(tasmax: xarray.DataArray, freq: str = "YS"):
         TX_{ij} = \frac{ \sum_{i=1}^{I} TX_{ij} }{I}
     """
 
-    arr = tasmax.resample(time=freq) if freq else tasmax
-    return arr.mean(dim="time", keep_attrs=True)
+    if freq:
+        return resample_reduce(tasmax, "mean", freq, keep_attrs=True)
+    return tasmax.mean(dim="time", keep_attrs=True)
 
 
 @declare_units("[temperature]", tasmax="[temperature]")
@@ -323,7 +333,7 @@ def tx_min(tasmax: xarray.DataArray, freq: str = "YS"):
         TXn_j = min(TX_{ij})
     """
 
-    return tasmax.resample(time=freq).min(dim="time", keep_attrs=True)
+    return resample_reduce(tasmax, "min", freq, keep_attrs=True)
 
 
 @declare_units("", q="[discharge]")
@@ -360,17 +370,10 @@ def base_flow_index(q: xarray.DataArray, freq: str = "YS"):
 
        \mathrm{CMA}_7(q_i) = \frac{\sum_{j=i-3}^{i+3} q_j}{7}
 
+    The moving average and the mean flow are computed in a single pass over the data, block-wise on dask arrays.
     """
-
-    m7 = (
-        q.rolling(time=7, center=True)
-        .mean(allow_lazy=True, skipna=False)
-        .resample(time=freq)
-    )
-    mq = q.resample(time=freq)
-
-    m7m = m7.min(dim="time")
-    return m7m / mq.mean(dim="time")
+    m7m, mq = moving_average_min_mean(q, 7, freq, center=True)
+    return m7m / mq
 
 
 @declare_units("days", tasmin="[temperature]")
@@ -448,7 +451,7 @@ def frost_days(tasmin: xarray.DataArray, freq: str = "YS"):
     if fu != tu:
         frz = units.convert(frz, fu, tu)
     f = (tasmin < frz) * 1
-    return f.resample(time=freq).sum(dim="time")
+    return resample_reduce(f, "sum", freq)
 
 
 @declare_units("days", tasmax="[temperature]")
@@ -484,7 +487,7 @@ def ice_days(tasmax: xarray.DataArray, freq: str = "YS"):
     if fu != tu:
         frz = units.convert(frz, fu, tu)
     f = (tasmax < frz) * 1
-    return f.resample(time=freq).sum(dim="time")
+    return resample_reduce(f, "sum", freq)
 
 
 @declare_units("mm/day", pr="[precipitation]")
@@ -521,12 +524,14 @@ def max_1day_precipitation_amount(pr: xarray.DataArray, freq: str = "YS"):
     >>> pr = xr.open_dataset(path_to_pr_file).pr
     >>> rx1day = max_1day_precipitation_amount(pr, freq="YS")
     """
-    out = pr.resample(time=freq).max(dim="time", keep_attrs=True)
+    out = resample_reduce(pr, "max", freq, keep_attrs=True)
     return convert_units_to(out, "mm/day", "hydro")
 
 
 @declare_units("mm", pr="[precipitation]")
-def max_n_day_precipitation_amount(pr, window: int = 1, freq: str = "YS"):
+def max_n_day_precipitation_amount(
+    pr, window: Union[int, Sequence[int]] = 1, freq: str = "YS"
+):
     r"""Highest precipitation amount cumulated over a n-day moving window.
 
     Calculate the n-day rolling sum of the original daily total precipitation series
@@ -536,15 +541,16 @@ def max_n_day_precipitation_amount(pr, window: int = 1, freq: str = "YS"):
     ----------
     pr : xarray.DataArray
       Daily precipitation values [Kg m-2 s-1] or [mm]
-    window : int
-      Window size in days.
+    window : Union[int, Sequence[int]]
+      Window size in days, or several window sizes.
     freq : str
       Resampling frequency; Defaults to "YS" (yearly).
 
     Returns
     -------
     xarray.DataArray
-      The highest cumulated n-day precipitation value at the given time frequency.
+      The highest cumulated n-day precipitation value at the given time frequency. If several window sizes are given,
+      the values for each are returned along a `window` dimension, all computed from a single cumulative sum.
 
     Examples
     --------
@@ -553,10 +559,15 @@ def max_n_day_precipitation_amount(pr, window: int = 1, freq: str = "YS"):
 
     >>> pr = xr.open_dataset(path_to_pr_file).pr
     >>> out = max_n_day_precipitation_amount(pr, window=5, freq="YS")
+
+    RX1day, RX3day, RX5day, RX7day and RX10day at once:
+
+    >>> out = max_n_day_precipitation_amount(pr, window=[1, 3, 5, 7, 10], freq="YS")
     """
-    # Rolling sum of the values
-    arr = pr.rolling(time=window).sum(allow_lazy=True, skipna=False)
-    out = arr.resample(time=freq).max(dim="time", keep_attrs=True)
+    # Maximum of the rolling sums of the values
+    out = rolling_sum_max(pr, window, freq)
+    if np.ndim(window) == 0:
+        out = out.isel(window=0, drop=True)
 
     out.attrs["units"] = pr.units
     # Adjust values and units to make sure they are daily
@@ -1,9 +1,14 @@
 import datetime
+from typing import Optional
+from typing import Sequence
+from typing import Union
 
 import numpy as np
 import xarray
 
+from . import generic
 from . import run_length as rl
+from .generic import compare
 from .generic import threshold_count
 from xclim.core.units import convert_units_to
 from xclim.core.units import declare_units
@@ -23,6 +28,7 @@ __all__ = [
     "cold_spell_days",
     "daily_pr_intensity",
     "cooling_degree_days",
+    "degree_days",
     "freshet_start",
     "growing_degree_days",
     "growing_season_end",
@@ -50,7 +56,11 @@ __all__ = [
 
 @declare_units("days", tas="[temperature]", thresh="[temperature]")
 def cold_spell_days(
-    tas, thresh: str = "-10 degC", window: int = 5, freq: str = "AS-JUL"
+    tas,
+    thresh: str = "-10 degC",
+    window: int = 5,
+    freq: str = "AS-JUL",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Cold spell days
 
@@ -67,6 +77,8 @@ def cold_spell_days(
       Minimum number of days with temperature below threshold to qualify as a cold spell.
     freq : str
       Resampling frequency; Defaults to "AS-JUL".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tas` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -86,7 +98,7 @@ def cold_spell_days(
 
     """
     t = convert_units_to(thresh, tas)
-    over = tas < t
+    over = compare(tas, "<", t, cube=cube)
     group = over.resample(time=freq)
 
     return group.map(rl.windowed_run_count, window=window, dim="time")
@@ -149,7 +161,12 @@ def daily_pr_intensity(pr, thresh: str = "1 mm/day", freq: str = "YS"):
 
 
 @declare_units("days", pr="[precipitation]", thresh="[precipitation]")
-def dry_days(pr: xarray.DataArray, thresh: str = "0.2 mm/d", freq: str = "YS"):
+def dry_days(
+    pr: xarray.DataArray,
+    thresh: str = "0.2 mm/d",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
+):
     r"""Dry days
 
     The number of days with daily precipitation below threshold.
@@ -162,6 +179,8 @@ def dry_days(pr: xarray.DataArray, thresh: str = "0.2 mm/d", freq: str = "YS"):
       Threshold temperature on which to base evaluation. Default: '0.2 mm/d'.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `pr` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -178,12 +197,15 @@ def dry_days(pr: xarray.DataArray, thresh: str = "0.2 mm/d", freq: str = "YS"):
         \sum PR_{ij} < Threshold [mm/day]
     """
     thresh = convert_units_to(thresh, pr)
-    return pr.pipe(lambda x: (pr < thresh) * 1).resample(time=freq).sum(dim="time")
+    return threshold_count(pr, "<", thresh, freq, cube=cube)
 
 
 @declare_units("days", pr="[precipitation]", thresh="[precipitation]")
 def maximum_consecutive_wet_days(
-    pr: xarray.DataArray, thresh: str = "1 mm/day", freq: str = "YS"
+    pr: xarray.DataArray,
+    thresh: str = "1 mm/day",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Consecutive wet days.
 
@@ -197,6 +219,8 @@ def maximum_consecutive_wet_days(
       Threshold precipitation on which to base evaluation [Kg m-2 s-1] or [mm]. Default : '1 mm/day'
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `pr` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -220,7 +244,7 @@ def maximum_consecutive_wet_days(
     """
     thresh = convert_units_to(thresh, pr, "hydro")
 
-    group = (pr > thresh).resample(time=freq)
+    group = compare(pr, ">", thresh, cube=cube).resample(time=freq)
     return group.map(rl.longest_run, dim="time")
 
 
@@ -258,15 +282,73 @@ def cooling_degree_days(
     where :math:`[P]` is 1 if :math:`P` is true, and 0 if false.
     """
     thresh = convert_units_to(thresh, tas)
+    return generic.degree_days(tas, thresh, freq, ">").isel(threshold=0, drop=True)
 
-    return (
-        tas.pipe(lambda x: x - thresh).clip(min=0).resample(time=freq).sum(dim="time")
-    )
+
+@declare_units("C days", tas="[temperature]")
+def degree_days(
+    tas: xarray.DataArray,
+    thresh: Sequence[str] = ("4.0 degC",),
+    op: Union[str, Sequence[str]] = ">",
+    cap: Optional[Sequence[Optional[str]]] = None,
+    freq: str = "YS",
+):
+    r"""Degree days for several base temperatures
+
+    Sum of degree days above or below several temperature thresholds, computed in a single pass over the data.
+
+    Parameters
+    ----------
+    tas : xarray.DataArray
+      Mean daily temperature [℃] or [K]
+    thresh : Sequence[str]
+      Base temperatures [℃] or [K]. Default: ('4.0 degC',).
+    op : Union[str, Sequence[str]] {">", "<"}
+      Sum the degrees above (">", as growing or cooling degree days) or below ("<", as heating degree days) the
+      thresholds. Either one for all thresholds or one per threshold. Default: ">".
+    cap : Optional[Sequence[Optional[str]]]
+      Temperatures [℃] or [K] at which `tas` is capped before computing the degrees, one per threshold, None for
+      no cap. The cap is an upper bound for the degrees above a threshold and a lower bound for the degrees below.
+    freq : str
+      Resampling frequency; Defaults to "YS".
+
+    Returns
+    -------
+    xarray.DataArray
+      Degree days along a `threshold` dimension, labelled by `thresh`.
+
+    Notes
+    -----
+    Let :math:`x_i` be the daily mean temperature at day :math:`i` and :math:`c` the cap. Then the degree days above
+    temperature threshold :math:`thresh` over period :math:`\phi` are given by:
+
+    .. math::
+
+        \sum_{i \in \phi} (\min(x_i, c) - thresh) [\min(x_i, c) > thresh]
+
+    where :math:`[P]` is 1 if :math:`P` is true, and 0 if false.
+
+    Examples
+    --------
+    Growing degree days at base 0, 5 and 10℃, and heating and cooling degree days at base 18℃:
+
+    >>> dd = degree_days(tas, thresh=["0 degC", "5 degC", "10 degC", "18 degC", "18 degC"],
+    ...                  op=[">", ">", ">", "<", ">"])  # doctest: +SKIP
+    """
+    thresholds = [convert_units_to(t, tas) for t in thresh]
+    if cap is not None:
+        cap = [np.nan if c is None else convert_units_to(c, tas) for c in cap]
+    out = generic.degree_days(tas, thresholds, freq, op, cap)
+    return out.assign_coords(threshold=list(thresh))
 
 
 @declare_units("", tas="[temperature]", thresh="[temperature]")
 def freshet_start(
-    tas: xarray.DataArray, thresh: str = "0 degC", window: int = 5, freq: str = "YS"
+    tas: xarray.DataArray,
+    thresh: str = "0 degC",
+    window: int = 5,
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""First day consistently exceeding threshold temperature.
 
@@ -283,6 +365,8 @@ def freshet_start(
       Minimum number of days with temperature above threshold needed for evaluation.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tas` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -303,7 +387,7 @@ def freshet_start(
     1 if :math:`P` is true, and 0 if false.
     """
     thresh = convert_units_to(thresh, tas)
-    over = tas > thresh
+    over = compare(tas, ">", thresh, cube=cube)
     return over.resample(time=freq).map(
         rl.first_run, dim="time", window=window, coord="dayofyear"
     )
@@ -341,9 +425,7 @@ def growing_degree_days(
         GD4_j = \sum_{i=1}^I (TG_{ij}-{4} | TG_{ij} > {4}℃)
     """
     thresh = convert_units_to(thresh, tas)
-    return (
-        tas.pipe(lambda x: x - thresh).clip(min=0).resample(time=freq).sum(dim="time")
-    )
+    return generic.degree_days(tas, thresh, freq, ">").isel(threshold=0, drop=True)
 
 
 @declare_units("", tas="[temperature]", thresh="[temperature]")
@@ -353,6 +435,7 @@ def growing_season_end(
     mid_date: str = "07-01",
     window: int = 5,
     freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Day of the year of the start of a sequence of days with a temperature consistently below a threshold, after a period with temperatures consistently above the same threshold.
 
@@ -371,6 +454,8 @@ def growing_season_end(
       Minimum number of days with temperature below threshold needed for evaluation.
     freq : str
       Resampling frequency. Default: "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tas` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -380,7 +465,7 @@ def growing_season_end(
       If the growing season does not end within the time period, returns the last day of the period.
     """
     thresh = convert_units_to(thresh, tas)
-    cond = tas >= thresh
+    cond = compare(tas, ">=", thresh, cube=cube)
 
     return cond.resample(time=freq).map(
         rl.run_end_after_date,
@@ -398,6 +483,7 @@ def growing_season_length(
     window: int = 6,
     mid_date: str = "07-01",
     freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Growing season length.
 
@@ -421,6 +507,8 @@ def growing_season_length(
       Date of the year after which to look for the end of the season. Should have the format '%m-%d'.
     freq : str
       Resampling frequency. Default: "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tas` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -449,7 +537,7 @@ def growing_season_length(
     >>> gsl = growing_season_length(tas, mid_date='01-01', freq='AS-Jul')
     """
     thresh = convert_units_to(thresh, tas)
-    cond = tas >= thresh
+    cond = compare(tas, ">=", thresh, cube=cube)
 
     return cond.resample(time=freq).map(
         rl.run_length_with_date, window=window, date=mid_date, dim="time",
@@ -463,6 +551,7 @@ def last_spring_frost(
     before_date: str = "07-01",
     window: int = 1,
     freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Last day of temperatures inferior to a threshold temperature.
 
@@ -481,6 +570,8 @@ def last_spring_frost(
       Minimum number of days with temperature below threshold needed for evaluation.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tas` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -489,7 +580,7 @@ def last_spring_frost(
       If there is no such day, return np.nan.
     """
     thresh = convert_units_to(thresh, tas)
-    cond = tas < thresh
+    cond = compare(tas, "<", thresh, cube=cube)
 
     return cond.resample(time=freq).map(
         rl.last_run_before_date,
@@ -506,6 +597,7 @@ def heat_wave_index(
     thresh: str = "25.0 degC",
     window: int = 5,
     freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Heat wave index.
 
@@ -521,6 +613,8 @@ def heat_wave_index(
       Minimum number of days with temperature above threshold to qualify as a heatwave.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmax` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -528,7 +622,7 @@ def heat_wave_index(
       Heat wave index.
     """
     thresh = convert_units_to(thresh, tasmax)
-    over = tasmax > thresh
+    over = compare(tasmax, ">", thresh, cube=cube)
     group = over.resample(time=freq)
 
     return group.map(rl.windowed_run_count, window=window, dim="time")
@@ -566,8 +660,7 @@ def heating_degree_days(
         HD17_j = \sum_{i=1}^{I} (17℃ - TG_{ij})
     """
     thresh = convert_units_to(thresh, tas)
-
-    return tas.pipe(lambda x: thresh - x).clip(0).resample(time=freq).sum(dim="time")
+    return generic.degree_days(tas, thresh, freq, "<").isel(threshold=0, drop=True)
 
 
 @declare_units(
@@ -578,6 +671,7 @@ def hot_spell_max_length(
     thresh_tasmax: str = "30 degC",
     window: int = 1,
     freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ) -> xarray.DataArray:
     # Dev note : we should decide if it is deg K or C
     r"""Longest hot spell
@@ -598,6 +692,8 @@ def hot_spell_max_length(
       Minimum number of days with temperatures above thresholds to qualify as a heatwave.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmax` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -624,7 +720,7 @@ def hot_spell_max_length(
     """
     thresh_tasmax = convert_units_to(thresh_tasmax, tasmax)
 
-    cond = tasmax > thresh_tasmax
+    cond = compare(tasmax, ">", thresh_tasmax, cube=cube)
     group = cond.resample(time=freq)
     max_l = group.map(rl.longest_run, dim="time")
     return max_l.where(max_l >= window, 0)
@@ -638,6 +734,7 @@ def hot_spell_frequency(
     thresh_tasmax: str = "30 degC",
     window: int = 3,
     freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ) -> xarray.DataArray:
     # Dev note : we should decide if it is deg K or C
     r"""Hot spell frequency
@@ -656,6 +753,8 @@ def hot_spell_frequency(
       Minimum number of days with temperatures above thresholds to qualify as a heatwave.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmax` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -682,14 +781,17 @@ def hot_spell_frequency(
     """
     thresh_tasmax = convert_units_to(thresh_tasmax, tasmax)
 
-    cond = tasmax > thresh_tasmax
+    cond = compare(tasmax, ">", thresh_tasmax, cube=cube)
     group = cond.resample(time=freq)
     return group.map(rl.windowed_run_events, window=window, dim="time")
 
 
 @declare_units("days", tasmin="[temperature]", thresh="[temperature]")
 def tn_days_below(
-    tasmin: xarray.DataArray, thresh: str = "-10.0 degC", freq: str = "YS"
+    tasmin: xarray.DataArray,
+    thresh: str = "-10.0 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Number of days with tmin below a threshold
 
@@ -703,6 +805,8 @@ def tn_days_below(
       Threshold temperature on which to base evaluation [℃] or [K] . Default: '-10 degC'.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmin` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -719,13 +823,16 @@ def tn_days_below(
         TX_{ij} < Threshold [℃]
     """
     thresh = convert_units_to(thresh, tasmin)
-    f1 = threshold_count(tasmin, "<", thresh, freq)
+    f1 = threshold_count(tasmin, "<", thresh, freq, cube=cube)
     return f1
 
 
 @declare_units("days", tasmax="[temperature]", thresh="[temperature]")
 def tx_days_above(
-    tasmax: xarray.DataArray, thresh: str = "25.0 degC", freq: str = "YS"
+    tasmax: xarray.DataArray,
+    thresh: str = "25.0 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Number of summer days
 
@@ -739,6 +846,8 @@ def tx_days_above(
       Threshold temperature on which to base evaluation [℃] or [K]. Default: '25 degC'.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmax` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -755,13 +864,15 @@ def tx_days_above(
         TX_{ij} > Threshold [℃]
     """
     thresh = convert_units_to(thresh, tasmax)
-    f = (tasmax > thresh) * 1
-    return f.resample(time=freq).sum(dim="time")
+    return threshold_count(tasmax, ">", thresh, freq, cube=cube)
 
 
 @declare_units("days", tasmax="[temperature]", thresh="[temperature]")
 def warm_day_frequency(
-    tasmax: xarray.DataArray, thresh: str = "30 degC", freq: str = "YS"
+    tasmax: xarray.DataArray,
+    thresh: str = "30 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Frequency of extreme warm days
 
@@ -775,6 +886,8 @@ def warm_day_frequency(
       Threshold temperature on which to base evaluation [℃] or [K]. Default : '30 degC'
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmax` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -791,13 +904,15 @@ def warm_day_frequency(
 
     """
     thresh = convert_units_to(thresh, tasmax)
-    events = (tasmax > thresh) * 1
-    return events.resample(time=freq).sum(dim="time")
+    return threshold_count(tasmax, ">", thresh, freq, cube=cube)
 
 
 @declare_units("days", tasmin="[temperature]", thresh="[temperature]")
 def warm_night_frequency(
-    tasmin: xarray.DataArray, thresh: str = "22 degC", freq: str = "YS"
+    tasmin: xarray.DataArray,
+    thresh: str = "22 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Frequency of extreme warm nights
 
@@ -811,6 +926,8 @@ def warm_night_frequency(
       Threshold temperature on which to base evaluation [℃] or [K]. Default : '22 degC'
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmin` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -818,12 +935,16 @@ def warm_night_frequency(
       The number of days with tasmin > thresh per period
     """
     thresh = convert_units_to(thresh, tasmin)
-    events = (tasmin > thresh) * 1
-    return events.resample(time=freq).sum(dim="time")
+    return threshold_count(tasmin, ">", thresh, freq, cube=cube)
 
 
 @declare_units("days", pr="[precipitation]", thresh="[precipitation]")
-def wetdays(pr: xarray.DataArray, thresh: str = "1.0 mm/day", freq: str = "YS"):
+def wetdays(
+    pr: xarray.DataArray,
+    thresh: str = "1.0 mm/day",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
+):
     r"""Wet days
 
     Return the total number of days during period with precipitation over threshold.
@@ -837,6 +958,8 @@ def wetdays(pr: xarray.DataArray, thresh: str = "1.0 mm/day", freq: str = "YS"):
     freq : str
       Resampling frequency defining the periods defined in
       http://pandas.pydata.org/pandas-docs/stable/timeseries.html#resampling; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `pr` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -855,13 +978,15 @@ def wetdays(pr: xarray.DataArray, thresh: str = "1.0 mm/day", freq: str = "YS"):
     """
     thresh = convert_units_to(thresh, pr, "hydro")
 
-    wd = (pr >= thresh) * 1
-    return wd.resample(time=freq).sum(dim="time")
+    return threshold_count(pr, ">=", thresh, freq, cube=cube)
 
 
 @declare_units("days", pr="[precipitation]", thresh="[precipitation]")
 def maximum_consecutive_dry_days(
-    pr: xarray.DataArray, thresh: str = "1 mm/day", freq: str = "YS"
+    pr: xarray.DataArray,
+    thresh: str = "1 mm/day",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Maximum number of consecutive dry days
 
@@ -876,6 +1001,8 @@ def maximum_consecutive_dry_days(
       Threshold precipitation on which to base evaluation [mm]. Default : '1 mm/day'
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `pr` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -897,14 +1024,17 @@ def maximum_consecutive_dry_days(
     the start and end of the series, but the numerical algorithm does.
     """
     t = convert_units_to(thresh, pr, "hydro")
-    group = (pr < t).resample(time=freq)
+    group = compare(pr, "<", t, cube=cube).resample(time=freq)
 
     return group.map(rl.longest_run, dim="time")
 
 
 @declare_units("days", tasmin="[temperature]", thresh="[temperature]")
 def maximum_consecutive_frost_free_days(
-    tasmin: xarray.DataArray, thresh: str = "0 degC", freq: str = "YS"
+    tasmin: xarray.DataArray,
+    thresh: str = "0 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Maximum number of consecutive frost free days (Tn > 0℃)
 
@@ -919,6 +1049,8 @@ def maximum_consecutive_frost_free_days(
       Threshold temperature [K].
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmin` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -940,14 +1072,17 @@ def maximum_consecutive_frost_free_days(
     the start and end of the series, but the numerical algorithm does.
     """
     t = convert_units_to(thresh, tasmin)
-    group = (tasmin > t).resample(time=freq)
+    group = compare(tasmin, ">", t, cube=cube).resample(time=freq)
 
     return group.map(rl.longest_run, dim="time")
 
 
 @declare_units("days", tasmax="[temperature]", thresh="[temperature]")
 def maximum_consecutive_tx_days(
-    tasmax: xarray.DataArray, thresh: str = "25 degC", freq: str = "YS"
+    tasmax: xarray.DataArray,
+    thresh: str = "25 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Maximum number of consecutive summer days (Tx > 25℃)
 
@@ -962,6 +1097,8 @@ def maximum_consecutive_tx_days(
       Threshold temperature [K].
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmax` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -983,7 +1120,7 @@ def maximum_consecutive_tx_days(
     the start and end of the series, but the numerical algorithm does.
     """
     t = convert_units_to(thresh, tasmax)
-    group = (tasmax > t).resample(time=freq)
+    group = compare(tasmax, ">", t, cube=cube).resample(time=freq)
 
     return group.map(rl.longest_run, dim="time")
 
@@ -1062,7 +1199,10 @@ def sea_ice_extent(sic, area, thresh: str = "15 pct"):
 
 @declare_units("days", tasmin="[temperature]", thresh="[temperature]")
 def tropical_nights(
-    tasmin: xarray.DataArray, thresh: str = "20.0 degC", freq: str = "YS",
+    tasmin: xarray.DataArray,
+    thresh: str = "20.0 degC",
+    freq: str = "YS",
+    cube: Optional[generic.ThresholdCube] = None,
 ):
     r"""Tropical nights
 
@@ -1076,6 +1216,8 @@ def tropical_nights(
       Threshold temperature on which to base evaluation [℃] or [K]. Default: '20 degC'.
     freq : str
       Resampling frequency; Defaults to "YS".
+    cube : Optional[ThresholdCube]
+      Exceedances of `tasmin` precomputed with the threshold, see :py:class:`xclim.indices.generic.ThresholdCube`.
 
     Returns
     -------
@@ -1092,6 +1234,4 @@ def tropical_nights(
         TN_{ij} > Threshold [℃]
     """
     thresh = convert_units_to(thresh, tasmin)
-    return (
-        tasmin.pipe(lambda x: (tasmin > thresh) * 1).resample(time=freq).sum(dim="time")
-    )
+    return threshold_count(tasmin, ">", thresh, freq, cube=cube)
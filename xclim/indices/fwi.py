@@ -86,6 +86,8 @@ from dask.array import Array as dskarray
 from numba import jit
 from numba import vectorize
 
+from xclim.core.calendar import time_field
+from xclim.core.options import float_dtype
 
 DEFAULT_PARAMS = dict(
     # min_lat=-58,
@@ -514,9 +516,14 @@ def _fire_weather_calc(
         else:
             ind_prevs[name] = ind_prev.copy()
 
+    # Floating point inputs keep their precision, unless single precision is requested.
+    if float_dtype() == np.float32 or tas.dtype.kind != "f":
+        dtype = float_dtype()
+    else:
+        dtype = tas.dtype
     ind_data = OrderedDict()
     for indice in indexes:
-        ind_data[indice] = np.zeros_like(tas) * np.nan
+        ind_data[indice] = np.full(tas.shape, np.nan, dtype=dtype)
 
     # We have to start further is snow_depth is used for shut_down and/or start_up
     start_idx = params.get(
@@ -694,7 +701,7 @@ def fire_weather_ufunc(
         (rh, "rh", ["DMC", "FFMC"], True),
         (ws, "ws", ["FFMC"], True),
         (snd, "snd", ["snow_depth"], True),
-        (tas.time.dt.month, "month", ["DC", "DMC"], True),
+        (time_field(tas, "month"), "month", ["DC", "DMC"], True),
         (lat, "lat", ["DC", "DMC"], False),
         (dc0, "dc0", ["DC"], False),
         (dmc0, "dmc0", ["DMC"], False),
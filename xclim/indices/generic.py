@@ -7,13 +7,26 @@ Helper functions for common generic actions done in the computation of indices.
 """
 # Note: scipy.stats.dist.shapes: comma separated names of shape parameters
 # The other parameters, common to all distribution, are loc and scale.
+import operator
+import warnings
+from typing import Optional
 from typing import Sequence
+from typing import Tuple
 from typing import Union
 
 import dask.array
 import numpy as np
+import pandas as pd
 import xarray as xr
 
+from xclim.core.calendar import adjust_doy_calendar
+from xclim.core.calendar import time_field
+from xclim.core.calendar import time_fields
+from xclim.core.resampling import map_period_blocks
+from xclim.core.resampling import period_bins
+from xclim.core.resampling import resample_reduce
+from xclim.core.units import convert_units_to
+
 
 def select_time(da: xr.DataArray, **indexer):
     """Select entries according to a time period.
@@ -36,7 +49,7 @@ def select_time(da: xr.DataArray, **indexer):
         selected = da
     else:
         key, val = indexer.popitem()
-        time_att = getattr(da.time.dt, key)
+        time_att = time_field(da, key)
         selected = da.sel(time=time_att.isin(val)).dropna(dim="time")
 
     return selected
@@ -65,17 +78,16 @@ def select_resample_op(da: xr.DataArray, op, freq: str = "YS", **indexer):
       The maximum value for each period.
     """
     da = select_time(da, **indexer)
-    r = da.resample(time=freq, keep_attrs=True)
     if isinstance(op, str):
-        return getattr(r, op)(dim="time", keep_attrs=True)
+        return resample_reduce(da, op, freq, keep_attrs=True)
 
-    return r.map(op)
+    return da.resample(time=freq, keep_attrs=True).map(op)
 
 
 def doymax(da: xr.DataArray):
     """Return the day of year of the maximum value."""
     i = da.argmax(dim="time")
-    out = da.time.dt.dayofyear[i]
+    out = time_field(da, "dayofyear")[i]
     out.attrs["units"] = ""
     return out
 
@@ -83,12 +95,17 @@ def doymax(da: xr.DataArray):
 def doymin(da: xr.DataArray):
     """Return the day of year of the minimum value."""
     i = da.argmin(dim="time")
-    out = da.time.dt.dayofyear[i]
+    out = time_field(da, "dayofyear")[i]
     out.attrs["units"] = ""
     return out
 
 
-def fit(da: xr.DataArray, dist: str = "norm"):
+def fit(
+    da: xr.DataArray,
+    dist: str = "norm",
+    method: str = "ml",
+    init: Optional[str] = None,
+):
     """Fit an array to a univariate distribution along the time dimension.
 
     Parameters
@@ -98,48 +115,105 @@ def fit(da: xr.DataArray, dist: str = "norm"):
     dist : str
       Name of the univariate distribution, such as beta, expon, genextreme, gamma, gumbel_r, lognorm, norm
       (see scipy.stats).
+    method : {'ml', 'lmoments', 'mom'}
+      Fitting method, either maximum likelihood (ml), L-moments (lmoments) or method of moments (mom). The L-moments
+      and method of moments estimators are computed over the whole array at once and are available for the
+      distributions in `fit_dists`.
+    init : {None, 'lmoments', 'mom'}
+      For maximum likelihood fits, method used to compute the initial guess of the parameters. If None, the default
+      initial guess of scipy is used.
 
     Returns
     -------
     xr.DataArray
-      An array of distribution parameters fitted using the method of Maximum Likelihood.
+      An array of distribution parameters fitted using the given method.
 
     Notes
     -----
     Coordinates for which all values are NaNs will be dropped before fitting the distribution. If the array
     still contains NaNs, the distribution parameters will be returned as NaNs.
+
+    The method of moments matches the sample mean, the standard deviation (ddof=0) and the skewness with those of the
+    distribution. The L-moments estimators are those of Hosking (1990), using unbiased estimators of the
+    probability weighted moments. Parameters are NaNs where the sample L-moments or moments cannot be matched by the
+    distribution, for example for a negative skewness with the `gamma` or `lognorm` distributions.
     """
     # Get the distribution
     dc = get_dist(dist)
     shape_params = [] if dc.shapes is None else dc.shapes.split(",")
     dist_params = shape_params + ["loc", "scale"]
 
-    # Fit the parameters.
-    # This would also be the place to impose constraints on the series minimum length if needed.
-    def fitfunc(arr):
-        """Fit distribution parameters."""
-        x = np.ma.masked_invalid(arr).compressed()
-
-        # Return NaNs if array is empty.
-        if len(x) <= 1:
-            return [np.nan] * len(dist_params)
-
-        # Fill with NaNs if one of the parameters is NaN
-        params = dc.fit(x)
-        if np.isnan(params).any():
-            params[:] = np.nan
-
-        return params
-
-    # xarray.apply_ufunc does not yet support multiple outputs with dask parallelism.
-    data = dask.array.apply_along_axis(fitfunc, da.get_axis_num("time"), da)
+    if method not in _FIT_ESTIMATORS:
+        raise ValueError(
+            f"Fitting method `{method}` should be one of {list(_FIT_ESTIMATORS)}."
+        )
+    if dist not in fit_dists and (method != "ml" or init is not None):
+        raise ValueError(
+            f"Distribution `{dist}` is only supported by the maximum likelihood method without initial guess."
+        )
+
+    if da.chunks is not None:
+        # The estimators need the whole time series.
+        da = da.chunk({"time": -1})
+
+    if method == "ml":
+        if init is None:
+            guess = xr.DataArray(np.full(len(dist_params), np.nan), dims=("dparams",))
+        else:
+            guess = fit(da, dist, method=init).transpose(..., "dparams")
+
+        # Fit the parameters.
+        # This would also be the place to impose constraints on the series minimum length if needed.
+        def fitfunc(arr, guess):
+            """Fit distribution parameters."""
+            x = np.ma.masked_invalid(arr).compressed()
+
+            # Return NaNs if array is empty.
+            if len(x) <= 1:
+                return np.full(len(dist_params), np.nan)
+
+            if np.isnan(guess).any():
+                params = np.array(dc.fit(x))
+            else:
+                params = np.array(
+                    dc.fit(x, *guess[:-2], loc=guess[-2], scale=guess[-1])
+                )
+
+            # Fill with NaNs if one of the parameters is NaN
+            if np.isnan(params).any():
+                params[:] = np.nan
+
+            return params
+
+        data = xr.apply_ufunc(
+            fitfunc,
+            da,
+            guess,
+            input_core_dims=[["time"], ["dparams"]],
+            output_core_dims=[["dparams"]],
+            vectorize=True,
+            dask="parallelized",
+            output_dtypes=[float],
+            output_sizes={"dparams": len(dist_params)},
+        )
+    else:
+        data = xr.apply_ufunc(
+            _fit_vectorized,
+            da,
+            input_core_dims=[["time"]],
+            output_core_dims=[["dparams"]],
+            dask="parallelized",
+            output_dtypes=[float],
+            output_sizes={"dparams": len(dist_params)},
+            kwargs={"dist": dist, "method": method},
+        )
 
     # Count the number of values used for the fit.
     # n = da.notnull().count(dim='time')
 
     # Coordinates for the distribution parameters
     coords = dict(da.coords.items())
-    coords.pop("time")
+    coords.pop("time", None)
     coords["dparams"] = dist_params
 
     # Dimensions for the distribution parameters
@@ -147,21 +221,224 @@ def fit(da: xr.DataArray, dist: str = "norm"):
     dims.extend(da.dims)
     dims.remove("time")
 
-    out = xr.DataArray(data=data, coords=coords, dims=dims)
+    out = xr.DataArray(data=data.transpose(*dims).data, coords=coords, dims=dims)
     out.attrs = da.attrs
     out.attrs["original_name"] = getattr(da, "standard_name", "")
     out.attrs[
         "description"
     ] = f"Parameters of the {dist} distribution fitted over {getattr(da, 'standard_name', '')}"
-    out.attrs["estimator"] = "Maximum likelihood"
+    out.attrs["estimator"] = _FIT_ESTIMATORS[method]
     out.attrs["scipy_dist"] = dist
     out.attrs["units"] = ""
     # out.name = 'params'
     return out
 
 
+_FIT_ESTIMATORS = {
+    "ml": "Maximum likelihood",
+    "lmoments": "L-moments",
+    "mom": "Method of moments",
+}
+
+# Euler-Mascheroni constant
+_EULER = 0.5772156649015329
+
+
+def _fit_vectorized(arr: np.ndarray, dist: str, method: str) -> np.ndarray:
+    """Estimate the parameters of `dist` from the samples along the last axis of `arr`, ignoring NaNs."""
+    x = np.sort(arr, axis=-1)
+    n = (~np.isnan(x)).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        if method == "lmoments":
+            moments = _sample_lmoments(x, n)
+        else:
+            moments = _sample_moments(x, n)
+        params = fit_dists[dist][method](*moments)
+        params = np.stack(np.broadcast_arrays(*params), axis=-1)
+    # Fill with NaNs if one of the parameters is NaN
+    params[np.isnan(params).any(axis=-1) | (n <= 1)] = np.nan
+    return params
+
+
+def _sample_lmoments(x: np.ndarray, n: np.ndarray):
+    """Return the first two sample L-moments and the L-skewness of arrays sorted along the last axis, NaNs last."""
+    x = np.where(np.isnan(x), 0, x)
+    j = np.arange(x.shape[-1])
+    n = n[..., np.newaxis]
+    # Unbiased estimators of the probability weighted moments
+    b0 = x.sum(axis=-1) / n[..., 0]
+    b1 = (x * j / (n - 1)).sum(axis=-1) / n[..., 0]
+    b2 = (x * (j * (j - 1)) / ((n - 1) * (n - 2))).sum(axis=-1) / n[..., 0]
+    l1 = b0
+    l2 = 2 * b1 - b0
+    l3 = 6 * b2 - 6 * b1 + b0
+    return l1, l2, l3 / l2
+
+
+def _sample_moments(x: np.ndarray, n: np.ndarray):
+    """Return the mean, the standard deviation and the skewness of arrays along the last axis, ignoring NaNs."""
+    mean = np.nansum(x, axis=-1) / n
+    dev = x - mean[..., np.newaxis]
+    var = np.nansum(dev ** 2, axis=-1) / n
+    skew = np.nansum(dev ** 3, axis=-1) / n / var ** 1.5
+    return mean, np.sqrt(var), skew
+
+
+def _bisect(func, target, lower, upper, iterations=60):
+    """Find where the decreasing function `func` equals `target` by bisection, element-wise."""
+    # Targets out of the range of `func` cannot be matched.
+    valid = (target <= func(lower)) & (target >= func(upper))
+    lower = np.full(np.shape(target), lower, dtype=float)
+    upper = np.full(np.shape(target), upper, dtype=float)
+    for _ in range(iterations):
+        mid = (lower + upper) / 2
+        above = func(mid) > target
+        lower = np.where(above, mid, lower)
+        upper = np.where(above, upper, mid)
+    return np.where(valid, (lower + upper) / 2, np.nan)
+
+
+def _gev_lmoments(l1, l2, t3):
+    """Parameters (c, loc, scale) of the GEV from its L-moments, with the approximation of Hosking et al. (1985)."""
+    from scipy.special import gamma
+
+    c = 2 / (3 + t3) - np.log(2) / np.log(3)
+    k = 7.8590 * c + 2.9554 * c ** 2
+    scale = l2 * k / ((1 - 2 ** -k) * gamma(1 + k))
+    loc = l1 - scale * (1 - gamma(1 + k)) / k
+    return k, loc, scale
+
+
+def _gev_skewness(k):
+    """Skewness of the GEV for the shape parameter `k` (scipy's `c`), defined for k > -1/3."""
+    from scipy.special import gamma
+
+    g1, g2, g3 = gamma(1 + k), gamma(1 + 2 * k), gamma(1 + 3 * k)
+    return np.sign(k) * (-g3 + 3 * g1 * g2 - 2 * g1 ** 3) / (g2 - g1 ** 2) ** 1.5
+
+
+def _gev_mom(mean, std, skew):
+    from scipy.special import gamma
+
+    k = _bisect(_gev_skewness, skew, -1 / 3 + 1e-6, 10)
+    g1, g2 = gamma(1 + k), gamma(1 + 2 * k)
+    scale = std * np.abs(k) / np.sqrt(g2 - g1 ** 2)
+    loc = mean - scale * (1 - g1) / k
+    return k, loc, scale
+
+
+def _pearson3_lmoments(l1, l2, t3):
+    """Parameters (skew, loc, scale) of the Pearson III from its L-moments, with the approximations of Hosking."""
+    from scipy.special import gammaln
+
+    t = np.abs(t3)
+    z = np.where(t < 1 / 3, 3 * np.pi * t ** 2, 1 - t)
+    alpha = np.where(
+        t < 1 / 3,
+        (1 + 0.2906 * z) / (z + 0.1882 * z ** 2 + 0.0442 * z ** 3),
+        (0.36067 * z - 0.59567 * z ** 2 + 0.25361 * z ** 3)
+        / (1 - 2.78861 * z + 2.56096 * z ** 2 - 0.77045 * z ** 3),
+    )
+    scale = l2 * np.sqrt(np.pi * alpha) * np.exp(gammaln(alpha) - gammaln(alpha + 0.5))
+    skew = 2 / np.sqrt(alpha) * np.sign(t3)
+    return skew, l1, scale
+
+
+def _gamma_from_pearson3(skew, loc, scale):
+    """Parameters (a, loc, scale) of the gamma distribution equivalent to a Pearson III of positive skewness."""
+    skew = np.where(skew > 0, skew, np.nan)
+    return 4 / skew ** 2, loc - 2 * scale / skew, scale * skew / 2
+
+
+def _lognorm_lmoments(l1, l2, t3):
+    """Parameters (s, loc, scale) of the three-parameter lognormal from its L-moments, through the generalized
+    normal distribution of Hosking (1997)."""
+    from scipy.special import ndtr
+
+    t = t3 ** 2
+    k = (
+        -t3
+        * (2.0466534 - 3.6544371 * t + 1.8396733 * t ** 2 - 0.20360244 * t ** 3)
+        / (1 - 2.0182173 * t + 1.2420401 * t ** 2 - 0.21741801 * t ** 3)
+    )
+    # Only negative shapes of the generalized normal, i.e. positive skewness, are lognormal.
+    k = np.where(k < 0, k, np.nan)
+    alpha = l2 * k * np.exp(-(k ** 2) / 2) / (1 - 2 * ndtr(-k / np.sqrt(2)))
+    xi = l1 - alpha / k * (1 - np.exp(k ** 2 / 2))
+    return -k, xi + alpha / k, -alpha / k
+
+
+def _lognorm_mom(mean, std, skew):
+    skew = np.where(skew > 0, skew, np.nan)
+    root = np.sqrt(1 + skew ** 2 / 4)
+    w = (
+        np.cbrt(1 + skew ** 2 / 2 + skew * root)
+        + np.cbrt(1 + skew ** 2 / 2 - skew * root)
+        - 1
+    )
+    scale = std / np.sqrt(w * (w - 1))
+    return np.sqrt(np.log(w)), mean - scale * np.sqrt(w), scale
+
+
+def _weibull_min_lmoments(l1, l2, t3):
+    """Parameters (c, loc, scale) of the Weibull from its L-moments, as minus a reversed Weibull, which is a GEV."""
+    k, loc, scale = _gev_lmoments(-l1, l2, -t3)
+    k = np.where(k > 0, k, np.nan)
+    return 1 / k, -(loc + scale / k), scale / k
+
+
+def _weibull_skewness(c):
+    from scipy.special import gamma
+
+    g1, g2, g3 = gamma(1 + 1 / c), gamma(1 + 2 / c), gamma(1 + 3 / c)
+    return (g3 - 3 * g1 * g2 + 2 * g1 ** 3) / (g2 - g1 ** 2) ** 1.5
+
+
+def _weibull_min_mom(mean, std, skew):
+    from scipy.special import gamma
+
+    c = np.exp(_bisect(lambda logc: _weibull_skewness(np.exp(logc)), skew, -2, 5))
+    g1, g2 = gamma(1 + 1 / c), gamma(1 + 2 / c)
+    scale = std / np.sqrt(g2 - g1 ** 2)
+    return c, mean - scale * g1, scale
+
+
+# Vectorized estimators, as functions of the sample L-moments (l1, l2, t3) or of the sample moments (mean, std,
+# skewness), returning the parameters in the order of scipy.stats.
+fit_dists = {
+    "norm": {
+        "lmoments": lambda l1, l2, t3: (l1, l2 * np.sqrt(np.pi)),
+        "mom": lambda mean, std, skew: (mean, std),
+    },
+    "gumbel_r": {
+        "lmoments": lambda l1, l2, t3: (l1 - _EULER * l2 / np.log(2), l2 / np.log(2),),
+        "mom": lambda mean, std, skew: (
+            mean - _EULER * std * np.sqrt(6) / np.pi,
+            std * np.sqrt(6) / np.pi,
+        ),
+    },
+    "genextreme": {"lmoments": _gev_lmoments, "mom": _gev_mom},
+    "pearson3": {
+        "lmoments": _pearson3_lmoments,
+        "mom": lambda mean, std, skew: (skew, mean, std),
+    },
+    "gamma": {
+        "lmoments": lambda l1, l2, t3: _gamma_from_pearson3(
+            *_pearson3_lmoments(l1, l2, t3)
+        ),
+        "mom": lambda mean, std, skew: _gamma_from_pearson3(skew, mean, std),
+    },
+    "lognorm": {"lmoments": _lognorm_lmoments, "mom": _lognorm_mom},
+    "weibull_min": {"lmoments": _weibull_min_lmoments, "mom": _weibull_min_mom},
+}
+
+
 def fa(
-    da: xr.DataArray, t: Union[int, Sequence], dist: str = "norm", mode: str = "high"
+    da: xr.DataArray,
+    t: Union[int, Sequence],
+    dist: str = "norm",
+    mode: str = "high",
+    params: Optional[xr.DataArray] = None,
 ):
     """Return the value corresponding to the given return period.
 
@@ -177,6 +454,10 @@ def fa(
       (see scipy.stats).
     mode : {'min', 'max}
       Whether we are looking for a probability of exceedance (max) or a probability of non-exceedance (min).
+    params : Optional[xr.DataArray]
+      Distribution parameters of `da`, as returned by `fit` for `dist`. If None, they are fitted with maximum
+      likelihood.
+      Precomputed parameters can be reused for many return periods and modes.
 
     Returns
     -------
@@ -188,42 +469,40 @@ def fa(
     # Get the distribution
     dc = get_dist(dist)
 
-    # Fit the parameters of the distribution
-    p = fit(da, dist)
-
-    # Create a lambda function to facilitate passing arguments to dask. There is probably a better way to do this.
     if mode in ["max", "high"]:
-
-        def func(x):
-            return dc.isf(1.0 / t, *x)
-
+        func = dc.isf
     elif mode in ["min", "low"]:
-
-        def func(x):
-            return dc.ppf(1.0 / t, *x)
-
+        func = dc.ppf
     else:
         raise ValueError(f"Mode `{mode}` should be either 'max' or 'min'.")
 
-    data = dask.array.apply_along_axis(func, p.get_axis_num("dparams"), p)
-
-    # Create coordinate for the return periods
-    coords = dict(p.coords.items())
-    coords.pop("dparams")
-    coords["return_period"] = t
-
-    # Create dimensions
-    dims = list(p.dims)
-    dims.remove("dparams")
-    dims.insert(0, "return_period")
+    # Fit the parameters of the distribution
+    if params is None:
+        p = fit(da, dist)
+    elif params.attrs.get("scipy_dist", dist) != dist:
+        raise ValueError(
+            f"Parameters were fitted for `{params.attrs['scipy_dist']}`, not `{dist}`."
+        )
+    else:
+        p = params
+
+    # Evaluate the quantiles over the whole parameter array with scipy's broadcasting.
+    prob = xr.DataArray(1.0 / t, dims=("return_period",))
+    out = xr.apply_ufunc(
+        func,
+        prob,
+        *[p.sel(dparams=name, drop=True) for name in p.dparams.values],
+        dask="parallelized",
+        output_dtypes=[float],
+    )
+    out = out.assign_coords(return_period=t)
 
     # TODO: add time and time_bnds coordinates (Low will work on this)
     # time.attrs['climatology'] = 'climatology_bounds'
     # coords['time'] =
     # coords['climatology_bounds'] =
 
-    out = xr.DataArray(data=data, coords=coords, dims=dims)
-    out.attrs = p.attrs
+    out.attrs = p.attrs.copy()
     out.attrs["standard_name"] = f"{dist} quantiles"
     out.attrs[
         "long_name"
@@ -240,7 +519,138 @@ def fa(
     return out
 
 
-def frequency_analysis(da, mode, t, dist, window=1, freq=None, **indexer):
+def fa_bootstrap(
+    da: xr.DataArray,
+    t: Union[int, Sequence],
+    dist: str = "norm",
+    mode: str = "high",
+    method: str = "lmoments",
+    nboot: int = 1000,
+    ci: float = 0.9,
+    seed: Optional[int] = None,
+):
+    """Return bootstrap confidence intervals of the values corresponding to the given return periods.
+
+    The series are resampled with replacement `nboot` times along a new dimension, and each resample is fitted at
+    once with the vectorized L-moments or moments estimators of `fit`.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Maximized/minimized input data with a `time` dimension.
+    t : Union[int, Sequence]
+      Return period. The period depends on the resolution of the input data. If the input array's resolution is
+      yearly, then the return period is in years.
+    dist : str
+      Name of the univariate distribution, one of `fit_dists`.
+    mode : {'min', 'max}
+      Whether we are looking for a probability of exceedance (max) or a probability of non-exceedance (min).
+    method : {'lmoments', 'mom'}
+      Fitting method of the resampled series.
+    nboot : int
+      Number of bootstrap resamples.
+    ci : float
+      Confidence level of the interval, between 0 and 1.
+    seed : Optional[int]
+      Seed of the random number generators. Each block of a dask array uses its own stream, seeded from `seed` and
+      the position of the block, so that results are reproducible for a given seed and chunking.
+
+    Returns
+    -------
+    xarray.DataArray
+      The lower and upper bounds of the confidence interval, along a `bounds` dimension, for each return period.
+    """
+    t = np.atleast_1d(t)
+
+    # Get the distribution
+    dc = get_dist(dist)
+
+    if mode in ["max", "high"]:
+        func = dc.isf
+    elif mode in ["min", "low"]:
+        func = dc.ppf
+    else:
+        raise ValueError(f"Mode `{mode}` should be either 'max' or 'min'.")
+    if method not in ["lmoments", "mom"] or dist not in fit_dists:
+        raise ValueError(
+            f"Bootstrap fits need a vectorized estimator, got `{method}` for `{dist}`."
+        )
+
+    kwargs = dict(
+        qfunc=func,
+        prob=1.0 / t,
+        dist=dist,
+        method=method,
+        nboot=nboot,
+        levels=[(1 - ci) / 2, (1 + ci) / 2],
+        seed=seed,
+    )
+
+    arr = da.transpose(..., "time")
+    data = arr.data
+    if isinstance(data, dask.array.Array):
+        # The resamples need the whole time series.
+        data = data.rechunk({data.ndim - 1: -1})
+        data = data.map_blocks(
+            _fa_bootstrap_block,
+            chunks=data.chunks[:-1] + ((2,), (t.size,)),
+            new_axis=[data.ndim],
+            dtype=float,
+            **kwargs,
+        )
+    else:
+        data = _fa_bootstrap_block(data, block_info=None, **kwargs)
+
+    coords = {k: v for k, v in arr.coords.items() if "time" not in v.dims}
+    coords["bounds"] = ["lower", "upper"]
+    coords["return_period"] = t
+    dims = list(arr.dims[:-1]) + ["bounds", "return_period"]
+    out = xr.DataArray(data, coords=coords, dims=dims).transpose(
+        "bounds", "return_period", ...
+    )
+
+    out.attrs["standard_name"] = f"{dist} quantiles"
+    out.attrs[
+        "long_name"
+    ] = f"{dist} return period values confidence interval for {getattr(da, 'standard_name', '')}"
+    out.attrs["units"] = da.attrs.get("units", "")
+    out.attrs["mode"] = mode
+    out.attrs["confidence_level"] = ci
+    out.attrs["estimator"] = _FIT_ESTIMATORS[method]
+    out.attrs["scipy_dist"] = dist
+    return out
+
+
+def _fa_bootstrap_block(
+    arr, qfunc, prob, dist, method, nboot, levels, seed, block_info=None
+):
+    """Bootstrap confidence bounds of the return values for the series along the last axis of `arr`.
+
+    The output has the bounds and the return periods as the last two axes.
+    """
+    if block_info is None or seed is None:
+        rng = np.random.RandomState(seed)
+    else:
+        rng = np.random.RandomState([seed] + list(block_info[0]["chunk-location"]))
+
+    # Valid values first, then resample among the valid values of each series.
+    x = np.sort(arr, axis=-1)
+    n = (~np.isnan(x)).sum(axis=-1)[..., np.newaxis, np.newaxis]
+    idx = (rng.random_sample(arr.shape[:-1] + (nboot, arr.shape[-1])) * n).astype(int)
+    samples = np.take_along_axis(x[..., np.newaxis, :], idx, axis=-1)
+    # Keep the number of values of the original series.
+    samples = np.where(np.arange(arr.shape[-1]) < n, samples, np.nan)
+
+    params = _fit_vectorized(samples, dist, method)
+    with warnings.catch_warnings():
+        # Series without valid values give all-NaN slices.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        values = qfunc(prob, *np.moveaxis(params, -1, 0)[..., np.newaxis])
+        bounds = np.nanquantile(values, levels, axis=-2)
+    return np.moveaxis(bounds, 0, -2)
+
+
+def frequency_analysis(da, mode, t, dist, window=1, freq=None, params=None, **indexer):
     """Return the value corresponding to a return period.
 
     Parameters
@@ -260,6 +670,10 @@ def frequency_analysis(da, mode, t, dist, window=1, freq=None, **indexer):
     freq : str
       Resampling frequency. If None, the frequency is assumed to be 'YS' unless the indexer is season='DJF',
       in which case `freq` would be set to `YS-DEC`.
+    params : xarray.DataArray, optional
+      Distribution parameters of the period extremes, as returned by `fit` for `dist`. If given, the extremes are not
+      extracted nor fitted again, `da` is only used for its attributes and `window`, `freq` and `indexer` must be left
+      to their defaults.
     **indexer : {dim: indexer, }, optional
       Time attribute and values over which to subset the array. For example, use season='DJF' to select winter values,
       month=1 to select January, or month=[6,7,8] to select summer months. If not indexer is given, all values are
@@ -271,6 +685,13 @@ def frequency_analysis(da, mode, t, dist, window=1, freq=None, **indexer):
       An array of values with a 1/t probability of exceedance or non-exceedance when mode is high or low respectively.
 
     """
+    if params is not None:
+        if window != 1 or freq is not None or indexer:
+            raise ValueError(
+                "`window`, `freq` and the indexer are used to extract the extremes and cannot be given with `params`."
+            )
+        return fa(da, t, dist, mode, params=params)
+
     # Apply rolling average
     attrs = da.attrs.copy()
     if window > 1:
@@ -312,10 +733,20 @@ def get_dist(dist):
 
 
 binary_ops = {">": "gt", "<": "lt", ">=": "ge", "<=": "le"}
+_operators = {
+    "gt": operator.gt,
+    "lt": operator.lt,
+    "ge": operator.ge,
+    "le": operator.le,
+}
 
 
 def threshold_count(
-    da: xr.DataArray, op: str, thresh: float, freq: str
+    da: xr.DataArray,
+    op: str,
+    thresh: float,
+    freq: str,
+    cube: Optional["ThresholdCube"] = None,
 ) -> xr.DataArray:
     """Count number of days above or below threshold.
 
@@ -330,24 +761,755 @@ def threshold_count(
     freq : str
       Resampling frequency defining the periods
       defined in http://pandas.pydata.org/pandas-docs/stable/timeseries.html#resampling.
+    cube : Optional[ThresholdCube]
+      Exceedances of `da` precomputed for `op` and `thresh`. If given, the days are counted from the packed bits.
 
     Returns
     -------
     xr.DataArray
       The number of days meeting the constraints for each period.
     """
-    from xarray.core.ops import get_op
+    if cube is not None:
+        cube._check(da, op)
+        return cube.count(thresh, freq)
 
+    c = compare(da, op, thresh) * 1
+    return resample_reduce(c, "sum", freq)
+
+
+def compare(
+    da: xr.DataArray, op: str, thresh: float, cube: Optional["ThresholdCube"] = None
+) -> xr.DataArray:
+    """Compare an array with a threshold, as `da op thresh`.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Input data.
+    op : str
+      Logical operator {>, <, >=, <=, gt, lt, ge, le }. e.g. arr > thresh.
+    thresh : float
+      Threshold value.
+    cube : Optional[ThresholdCube]
+      Exceedances of `da` precomputed for `op` and `thresh`. If given, they are unpacked from the cube.
+
+    Returns
+    -------
+    xr.DataArray
+      Boolean array.
+    """
+    if cube is not None:
+        cube._check(da, op)
+        return cube.exceedance(thresh)
+
+    return _operators[_op_name(op)](da, thresh)
+
+
+def _op_name(op: str) -> str:
     if op in binary_ops:
-        op = binary_ops[op]
-    elif op in binary_ops.values():
-        pass
+        return binary_ops[op]
+    if op in binary_ops.values():
+        return op
+    raise ValueError(f"Operation `{op}` not recognized.")
+
+
+class ThresholdCube:
+    """Exceedances of several thresholds by an array, bit-packed along time.
+
+    The exceedances of all thresholds are computed in a single pass over the input and stored with one bit per time
+    step, 8 times less memory than boolean arrays. The cube is passed to `compare`, `threshold_count` and the
+    threshold-based indices through their `cube` argument, with the array, operator and one of the thresholds it was
+    built for.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Input data with a `time` dimension.
+    op : str
+      Logical operator {>, <, >=, <=, gt, lt, ge, le }. e.g. arr > thresh.
+    thresholds : Sequence[Union[float, str]]
+      Threshold values, in the units of `da` or as quantity strings.
+
+    Examples
+    --------
+    >>> cube = ThresholdCube(tasmax, ">", ["25 degC", "30 degC"])  # doctest: +SKIP
+    >>> su = xclim.indices.tx_days_above(tasmax, thresh="25 degC", cube=cube)  # doctest: +SKIP
+    >>> hsf = xclim.indices.hot_spell_frequency(tasmax, thresh_tasmax="30 degC", cube=cube)  # doctest: +SKIP
+    """
+
+    def __init__(
+        self, da: xr.DataArray, op: str, thresholds: Sequence[Union[float, str]]
+    ):
+        self.da = da
+        self.op = _op_name(op)
+        self.thresholds = np.array(
+            [
+                convert_units_to(t, da, "hydro") if isinstance(t, str) else t
+                for t in thresholds
+            ],
+            dtype=float,
+        )
+        self._axis = da.get_axis_num("time")
+
+        kwargs = dict(
+            thresholds=self.thresholds, op=_operators[self.op], axis=self._axis
+        )
+        data = da.data
+        if isinstance(data, dask.array.Array):
+            # Chunks along time hold whole bytes.
+            data = data.rechunk({self._axis: _byte_chunks(data.chunks[self._axis])})
+            chunks = list(data.chunks)
+            chunks[self._axis] = tuple(-(-c // 8) for c in chunks[self._axis])
+            self.packed = data.map_blocks(
+                _pack_exceedances,
+                new_axis=0,
+                chunks=((self.thresholds.size,),) + tuple(chunks),
+                dtype=np.uint8,
+                **kwargs,
+            )
+        else:
+            self.packed = _pack_exceedances(data, **kwargs)
+
+    def __contains__(self, thresh) -> bool:
+        return np.ndim(thresh) == 0 and bool(self._matches(thresh).any())
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the packed exceedances in bytes."""
+        return self.packed.nbytes
+
+    def _check(self, da: xr.DataArray, op: str):
+        """Raise if the cube was not built for an array shaped as `da` and for the operator `op`."""
+        if _op_name(op) != self.op:
+            raise ValueError(f"The cube holds exceedances for `{self.op}`, not `{op}`.")
+        if da.dims != self.da.dims or da.shape != self.da.shape:
+            raise ValueError(
+                f"The cube was built for an array of dimensions {dict(self.da.sizes)}, not {dict(da.sizes)}."
+            )
+
+    def _matches(self, thresh) -> np.ndarray:
+        # Thresholds converted from quantity strings along different paths may differ by a few ulps.
+        return np.isclose(self.thresholds, thresh, rtol=1e-9, atol=0)
+
+    def _index(self, thresh) -> int:
+        if thresh not in self:
+            raise KeyError(f"Threshold {thresh} is not in the cube.")
+        return int(np.nonzero(self._matches(thresh))[0][0])
+
+    def exceedance(self, thresh: float) -> xr.DataArray:
+        """Return the boolean exceedances of a threshold, unpacked from the cube."""
+        packed = self.packed[self._index(thresh)]
+        n = self.da.shape[self._axis]
+        if isinstance(packed, dask.array.Array):
+            chunks = list(packed.chunks)
+            chunks[self._axis] = tuple(8 * c for c in chunks[self._axis])
+            data = packed.map_blocks(
+                _unpack, axis=self._axis, chunks=tuple(chunks), dtype=bool
+            )
+        else:
+            data = _unpack(packed, axis=self._axis)
+        data = data[(slice(None),) * self._axis + (slice(0, n),)]
+        return xr.DataArray(
+            data, dims=self.da.dims, coords=self.da.coords, name=self.da.name
+        )
+
+    def count(self, thresh: float, freq: str) -> xr.DataArray:
+        """Count the exceedances of a threshold over each period, as `threshold_count` does."""
+        bins = period_bins(self.da, freq)
+        packed = self.packed[self._index(thresh)]
+        if bins is None or isinstance(packed, dask.array.Array):
+            # Unpack, block-wise for dask arrays.
+            return resample_reduce(self.exceedance(thresh) * 1, "sum", freq)
+
+        starts, present, labels = bins
+        counts = _count_packed(packed, starts, self._axis)
+        coords = {k: v for k, v in self.da.coords.items() if "time" not in v.dims}
+        coords["time"] = labels[present]
+        out = xr.DataArray(counts, dims=self.da.dims, coords=coords, name=self.da.name)
+        if present.size != labels.size:
+            out = out.reindex(time=labels)
+        return out
+
+
+def _byte_chunks(chunks: Sequence[int]) -> tuple:
+    """Chunks whose boundaries are moved back to multiples of 8."""
+    bounds = np.unique(np.cumsum(chunks)[:-1] // 8 * 8)
+    bounds = np.concatenate((bounds[bounds > 0], [sum(chunks)]))
+    return tuple(np.diff(bounds, prepend=0))
+
+
+def _pack_exceedances(arr, thresholds, op, axis, slab=4096):
+    """Pack the exceedances of each threshold along `axis`, processing `slab` time steps at a time."""
+    n = arr.shape[axis]
+    shape = list(arr.shape)
+    shape[axis] = -(-n // 8)
+    out = np.empty([len(thresholds)] + shape, dtype=np.uint8)
+
+    # Views with time first
+    arr = np.moveaxis(arr, axis, 0)
+    view = np.moveaxis(out, axis + 1, 1)
+    for start in range(0, n, slab):
+        block = arr[start : start + slab]
+        for k, thresh in enumerate(thresholds):
+            packed = np.packbits(op(block, thresh), axis=0)
+            view[k, start // 8 : start // 8 + packed.shape[0]] = packed
+    return out
+
+
+def _unpack(packed: np.ndarray, axis: int) -> np.ndarray:
+    return np.unpackbits(packed, axis=axis).astype(bool)
+
+
+def _popcount(x):
+    """Number of bits set in each element of an uint8 array."""
+    x = x - ((x >> 1) & 0x55)
+    x = (x & 0x33) + ((x >> 2) & 0x33)
+    return (x + (x >> 4)) & 0x0F
+
+
+def _count_packed(packed: np.ndarray, starts: np.ndarray, axis: int) -> np.ndarray:
+    """Count the bits set between consecutive `starts` along `axis` of a packed array."""
+    ones = _popcount(packed)
+    byte = starts // 8
+    # Bits set in the byte of each start, before the start.
+    mask = (0xFF << (8 - (starts - 8 * byte))) & 0xFF
+    shape = [-1 if i == axis else 1 for i in range(packed.ndim)]
+    before = _popcount(
+        np.take(packed, byte, axis=axis) & mask.astype(np.uint8).reshape(shape)
+    ).astype("int64")
+
+    # Bits set from the byte of each start to the byte of the next one, or to the end.
+    total = np.add.reduceat(ones, byte, axis=axis, dtype="int64")
+    # reduceat returns the first element instead of 0 for periods starting in the same byte.
+    same = np.append(byte[1:] == byte[:-1], False).reshape(shape)
+    total = np.where(same, 0, total)
+
+    after = np.concatenate(
+        (
+            np.take(before, np.arange(1, starts.size), axis=axis),
+            0 * np.take(before, [0], axis=axis),
+        ),
+        axis=axis,
+    )
+    return total + after - before
+
+
+def degree_days(
+    da: xr.DataArray,
+    thresh: Union[float, Sequence[float]],
+    freq: str,
+    op: Union[str, Sequence[str]] = ">",
+    cap: Optional[Union[float, Sequence[float]]] = None,
+) -> xr.DataArray:
+    """Sum of the degrees above or below several thresholds over each period.
+
+    The degree days of all thresholds are accumulated in a single pass over the data, slab by slab of whole periods,
+    or block by block on dask arrays.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Input data with a `time` dimension.
+    thresh : Union[float, Sequence[float]]
+      Base values, in the units of `da`.
+    freq : str
+      Resampling frequency.
+    op : Union[str, Sequence[str]] {">", "<", "gt", "lt"}
+      Sum the degrees above (">") or below ("<") each threshold, for all thresholds or for each.
+    cap : Optional[Union[float, Sequence[float]]]
+      Values at which `da` is capped before computing the degrees, for all thresholds or for each. The cap is an upper
+      bound for the degrees above the threshold and a lower bound for the degrees below. NaN or None for no cap.
+
+    Returns
+    -------
+    xr.DataArray
+      Degree days over each period, along a `threshold` dimension. The `op` and `cap` of each threshold are given as
+      coordinates when they differ between thresholds or when caps are given.
+    """
+    thresh = np.atleast_1d(np.asarray(thresh, dtype=float))
+    ops = np.broadcast_to(np.asarray(op), thresh.shape)
+    signs = np.empty(thresh.shape)
+    for i, o in enumerate(ops):
+        if o not in [">", "<", "gt", "lt"]:
+            raise ValueError(f"Operation `{o}` not recognized.")
+        signs[i] = 1 if o in [">", "gt"] else -1
+    caps = np.broadcast_to(
+        np.asarray(np.nan if cap is None else cap, dtype=float), thresh.shape
+    )
+
+    coords = {"threshold": thresh}
+    if np.unique(signs).size > 1:
+        coords["op"] = ("threshold", np.where(signs > 0, ">", "<"))
+    if cap is not None:
+        coords["cap"] = ("threshold", caps)
+
+    kwargs = dict(thresholds=thresh, signs=signs, caps=caps)
+    bins = period_bins(da, freq)
+    if bins is None:
+        deg = [_degrees(da, *args) for args in zip(thresh, signs, caps)]
+        out = xr.concat(deg, "threshold").resample(time=freq).sum(dim="time")
+        return out.assign_coords(coords)
+
+    starts, present, labels = bins
+    out = map_period_blocks(
+        _degree_days_1pass,
+        da.data,
+        starts,
+        da.get_axis_num("time"),
+        new_axis=thresh.size,
+        dtype=da.dtype if da.dtype.kind == "f" else np.dtype(float),
+        **kwargs,
+    )
+
+    coords.update({k: v for k, v in da.coords.items() if "time" not in v.dims})
+    coords["time"] = labels[present]
+    out = xr.DataArray(out, dims=("threshold",) + da.dims, coords=coords)
+    if present.size != labels.size:
+        out = out.reindex(time=labels)
+    return out
+
+
+def _degree_days_1pass(
+    arr, thresholds, signs, caps, starts, axis, slab=4096
+) -> np.ndarray:
+    """Degree days of each threshold over the periods starting at `starts` along `axis`, along a new first axis.
+
+    Periods are processed `slab` time steps at a time, so that a single temporary of the size of a slab is needed.
+    """
+    arr = np.moveaxis(arr, axis, 0)
+    dtype = arr.dtype if arr.dtype.kind == "f" else np.dtype(float)
+    out = np.empty((thresholds.size, starts.size) + arr.shape[1:], dtype=dtype)
+
+    n = arr.shape[0]
+    for p0, p1 in _period_slabs(starts, n, slab):
+        stop = starts[p1] if p1 < starts.size else n
+        block = arr[starts[p0] : stop].astype(dtype, copy=False)
+        local = starts[p0:p1] - starts[p0]
+        buf = np.empty_like(block)
+        for k, args in enumerate(zip(thresholds, signs, caps)):
+            out[k, p0:p1] = np.add.reduceat(
+                _degrees(block, *args, out=buf), local, axis=0
+            )
+    return np.moveaxis(out, 1, axis + 1)
+
+
+def _degrees(x, thresh: float, sign: float, cap: float, out=None):
+    """Degrees above (sign > 0) or below (sign < 0) a threshold, missing values counting as 0."""
+    if out is None:
+        if not np.isnan(cap):
+            x = np.minimum(x, cap) if sign > 0 else np.maximum(x, cap)
+        return np.fmax(sign * (x - thresh), 0)
+
+    if not np.isnan(cap):
+        (np.minimum if sign > 0 else np.maximum)(x, cap, out=out)
+        x = out
+    if sign > 0:
+        np.subtract(x, thresh, out=out)
     else:
-        raise ValueError(f"Operation `{op}` not recognized.")
+        np.subtract(thresh, x, out=out)
+    return np.fmax(out, 0, out=out)
+
+
+def rolling_sum_max(
+    da: xr.DataArray, window: Union[int, Sequence[int]], freq: str
+) -> xr.DataArray:
+    """Maximum over each period of the rolling sums of several window sizes.
+
+    Equivalent to `da.rolling(time=w).sum(skipna=False).resample(time=freq).max()` for each window size `w`, the sums
+    being labelled by the last day of their window. The rolling sums of all windows are derived from a single
+    cumulative sum along time and reduced in the same pass, block-wise on dask arrays.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Input data with a `time` dimension.
+    window : Union[int, Sequence[int]]
+      Window sizes.
+    freq : str
+      Resampling frequency.
 
-    func = getattr(da, "_binary_op")(get_op(op))
-    c = func(da, thresh) * 1
-    return c.resample(time=freq).sum(dim="time")
+    Returns
+    -------
+    xr.DataArray
+      Maxima of the rolling sums along a `window` dimension.
+    """
+    windows = np.atleast_1d(window).astype(int)
+    if (windows < 1).any():
+        raise ValueError("Window sizes must be positive.")
+
+    bins = period_bins(da, freq)
+    if bins is None:
+        out = [
+            da.rolling(time=w).sum(skipna=False).resample(time=freq).max(dim="time")
+            for w in windows
+        ]
+        return xr.concat(out, "window").assign_coords(window=windows)
+
+    starts, present, labels = bins
+    # Rolling sums at the start of a period include the values preceding it.
+    out = map_period_blocks(
+        _rolling_sum_max_1pass,
+        da.data,
+        starts,
+        da.get_axis_num("time"),
+        new_axis=windows.size,
+        lead=int(windows.max()) - 1,
+        dtype=da.dtype if da.dtype.kind == "f" else np.dtype(float),
+        windows=windows,
+    )
+
+    coords = {k: v for k, v in da.coords.items() if "time" not in v.dims}
+    coords["window"] = windows
+    coords["time"] = labels[present]
+    out = xr.DataArray(out, dims=("window",) + da.dims, coords=coords, name=da.name)
+    if present.size != labels.size:
+        out = out.reindex(time=labels)
+    return out
+
+
+def _rolling_sum_max_1pass(
+    arr: np.ndarray,
+    windows: np.ndarray,
+    starts: np.ndarray,
+    axis: int,
+    lead: int = 0,
+    slab: int = 512,
+) -> np.ndarray:
+    """Maxima of the rolling sums of each window size over the segments starting at `starts`, along a new first axis.
+
+    The first `lead` values along `axis` precede the segments and only enter the rolling sums. Rolling sums of
+    incomplete windows or including missing values are NaN. Segments are processed `slab` time steps at a time.
+    """
+    x = np.moveaxis(arr, axis, 0)
+    n = x.shape[0] - lead
+    depth = int(windows.max()) - 1
+    dtype = x.dtype if x.dtype.kind == "f" else np.dtype(float)
+    out = np.empty((windows.size, starts.size) + x.shape[1:], dtype=dtype)
+
+    for p0, p1 in _period_slabs(starts, n, slab):
+        start = lead + starts[p0]
+        stop = lead + starts[p1] if p1 < starts.size else x.shape[0]
+        # Values preceding the slab that enter its rolling sums.
+        before = min(depth, start)
+        out[:, p0:p1] = _rolling_sum_max_slab(
+            x[start - before : stop], windows, starts[p0:p1] - starts[p0], before
+        )
+    return np.moveaxis(out, 1, axis + 1)
+
+
+def _rolling_sum_max_slab(x, windows, starts, lead):
+    n = x.shape[0] - lead
+    dtype = x.dtype if x.dtype.kind == "f" else np.dtype(float)
+
+    # Cumulative sums of the values, and of the missing values if any, from 0.
+    missing = np.isnan(x) if x.dtype.kind == "f" else None
+    if missing is not None and missing.any():
+        x = np.where(missing, 0, x)
+        cmiss = np.zeros((x.shape[0] + 1,) + x.shape[1:], dtype="int32")
+        np.cumsum(missing, axis=0, out=cmiss[1:])
+    else:
+        cmiss = None
+    csum = np.zeros((x.shape[0] + 1,) + x.shape[1:])
+    np.cumsum(x, axis=0, out=csum[1:])
+
+    out = np.empty((windows.size, starts.size) + x.shape[1:], dtype=dtype)
+    total = np.empty((n,) + x.shape[1:], dtype=dtype)
+    for k, w in enumerate(windows):
+        # Windows ending before the w-th value of the series are incomplete.
+        pad = max(w - 1 - lead, 0)
+        end = slice(lead + 1 + pad, lead + n + 1)
+        begin = slice(lead + 1 + pad - w, lead + n + 1 - w)
+        total[:pad] = np.nan
+        np.subtract(csum[end], csum[begin], out=total[pad:], casting="unsafe")
+        if cmiss is not None:
+            total[pad:][cmiss[end] > cmiss[begin]] = np.nan
+        out[k] = np.fmax.reduceat(total, starts, axis=0)
+    return out
+
+
+def moving_average_min_mean(
+    da: xr.DataArray, window: int, freq: str, center: bool = True
+) -> Tuple[xr.DataArray, xr.DataArray]:
+    """Minimum of the moving average and mean of the values over each period, in one pass.
+
+    Equivalent to `da.rolling(time=window, center=center).mean(skipna=False).resample(time=freq).min()` and
+    `da.resample(time=freq).mean()`. Both are derived from a single cumulative sum along time, slab by slab of whole
+    periods. On dask arrays, the blocks hold whole periods and exchange halos of the window size with their neighbours.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Input data with a `time` dimension.
+    window : int
+      Size of the moving window.
+    freq : str
+      Resampling frequency.
+    center : bool
+      If True, the moving average is labelled by the center of its window, otherwise by its end.
+
+    Returns
+    -------
+    xr.DataArray, xr.DataArray
+      Minimum of the moving average and mean of the values over each period.
+    """
+    # Values after and before each step in its window, as xarray centers them.
+    after = (window - 1) // 2 if center else 0
+    before = window - 1 - after
+
+    bins = period_bins(da, freq)
+    if bins is None:
+        mavg = da.rolling(time=window, center=center).mean(skipna=False)
+        return (
+            mavg.resample(time=freq).min(dim="time"),
+            da.resample(time=freq).mean(dim="time"),
+        )
+
+    starts, present, labels = bins
+    out = map_period_blocks(
+        _moving_average_min_mean_1pass,
+        da.data,
+        starts,
+        da.get_axis_num("time"),
+        new_axis=2,
+        lead=before,
+        trail=after,
+        dtype=da.dtype if da.dtype.kind == "f" else np.dtype(float),
+        before=before,
+        after=after,
+    )
+
+    coords = {k: v for k, v in da.coords.items() if "time" not in v.dims}
+    coords["time"] = labels[present]
+    out = xr.DataArray(out, dims=("stat",) + da.dims, coords=coords, name=da.name)
+    if present.size != labels.size:
+        out = out.reindex(time=labels)
+    return out[0], out[1]
+
+
+def _moving_average_min_mean_1pass(
+    arr: np.ndarray,
+    before: int,
+    after: int,
+    starts: np.ndarray,
+    axis: int,
+    lead: int = 0,
+    trail: int = 0,
+    slab: int = 512,
+) -> np.ndarray:
+    """Minimum of the moving average and mean over the segments starting at `starts`, along a new first axis.
+
+    The first `lead` and last `trail` values along `axis` only enter the moving averages. The moving average is NaN
+    where its window is incomplete or includes missing values. Segments are processed `slab` time steps at a time.
+    """
+    x = np.moveaxis(arr, axis, 0)
+    n = x.shape[0] - lead - trail
+    dtype = x.dtype if x.dtype.kind == "f" else np.dtype(float)
+    out = np.empty((2, starts.size) + x.shape[1:], dtype=dtype)
+
+    for p0, p1 in _period_slabs(starts, n, slab):
+        start = lead + starts[p0]
+        stop = lead + starts[p1] if p1 < starts.size else lead + n
+        # Values around the slab that enter its moving averages.
+        pre, post = min(before, start), min(after, x.shape[0] - stop)
+        out[:, p0:p1] = _moving_average_min_mean_slab(
+            x[start - pre : stop + post],
+            before,
+            after,
+            starts[p0:p1] - starts[p0],
+            pre,
+            post,
+        )
+    return np.moveaxis(out, 1, axis + 1)
+
+
+def _moving_average_min_mean_slab(x, before, after, starts, lead, trail):
+    n = x.shape[0] - lead - trail
+    window = before + after + 1
+    dtype = x.dtype if x.dtype.kind == "f" else np.dtype(float)
+
+    # Cumulative sums of the values, and of the missing values if any, from 0.
+    missing = np.isnan(x) if x.dtype.kind == "f" else None
+    if missing is not None and missing.any():
+        x = np.where(missing, 0, x)
+        cmiss = np.zeros((x.shape[0] + 1,) + x.shape[1:], dtype="int32")
+        np.cumsum(missing, axis=0, out=cmiss[1:])
+    else:
+        cmiss = None
+    csum = np.zeros((x.shape[0] + 1,) + x.shape[1:])
+    np.cumsum(x, axis=0, out=csum[1:])
+
+    # Moving average of the steps whose window fits in the slab and its halos.
+    mavg = np.empty((n,) + x.shape[1:], dtype=dtype)
+    first, last = max(before - lead, 0), min(n, n + trail - after)
+    mavg[:first] = np.nan
+    mavg[last:] = np.nan
+    if last > first:
+        end = slice(lead + first + after + 1, lead + last + after + 1)
+        begin = slice(lead + first - before, lead + last - before)
+        valid = mavg[first:last]
+        np.subtract(csum[end], csum[begin], out=valid, casting="unsafe")
+        valid /= window
+        if cmiss is not None:
+            valid[cmiss[end] > cmiss[begin]] = np.nan
+
+    # Mean of the values of each segment.
+    bounds = lead + np.append(starts, n)
+    total = csum[bounds[1:]] - csum[bounds[:-1]]
+    count = np.diff(bounds).reshape((-1,) + (1,) * (x.ndim - 1))
+    if cmiss is not None:
+        count = count - (cmiss[bounds[1:]] - cmiss[bounds[:-1]])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+
+    minimum = np.minimum if cmiss is None and first == 0 and last == n else np.fmin
+    return np.stack([minimum.reduceat(mavg, starts, axis=0), mean.astype(dtype)])
+
+
+def _period_slabs(starts: np.ndarray, n: int, slab: int):
+    """Ranges of periods processed together, each holding whole periods and about `slab` steps."""
+    edges = np.unique(np.searchsorted(starts, np.arange(0, n, slab), side="right") - 1)
+    edges = np.append(edges, starts.size)
+    return zip(edges[:-1], edges[1:])
+
+
+def detect_pattern(
+    da: xr.DataArray, pattern: Sequence[bool], dim: str = "time"
+) -> xr.DataArray:
+    """Return whether each step ends an occurrence of a sequence of boolean values.
+
+    Occurrences are found with logical operations on shifted views of the input. Each constant run of the pattern is
+    matched with windows of doubling length, in a number of operations growing with the logarithm of its length. Dask
+    arrays are processed block-wise, the blocks overlapping by the length of the pattern.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Boolean input.
+    pattern : Sequence[bool]
+      Sequence of values to detect, e.g. seven frozen days followed by a thawed one.
+    dim : str
+      Dimension along which to look for the pattern. Default: 'time'.
+
+    Returns
+    -------
+    xr.DataArray
+      True at the last step of each occurrence of the pattern, False elsewhere, including the first steps where the
+      pattern cannot fit.
+    """
+    pattern = np.asarray(pattern, dtype=bool)
+    if pattern.ndim != 1 or pattern.size == 0:
+        raise ValueError("The pattern must be a non-empty sequence.")
+
+    axis = da.get_axis_num(dim)
+    data = da.data
+    if isinstance(data, dask.array.Array):
+        out = data.map_overlap(
+            _detect_pattern,
+            depth={axis: (pattern.size - 1, 0)},
+            boundary="none",
+            pattern=pattern,
+            axis=axis,
+            dtype=bool,
+        )
+    else:
+        out = _detect_pattern(data, pattern=pattern, axis=axis)
+    return xr.DataArray(out, dims=da.dims, coords=da.coords, name=da.name)
+
+
+def _detect_pattern(arr: np.ndarray, pattern: np.ndarray, axis: int) -> np.ndarray:
+    x = np.moveaxis(np.asarray(arr, dtype=bool), axis, -1)
+    n, length = x.shape[-1], pattern.size
+    out = np.zeros(x.shape, dtype=bool)
+    if n < length:
+        return np.moveaxis(out, -1, axis)
+
+    match = out[..., length - 1 :]
+    match[...] = True
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(pattern)) + 1, [length]))
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        # Windows of the run length where all values equal those of the run.
+        run = _all_over_window(x if pattern[a] else ~x, b - a)
+        match &= run[..., a : n - length + a + 1]
+    return np.moveaxis(out, -1, axis)
+
+
+def _all_over_window(x: np.ndarray, window: int) -> np.ndarray:
+    """Whether all values are True in each window along the last axis, indexed by the start of the window."""
+    out = x
+    width = 1
+    while 2 * width <= window:
+        out = out[..., :-width] & out[..., width:]
+        width *= 2
+    if width < window:
+        # Two overlapping windows of `width` cover the window.
+        out = out[..., : out.shape[-1] - window + width] & out[..., window - width :]
+    return out
+
+
+def compare_doy(da: xr.DataArray, op: str, doy: xr.DataArray) -> xr.DataArray:
+    """Compare a daily series with thresholds defined for each day of the year.
+
+    Equivalent to `da op resample_doy(doy, da)`, but the threshold of each day is gathered within the comparison
+    kernel, so the daily threshold series is never allocated. Dask inputs stay lazy.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+      Daily input data.
+    op : str
+      Logical operator {>, <, >=, <=, gt, lt, ge, le }. e.g. arr > thresh.
+    doy : xr.DataArray
+      Thresholds with a `dayofyear` coordinate, as returned by `percentile_doy`.
+
+    Returns
+    -------
+    xr.DataArray
+      Boolean array with the dimensions of `da`, followed by the dimensions of `doy` that are not in `da`.
+    """
+    op = _operators[_op_name(op)]
+
+    if "dayofyear" not in doy.coords:
+        raise AttributeError("Source should have `dayofyear` coordinates.")
+    adoy = adjust_doy_calendar(doy, da)
+
+    # Position of each day in the thresholds
+    pos = pd.Index(adoy.dayofyear.values).get_indexer(time_fields(da)["dayofyear"])
+    if (pos < 0).any():
+        raise KeyError("Some days of the year of `da` are missing from `doy`.")
+    pos = xr.DataArray(pos, dims=("time",), coords={"time": da.time})
+
+    if adoy.chunks is not None:
+        adoy = adoy.chunk({"dayofyear": -1})
+    if da.chunks is not None:
+        pos = pos.chunk({"time": da.chunks[da.get_axis_num("time")]})
+
+    # The positions come first, so that time is the first broadcast axis of the kernel.
+    out = xr.apply_ufunc(
+        _compare_doy_kernel,
+        pos,
+        da,
+        adoy,
+        input_core_dims=[[], [], ["dayofyear"]],
+        dask="parallelized",
+        output_dtypes=[bool],
+        kwargs={"op": op},
+    )
+    return out.transpose(*da.dims, ...)
+
+
+def _compare_doy_kernel(pos, arr, thresh, op):
+    """Compare `arr` with the thresholds of the day of the year `pos` of each time step (first axis)."""
+    # Leading axes missing from the thresholds are not inserted by xarray.
+    ndim = max(arr.ndim, thresh.ndim - 1)
+    thresh = thresh.reshape((1,) * (ndim + 1 - thresh.ndim) + thresh.shape)
+    # Thresholds indexed by day of the year first, without the time axis.
+    thresh = np.moveaxis(thresh[0], -1, 0)
+    out = np.empty(np.broadcast(arr, thresh[0]).shape, dtype=bool)
+    steps = pos.reshape(pos.shape[0], -1)[:, 0]
+    for i in np.unique(steps):
+        (t,) = np.nonzero(steps == i)
+        out[t] = op(arr[t], thresh[i])
+    return out
 
 
 def get_daily_events(da: xr.DataArray, da_value: float, operator: str) -> xr.DataArray:
@@ -404,37 +1566,21 @@ def daily_downsampler(da: xr.DataArray, freq: str = "YS") -> xr.DataArray:
     """
 
     # generate tags from da.time and freq
-    if isinstance(da.time.values[0], np.datetime64):
-        years = [f"{y:04d}" for y in da.time.dt.year.values]
-        months = [f"{m:02d}" for m in da.time.dt.month.values]
-    else:
-        # cannot use year, month, season attributes, not available for all calendars ...
-        years = [f"{v.year:04d}" for v in da.time.values]
-        months = [f"{v.month:02d}" for v in da.time.values]
-    seasons = [
-        "DJF DJF MAM MAM MAM JJA JJA JJA SON SON SON DJF".split()[int(m) - 1]
-        for m in months
-    ]
-
-    n_t = da.time.size
+    fields = time_fields(da)
+    years = np.char.zfill(fields["year"].astype(str), 4)
+    months = np.char.zfill(fields["month"].astype(str), 2)
+
     if freq == "YS":
         # year start frequency
         l_tags = years
     elif freq == "MS":
         # month start frequency
-        l_tags = [years[i] + months[i] for i in range(n_t)]
+        l_tags = np.char.add(years, months)
     elif freq == "QS-DEC":
         # DJF, MAM, JJA, SON seasons
         # construct tags from list of season+year, increasing year for December
-        ys = []
-        for i in range(n_t):
-            m = months[i]
-            s = seasons[i]
-            y = years[i]
-            if m == "12":
-                y = str(int(y) + 1)
-            ys.append(y + s)
-        l_tags = ys
+        ys = np.char.zfill((fields["year"] + (fields["month"] == 12)).astype(str), 4)
+        l_tags = np.char.add(ys, time_field(da, "season").values)
     else:
         raise RuntimeError(f"Frequency `{freq}` not implemented.")
 
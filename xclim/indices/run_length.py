@@ -18,6 +18,10 @@ import dask.array as dsk
 import numpy as np
 import xarray as xr
 
+from xclim.core.calendar import time_field
+from xclim.core.options import float_dtype
+from xclim.core.resampling import map_period_blocks
+from xclim.core.resampling import period_bins
 
 logging.captureWarnings(True)
 npts_opt = 9000
@@ -189,6 +193,102 @@ def windowed_run_count(
     return out
 
 
+def run_statistics(da: xr.DataArray, window: int, freq: str) -> xr.Dataset:
+    """Return statistics of the runs of True values over each resampling period, in a single pass.
+
+    Runs are cut at the period boundaries, as when the run-length functions are mapped over the groups of
+    `da.resample(time=freq)`.
+
+    Parameters
+    ----------
+    da: xr.DataArray
+      Input N-dimensional DataArray (boolean).
+    window : int
+      Minimum run length.
+    freq : str
+      Resampling frequency.
+
+    Returns
+    -------
+    xr.Dataset
+      The number of runs of at least `window` values (`windowed_run_events`), the length of the longest run
+      (`longest_run`) and the number of True values part of runs at least `window` long (`windowed_run_count`) in each
+      period.
+    """
+    bins = period_bins(da, freq)
+    if bins is None:
+        out = da.resample(time=freq).map(
+            lambda group: _run_statistics(group, np.array([0]), window).isel(time=0)
+        )
+    else:
+        starts, present, labels = bins
+        out = _run_statistics(da, starts, window)
+        out["time"] = labels[present]
+        if present.size != labels.size:
+            out = out.reindex(time=labels)
+    return out.to_dataset(dim="statistic")
+
+
+def _run_statistics(da: xr.DataArray, starts: np.ndarray, window: int):
+    """Run statistics of `da` over the periods starting at `starts`, along a new `statistic` dimension."""
+    # Runs do not cross the period boundaries, so chunks holding whole periods are independent.
+    out = map_period_blocks(
+        _run_statistics_1pass,
+        da.data,
+        starts,
+        da.get_axis_num("time"),
+        new_axis=3,
+        dtype="int64",
+        window=window,
+    )
+
+    coords = {k: v for k, v in da.coords.items() if "time" not in v.dims}
+    coords["statistic"] = ["windowed_run_events", "longest_run", "windowed_run_count"]
+    return xr.DataArray(out, dims=("statistic",) + da.dims, coords=coords)
+
+
+def _run_statistics_1pass(
+    arr: np.ndarray, starts: np.ndarray, window: int, axis: int
+) -> np.ndarray:
+    """Number of runs of at least `window`, longest run and number of values in runs of at least `window`.
+
+    The statistics are computed for each segment of `arr` starting at `starts` along `axis`, and returned along a new
+    first axis.
+    """
+    x = np.moveaxis(np.asarray(arr, dtype=bool), axis, -1)
+    shape = x.shape[:-1]
+    x = x.reshape(-1, x.shape[-1])
+    n = x.shape[-1]
+
+    # Runs begin after a False value or at a period start and end before a False value or at a period end.
+    first = np.zeros(n, dtype=bool)
+    first[starts] = True
+    last = np.append(first[1:], True)
+    begin = x.copy()
+    begin[:, 1:] &= ~x[:, :-1] | first[1:]
+    end = x.copy()
+    end[:, :-1] &= ~x[:, 1:] | last[:-1]
+
+    row, b = np.nonzero(begin)
+    e = np.nonzero(end)[1]
+    length = e - b + 1
+    # Runs are sorted by row, then period.
+    run_bin = row * starts.size + np.searchsorted(starts, b, side="right") - 1
+
+    size = x.shape[0] * starts.size
+    long = length >= window
+    events = np.bincount(run_bin[long], minlength=size)
+    count = np.bincount(run_bin[long], weights=length[long], minlength=size)
+    longest = np.zeros(size, dtype="int64")
+    if run_bin.size:
+        heads = np.flatnonzero(np.diff(run_bin, prepend=-1))
+        longest[run_bin[heads]] = np.maximum.reduceat(length, heads)
+
+    out = np.stack([events, longest, count.astype("int64")])
+    out = out.reshape((3,) + shape + (starts.size,))
+    return np.moveaxis(out, -1, axis + 1)
+
+
 def first_run(
     da: xr.DataArray,
     window: int,
@@ -324,7 +424,7 @@ def run_length_with_date(
     """
     include_date = datetime.strptime(date, "%m-%d").timetuple().tm_yday
 
-    mid_index = np.where(da.time.dt.dayofyear == include_date)[0]
+    mid_index = np.where(time_field(da, "dayofyear") == include_date)[0]
     if mid_index.size == 0:  # The date is not within the group. Happens at boundaries.
         return xr.full_like(da.isel(time=0), np.nan, float).drop_vars("time")
 
@@ -371,7 +471,7 @@ def run_end_after_date(
     """
     after_date = datetime.strptime(date, "%m-%d").timetuple().tm_yday
 
-    mid_idx = np.where(da.time.dt.dayofyear == after_date)[0]
+    mid_idx = np.where(time_field(da, "dayofyear") == after_date)[0]
     if mid_idx.size == 0:  # The date is not within the group. Happens at boundaries.
         return xr.full_like(da.isel(time=0), np.nan, float).drop_vars("time")
 
@@ -383,7 +483,7 @@ def run_end_after_date(
     )
     beg = first_run(da.where(da.time < da.time[mid_idx][0]), window=window, dim=dim)
     end = xr.where(
-        end.isnull() & beg.notnull(), da.time.isel(time=-1).dt.dayofyear, end
+        end.isnull() & beg.notnull(), time_field(da, "dayofyear").isel(time=-1), end
     )
     return end.where(beg.notnull())
 
@@ -419,7 +519,7 @@ def last_run_before_date(
     """
     before_date = datetime.strptime(date, "%m-%d").timetuple().tm_yday
 
-    mid_idx = np.where(da.time.dt.dayofyear == before_date)[0]
+    mid_idx = np.where(time_field(da, "dayofyear") == before_date)[0]
     if mid_idx.size == 0:  # The date is not within the group. Happens at boundaries.
         return xr.full_like(da.isel(time=0), np.nan, float).drop_vars("time")
 
@@ -568,7 +668,7 @@ def windowed_run_count_ufunc(x: Sequence[bool], window: int) -> xr.apply_ufunc:
         input_core_dims=[["time"]],
         vectorize=True,
         dask="parallelized",
-        output_dtypes=[np.int],
+        output_dtypes=[np.int_],
         keep_attrs=True,
         kwargs={"window": window},
     )
@@ -595,7 +695,7 @@ def windowed_run_events_ufunc(x: Sequence[bool], window: int) -> xr.apply_ufunc:
         input_core_dims=[["time"]],
         vectorize=True,
         dask="parallelized",
-        output_dtypes=[np.int],
+        output_dtypes=[np.int_],
         keep_attrs=True,
         kwargs={"window": window},
     )
@@ -621,7 +721,7 @@ def longest_run_ufunc(x: Sequence[bool]) -> xr.apply_ufunc:
         input_core_dims=[["time"]],
         vectorize=True,
         dask="parallelized",
-        output_dtypes=[np.int],
+        output_dtypes=[np.int_],
         keep_attrs=True,
     )
 
@@ -648,7 +748,7 @@ def first_run_ufunc(x: xr.DataArray, window: int, dim: str = "time",) -> xr.appl
         input_core_dims=[[dim]],
         vectorize=True,
         dask="parallelized",
-        output_dtypes=[np.float],
+        output_dtypes=[float_dtype()],
         keep_attrs=True,
         kwargs={"window": window},
     )
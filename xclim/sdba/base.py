@@ -9,6 +9,8 @@ from typing import Union
 import xarray as xr
 from boltons.funcutils import wraps
 
+from xclim.core.calendar import time_fields
+
 
 # ## Base class for the sdba module
 class Parametrizable(dict):
@@ -142,7 +144,12 @@ class Grouper(Parametrizable):
             return da[self.dim]
 
         ind = da.indexes[self.dim]
-        i = getattr(ind, self.prop)
+        if self.dim == "time" and self.prop in ["month", "dayofyear", "year"]:
+            fields = time_fields(ind)
+            i = fields[self.prop]
+        else:
+            fields = None
+            i = getattr(ind, self.prop)
         interp = (
             (interp or self.interp)
             if not isinstance(interp, str)
@@ -151,9 +158,9 @@ class Grouper(Parametrizable):
         if interp:
             if self.dim == "time":
                 if self.prop == "month":
-                    i = ind.month - 0.5 + ind.day / ind.days_in_month
+                    i = fields["month"] - 0.5 + fields["day"] / fields["days_in_month"]
                 elif self.prop == "dayofyear":
-                    i = ind.dayofyear
+                    i = fields["dayofyear"]
                 else:
                     raise NotImplementedError
             else:
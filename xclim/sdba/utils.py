@@ -14,6 +14,7 @@ from scipy.interpolate import interp1d
 from .base import Grouper
 from .base import parse_group
 from xclim.core.calendar import _interpolate_doy_calendar
+from xclim.core.options import float_dtype
 
 
 MULTIPLICATIVE = "*"
@@ -402,6 +403,7 @@ def interp_on_quantiles(
     """
     dim = group.dim
     prop = group.prop
+    dtype = float_dtype()
 
     if prop is None:
         fill_value = "extrapolate" if method == "nearest" else np.nan
@@ -409,7 +411,7 @@ def interp_on_quantiles(
         def _interp_quantiles_1D(newx, oldx, oldy):
             return interp1d(
                 oldx, oldy, bounds_error=False, kind=method, fill_value=fill_value
-            )(newx)
+            )(newx).astype(dtype, copy=False)
 
         return xr.apply_ufunc(
             _interp_quantiles_1D,
@@ -420,7 +422,7 @@ def interp_on_quantiles(
             output_core_dims=[[dim]],
             vectorize=True,
             dask="parallelized",
-            output_dtypes=[np.float],
+            output_dtypes=[dtype],
         )
     # else:
 
@@ -432,13 +434,13 @@ def interp_on_quantiles(
                 "All-NaN slice encountered in interp_on_quantiles",
                 category=RuntimeWarning,
             )
-            return newx
+            return newx.astype(dtype, copy=False)
         return griddata(
             (oldx.flatten(), oldg.flatten()),
             oldy.flatten(),
             (newx, newg),
             method=method,
-        )
+        ).astype(dtype, copy=False)
 
     xq = add_cyclic_bounds(xq, prop, cyclic_coords=False)
     yq = add_cyclic_bounds(yq, prop, cyclic_coords=False)
@@ -462,7 +464,7 @@ def interp_on_quantiles(
         output_core_dims=[[dim]],
         vectorize=True,
         dask="parallelized",
-        output_dtypes=[np.float],
+        output_dtypes=[dtype],
     )
 
 
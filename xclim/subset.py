@@ -1,5 +1,9 @@
+import hashlib
+import importlib
 import logging
+import os
 import warnings
+from collections import OrderedDict
 from functools import wraps
 from pathlib import Path
 from typing import Optional
@@ -13,20 +17,31 @@ import pandas as pd
 import xarray
 from pyproj import Geod
 from pyproj.crs import CRS
+from scipy import sparse
+from scipy.spatial import cKDTree
 from shapely import vectorized
 from shapely.geometry import LineString
 from shapely.geometry import MultiPolygon
 from shapely.geometry import Point
 from shapely.geometry import Polygon
+from shapely.geometry import box
 from shapely.ops import cascaded_union
 from shapely.ops import split
+from shapely.prepared import prep
+
+from xclim.core.options import GRID_TREE_CACHE_SIZE
+from xclim.core.options import MASK_CACHE_DIR
+from xclim.core.options import MASK_CACHE_SIZE
+from xclim.core.options import OPTIONS
 
 __all__ = [
     "create_mask",
+    "create_weights",
     "subset_bbox",
     "subset_gridpoint",
     "subset_shape",
     "subset_time",
+    "zonal_stats",
 ]
 
 
@@ -308,10 +323,15 @@ def create_mask_vectorize(
     poly: gpd.GeoDataFrame = None,
     wrap_lons: bool = False,
     check_overlap: bool = False,
+    scanline: bool = False,
 ):
     """Creates a mask with values corresponding to the features in a GeoDataFrame using vectorize methods.
 
-    The returned mask's points have the value of the first geometry of `poly` they fall in.
+    The returned mask's points have the value of the last geometry of `poly` they fall in.
+
+    Each geometry is only tested against the grid points within its bounding box. On grids with 1D coordinates, the
+    points are taken from the index window of the box along each coordinate. On other grids, they are found by a
+    binary search in the points sorted by longitude.
 
     Parameters
     ----------
@@ -325,6 +345,10 @@ def create_mask_vectorize(
       Shift vector longitudes by -180,180 degrees to 0,360 degrees; Default = False
     check_overlap: bool
       Perform a check to verify if shapes contain overlapping geometries.
+    scanline : bool
+      If True, rasterize the polygons row by row instead of testing each point: the intersections of the polygon
+      edges with each latitude line delimit the points inside. Only for grids with monotonic 1D coordinates. Points
+      lying exactly on an edge may be classified differently than with the default method.
 
     Returns
     -------
@@ -352,35 +376,116 @@ def create_mask_vectorize(
     if wrap_lons:
         warnings.warn("Wrapping longitudes at 180 degrees.")
 
-    if len(x_dim.shape) == 1 & len(y_dim.shape) == 1:
-        # create a 2d grid of lon, lat values
-        lon1, lat1 = np.meshgrid(
-            np.asarray(x_dim.values), np.asarray(y_dim.values), indexing="ij"
-        )
+    rectilinear = x_dim.ndim == 1 and y_dim.ndim == 1
+    if rectilinear:
+        x = np.asarray(x_dim.values)
+        y = np.asarray(y_dim.values)
         dims_out = x_dim.dims + y_dim.dims
         coords_out = dict()
         coords_out[dims_out[0]] = x_dim.values
         coords_out[dims_out[1]] = y_dim.values
+        mask = np.full((x.size, y.size), np.nan)
+        rectilinear = _is_monotonic(x) and _is_monotonic(y)
     else:
-        lon1 = x_dim.values
-        lat1 = y_dim.values
         dims_out = x_dim.dims
         coords_out = x_dim.coords
+        mask = np.full(x_dim.shape, np.nan)
 
-    # try vectorize
-    mask = np.zeros(lat1.shape) + np.nan
-    for pp in poly.index:
-        for vv in poly[poly.index == pp].geometry.values:
-            b1 = vectorized.contains(vv, lon1.flatten(), lat1.flatten()).reshape(
-                lat1.shape
+    if scanline and not rectilinear:
+        raise ValueError("The scanline mode needs monotonic 1D coordinates.")
+
+    if rectilinear:
+        for pp, vv in zip(poly.index, poly.geometry.values):
+            if vv is None or vv.is_empty:
+                continue
+            minx, miny, maxx, maxy = vv.bounds
+            ix = _index_window(x, minx, maxx)
+            iy = _index_window(y, miny, maxy)
+            if scanline:
+                b1 = _scanline_mask(vv, x[ix], y[iy])
+            else:
+                lon1, lat1 = np.meshgrid(x[ix], y[iy], indexing="ij")
+                b1 = vectorized.contains(vv, lon1, lat1)
+            mask[ix, iy][b1] = pp
+    else:
+        if x_dim.ndim == 1:
+            lon1, lat1 = np.meshgrid(
+                np.asarray(x_dim.values), np.asarray(y_dim.values), indexing="ij"
             )
-            mask[b1] = pp
+        else:
+            lon1 = np.asarray(x_dim.values)
+            lat1 = np.asarray(y_dim.values)
+        lon1 = lon1.ravel()
+        lat1 = lat1.ravel()
+        flat = mask.reshape(-1)
+        order = np.argsort(lon1, kind="stable")
+        sorted_lon = lon1[order]
+        for pp, vv in zip(poly.index, poly.geometry.values):
+            if vv is None or vv.is_empty:
+                continue
+            minx, miny, maxx, maxy = vv.bounds
+            i0 = np.searchsorted(sorted_lon, minx, side="left")
+            i1 = np.searchsorted(sorted_lon, maxx, side="right")
+            points = order[i0:i1]
+            points = points[(lat1[points] >= miny) & (lat1[points] <= maxy)]
+            b1 = vectorized.contains(vv, lon1[points], lat1[points])
+            flat[points[b1]] = pp
 
     mask = xarray.DataArray(mask, dims=dims_out, coords=coords_out)
 
     return mask
 
 
+def _is_monotonic(coord: np.ndarray) -> bool:
+    """Whether a 1D coordinate is strictly increasing or decreasing."""
+    diff = np.diff(coord)
+    return bool(np.all(diff > 0) or np.all(diff < 0))
+
+
+def _index_window(coord: np.ndarray, low: float, high: float) -> slice:
+    """Slice of the values of a monotonic 1D coordinate within [low, high]."""
+    if coord.size > 1 and coord[0] > coord[-1]:
+        start = coord.size - np.searchsorted(coord[::-1], high, side="right")
+        stop = coord.size - np.searchsorted(coord[::-1], low, side="left")
+    else:
+        start = np.searchsorted(coord, low, side="left")
+        stop = np.searchsorted(coord, high, side="right")
+    return slice(start, stop)
+
+
+def _polygon_edges(geom) -> np.ndarray:
+    """Edges (x0, y0, x1, y1) of all the rings of a Polygon or MultiPolygon, as an array of shape (4, n)."""
+    parts = geom.geoms if hasattr(geom, "geoms") else [geom]
+    edges = []
+    for part in parts:
+        if not isinstance(part, Polygon):
+            raise ValueError("Only Polygon and MultiPolygon geometries are supported.")
+        for ring in [part.exterior, *part.interiors]:
+            xy = np.asarray(ring.coords)[:, :2]
+            edges.append(np.concatenate([xy[:-1], xy[1:]], axis=1))
+    return np.concatenate(edges).T
+
+
+def _scanline_mask(geom, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Boolean mask of the points of the grid (x, y) inside a polygon, rasterized row by row.
+
+    Along each line of constant y, the points between consecutive intersections with the polygon edges are inside,
+    following the even-odd rule. Each intersection toggles the points at and after it, so that the mask is the parity
+    of the cumulative sum of the toggles along x. The edges are half-open along y, so that vertices are not counted
+    twice.
+    """
+    x0, y0, x1, y1 = _polygon_edges(geom)
+    increasing = x.size < 2 or x[0] <= x[-1]
+    xs = x if increasing else x[::-1]
+
+    edge, row = np.nonzero((y0[:, np.newaxis] <= y) != (y1[:, np.newaxis] <= y))
+    xi = x0[edge] + (y[row] - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    toggles = np.zeros((x.size + 1, y.size), dtype=np.int32)
+    np.add.at(toggles, (np.searchsorted(xs, xi, side="left"), row), 1)
+    out = np.cumsum(toggles[:-1], axis=0) % 2 == 1
+    return out if increasing else out[::-1]
+
+
 @wrap_lons_and_split_at_greenwich
 def create_mask(
     *,
@@ -475,6 +580,328 @@ def create_mask(
     return mask_2d
 
 
+@wrap_lons_and_split_at_greenwich
+def create_weights(
+    *,
+    x_dim: xarray.DataArray = None,
+    y_dim: xarray.DataArray = None,
+    poly: gpd.GeoDataFrame = None,
+    wrap_lons: bool = False,
+    x_bnds: Optional[Union[xarray.DataArray, np.ndarray]] = None,
+    y_bnds: Optional[Union[xarray.DataArray, np.ndarray]] = None,
+) -> sparse.csr_matrix:
+    """Creates a sparse matrix of the area of each grid cell covered by the features of a GeoDataFrame.
+
+    Contrary to the masks of `create_mask`, which tell in which polygon the centre of each cell falls, the weights
+    account for the cells partially covered by the polygons and for the cells shared by more than one polygon.
+
+    Parameters
+    ----------
+    x_dim : xarray.DataArray
+      X or longitudinal dimension of xarray object.
+    y_dim : xarray.DataArray
+      Y or latitudinal dimension of xarray object.
+    poly : gpd.GeoDataFrame
+      GeoDataFrame of the polygons of the regions.
+    wrap_lons : bool
+      Shift vector longitudes by -180,180 degrees to 0,360 degrees; Default = False
+    x_bnds : Optional[Union[xarray.DataArray, np.ndarray]]
+      Bounds of the cells along x, of shape (n, 2), for 1D coordinates, or x coordinates of the 4 vertices of each
+      cell, of shape `x_dim.shape + (4,)`, for 2D coordinates. If None, the bounds of 1D coordinates are inferred from
+      the midpoints between the cell centres.
+    y_bnds : Optional[Union[xarray.DataArray, np.ndarray]]
+      Bounds of the cells along y, as `x_bnds`. Inferred latitude bounds are clipped to [-90, 90].
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+      Matrix of shape (number of polygons, number of grid cells) of the area of each cell covered by each polygon, on
+      the unit sphere. The cells are ordered as the flattened mask of `create_mask`, with dimensions
+      `x_dim.dims + y_dim.dims` for 1D coordinates and `x_dim.dims` for 2D coordinates.
+
+    Notes
+    -----
+    On grids with 1D coordinates, only the cells crossed by the polygon edges are intersected with the polygons, the
+    other cells of their bounding box being entirely in or out of them. The areas of the cells of grids with 2D
+    coordinates are approximated by their area in degrees scaled by the cosine of their mean latitude.
+
+    Examples
+    --------
+    >>> import geopandas as gpd
+    >>> ds = xr.open_dataset(path_to_tasmin_file)
+    >>> polys = gpd.read_file(path_to_multi_shape_file)
+    >>> weights = create_weights(x_dim=ds.lon, y_dim=ds.lat, poly=polys)
+
+    Compute the mean of each region, reusing the weights for each variable or file on the same grid
+    >>> tn_mean = zonal_stats(ds.tasmin, polys, weights=weights)
+    """
+    if x_dim.ndim == 1 and y_dim.ndim == 1:
+        x = np.asarray(x_dim.values)
+        y = np.asarray(y_dim.values)
+        if not (_is_monotonic(x) and _is_monotonic(y)):
+            raise ValueError("Coverage weights need monotonic 1D coordinates.")
+        x_bnds = _infer_bounds(x) if x_bnds is None else np.asarray(x_bnds)
+        if y_bnds is None:
+            y_bnds = np.clip(_infer_bounds(y), -90, 90)
+        else:
+            y_bnds = np.asarray(y_bnds)
+        shape = (x.size, y.size)
+        coverage = _rectilinear_coverage
+    else:
+        if x_bnds is None or y_bnds is None:
+            raise ValueError(
+                "The bounds of the cells must be given for grids with 2D coordinates."
+            )
+        shape = x_dim.shape
+        x_bnds = np.asarray(x_bnds).reshape(-1, 4)
+        y_bnds = np.asarray(y_bnds).reshape(-1, 4)
+        coverage = _vertices_coverage
+
+    rows, cells, areas = [np.array([], dtype=int)], [np.array([], dtype=int)], [[]]
+    for i, geom in enumerate(poly.geometry.values):
+        if geom is None or geom.is_empty:
+            continue
+        cc, aa = coverage(geom, x_bnds, y_bnds, shape)
+        rows.append(np.full(cc.size, i))
+        cells.append(cc)
+        areas.append(aa)
+
+    return sparse.csr_matrix(
+        (np.concatenate(areas), (np.concatenate(rows), np.concatenate(cells))),
+        shape=(len(poly), int(np.prod(shape))),
+    )
+
+
+def _infer_bounds(coord: np.ndarray) -> np.ndarray:
+    """Bounds of the cells of a 1D coordinate, at the midpoints between the cell centres, as an array of shape (n, 2)."""
+    if coord.size < 2:
+        raise ValueError("Cannot infer the cell bounds of a coordinate of one value.")
+    mid = (coord[1:] + coord[:-1]) / 2
+    edges = np.concatenate(([2 * coord[0] - mid[0]], mid, [2 * coord[-1] - mid[-1]]))
+    return np.stack((edges[:-1], edges[1:]), axis=1)
+
+
+def _sorted_bounds(bnds: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Indices, lower and upper bounds of cells given by bounds of shape (n, 2), sorted in increasing order."""
+    low = bnds.min(axis=1)
+    high = bnds.max(axis=1)
+    order = np.argsort(low, kind="stable")
+    return order, low[order], high[order]
+
+
+def _rectilinear_coverage(
+    geom, x_bnds: np.ndarray, y_bnds: np.ndarray, shape: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat indices and covered areas of the cells of a grid with 1D coordinates covered by a polygon.
+
+    The cells crossed by an edge of the polygon are flagged from the bounding box of each edge, marked at once with a
+    2D cumulative sum. These cells are intersected with the polygon, the others being entirely in or out of it,
+    depending on their centre.
+    """
+    empty = (np.array([], dtype=int), np.array([]))
+    minx, miny, maxx, maxy = geom.bounds
+    xi, x_lo, x_hi = _sorted_bounds(x_bnds)
+    yi, y_lo, y_hi = _sorted_bounds(y_bnds)
+    wx = slice(np.searchsorted(x_hi, minx, "right"), np.searchsorted(x_lo, maxx))
+    wy = slice(np.searchsorted(y_hi, miny, "right"), np.searchsorted(y_lo, maxy))
+    xi, x_lo, x_hi = xi[wx], x_lo[wx], x_hi[wx]
+    yi, y_lo, y_hi = yi[wy], y_lo[wy], y_hi[wy]
+    if xi.size == 0 or yi.size == 0:
+        return empty
+
+    x0, y0, x1, y1 = _polygon_edges(geom)
+    i0 = np.searchsorted(x_hi, np.minimum(x0, x1), "left")
+    i1 = np.searchsorted(x_lo, np.maximum(x0, x1), "right")
+    j0 = np.searchsorted(y_hi, np.minimum(y0, y1), "left")
+    j1 = np.searchsorted(y_lo, np.maximum(y0, y1), "right")
+    crossed = np.zeros((xi.size + 1, yi.size + 1), dtype=np.int32)
+    np.add.at(crossed, (i0, j0), 1)
+    np.add.at(crossed, (i1, j0), -1)
+    np.add.at(crossed, (i0, j1), -1)
+    np.add.at(crossed, (i1, j1), 1)
+    crossed = crossed.cumsum(axis=0).cumsum(axis=1)[:-1, :-1] > 0
+
+    lon, lat = np.meshgrid((x_lo + x_hi) / 2, (y_lo + y_hi) / 2, indexing="ij")
+    fraction = np.where(crossed, 0.0, vectorized.contains(geom, lon, lat))
+    prepared = prep(geom)
+    for i, j in zip(*np.nonzero(crossed)):
+        cell = box(x_lo[i], y_lo[j], x_hi[i], y_hi[j])
+        if prepared.contains(cell):
+            fraction[i, j] = 1
+        elif prepared.intersects(cell):
+            fraction[i, j] = geom.intersection(cell).area / cell.area
+
+    # Area of the cells on the unit sphere.
+    area = np.outer(
+        np.radians(x_hi - x_lo), np.sin(np.radians(y_hi)) - np.sin(np.radians(y_lo))
+    )
+    i, j = np.nonzero(fraction)
+    return np.ravel_multi_index((xi[i], yi[j]), shape), fraction[i, j] * area[i, j]
+
+
+def _vertices_coverage(
+    geom, x_bnds: np.ndarray, y_bnds: np.ndarray, shape: Tuple[int, ...]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat indices and covered areas of the cells, given by their 4 vertices, covered by a polygon."""
+    minx, miny, maxx, maxy = geom.bounds
+    candidates = np.nonzero(
+        (x_bnds.max(axis=1) > minx)
+        & (x_bnds.min(axis=1) < maxx)
+        & (y_bnds.max(axis=1) > miny)
+        & (y_bnds.min(axis=1) < maxy)
+    )[0]
+    prepared = prep(geom)
+    cells, areas = [], []
+    for c in candidates:
+        cell = Polygon(zip(x_bnds[c], y_bnds[c]))
+        if prepared.contains(cell):
+            covered = cell.area
+        elif prepared.intersects(cell):
+            covered = geom.intersection(cell).area
+        else:
+            continue
+        cells.append(c)
+        areas.append(covered * np.cos(np.radians(y_bnds[c].mean())))
+    return np.array(cells, dtype=int), np.radians(np.radians(np.array(areas)))
+
+
+def zonal_stats(
+    ds: Union[xarray.DataArray, xarray.Dataset],
+    shape: Union[str, Path, gpd.GeoDataFrame],
+    weights: Optional[sparse.spmatrix] = None,
+    x_bnds: Optional[Union[xarray.DataArray, np.ndarray]] = None,
+    y_bnds: Optional[Union[xarray.DataArray, np.ndarray]] = None,
+    skipna: bool = True,
+) -> Union[xarray.DataArray, xarray.Dataset]:
+    """Area-weighted mean of a DataArray or Dataset over each polygon of a vector shape.
+
+    The values of the cells partially covered by a polygon are weighted by the covered area. The mean of all
+    polygons is computed at once, as a sparse matrix product per block of data.
+
+    Parameters
+    ----------
+    ds : Union[xarray.DataArray, xarray.Dataset]
+      Input values, with `lon` and `lat` coordinates.
+    shape : Union[str, Path, gpd.GeoDataFrame]
+      Path to shape file, or directly a geodataframe. Supports formats compatible with geopandas. Polygons in another
+      CRS than WGS84 are reprojected to longitudes and latitudes, and polygons without CRS are assumed to be in WGS84.
+    weights : Optional[scipy.sparse.spmatrix]
+      Weights computed by `create_weights` for `shape` on the grid of `ds`. If None, they are computed here.
+    x_bnds : Optional[Union[xarray.DataArray, np.ndarray]]
+      Bounds of the cells along the longitude, see `create_weights`. Defaults to the variable named by the `bounds`
+      attribute of the longitude, if any.
+    y_bnds : Optional[Union[xarray.DataArray, np.ndarray]]
+      Bounds of the cells along the latitude, see `create_weights`. Defaults to the variable named by the `bounds`
+      attribute of the latitude, if any.
+    skipna : bool
+      If True, missing values are skipped and the mean is taken over the area of the valid cells. Otherwise, the mean
+      is missing when any cell covered by the polygon is missing.
+
+    Returns
+    -------
+    Union[xarray.DataArray, xarray.Dataset]
+      The mean over each polygon, along a `region` dimension whose coordinate is the index of the polygons. The
+      variables of a Dataset that lack the spatial dimensions are returned unchanged.
+
+    Notes
+    -----
+    The spatial dimensions of dask arrays are rechunked into a single chunk, the other ones being preserved.
+
+    Examples
+    --------
+    >>> import geopandas as gpd
+    >>> pr = xr.open_dataset(path_to_pr_file).pr
+    >>> polys = gpd.read_file(path_to_multi_shape_file)
+    >>> prMean = zonal_stats(pr, polys)
+    """
+    if isinstance(shape, gpd.GeoDataFrame):
+        poly = shape.copy()
+    else:
+        poly = gpd.GeoDataFrame.from_file(shape)
+    # The weights are computed on the longitudes and latitudes of the grid.
+    if poly.crs is not None and not CRS(poly.crs).equals(CRS(4326)):
+        poly = poly.to_crs(4326)
+
+    if ds.lon.ndim == 1 and ds.lat.ndim == 1:
+        dims = ds.lon.dims + ds.lat.dims
+    else:
+        dims = ds.lon.dims
+    ncells = int(np.prod([ds.sizes[d] for d in dims]))
+
+    if weights is None:
+        if isinstance(ds, xarray.Dataset):
+            if x_bnds is None and ds.lon.attrs.get("bounds") in ds.variables:
+                x_bnds = ds[ds.lon.attrs["bounds"]]
+            if y_bnds is None and ds.lat.attrs.get("bounds") in ds.variables:
+                y_bnds = ds[ds.lat.attrs["bounds"]]
+        weights = create_weights(
+            x_dim=ds.lon,
+            y_dim=ds.lat,
+            poly=poly,
+            wrap_lons=bool(np.min(ds.lon) >= 0 and np.max(ds.lon) <= 360),
+            x_bnds=x_bnds,
+            y_bnds=y_bnds,
+        )
+    elif weights.shape != (len(poly), ncells):
+        raise ValueError(
+            f"The shape of the weights {weights.shape} does not match the number of polygons and of grid cells "
+            f"({len(poly)}, {ncells})."
+        )
+    # Only the cells covered by a polygon are read.
+    weights = sparse.csr_matrix(weights)
+    cells = np.unique(weights.indices)
+    weights = weights[:, cells]
+
+    def _reduce(da):
+        if da.chunks is not None:
+            da = da.chunk({d: -1 for d in dims})
+        out = xarray.apply_ufunc(
+            _zonal_mean,
+            da,
+            input_core_dims=[list(dims)],
+            output_core_dims=[["region"]],
+            kwargs=dict(weights=weights, cells=cells, ndims=len(dims), skipna=skipna),
+            dask="parallelized",
+            output_dtypes=[np.result_type(da.dtype, np.float32)],
+            output_sizes={"region": len(poly)},
+            keep_attrs=True,
+        )
+        return out.assign_coords(region=poly.index.values)
+
+    if isinstance(ds, xarray.DataArray):
+        return _reduce(ds)
+
+    out = ds.drop_vars([v for v in ds.variables if set(dims) & set(ds[v].dims)])
+    for v in ds.data_vars:
+        if set(dims).issubset(ds[v].dims):
+            out[v] = _reduce(ds[v])
+    return out
+
+
+def _zonal_mean(
+    arr: np.ndarray,
+    weights: sparse.csr_matrix,
+    cells: np.ndarray,
+    ndims: int,
+    skipna: bool,
+) -> np.ndarray:
+    """Weighted mean of the `cells` of the `ndims` last dimensions of `arr`, flattened, for each row of `weights`."""
+    lead = arr.shape[: arr.ndim - ndims]
+    flat = arr.reshape(-1, int(np.prod(arr.shape[len(lead) :])))[:, cells]
+    valid = ~np.isnan(flat)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if valid.all():
+            mean = weights.dot(flat.T) / np.asarray(weights.sum(axis=1))
+        else:
+            total = weights.dot(np.where(valid, flat, 0).T)
+            mean = total / weights.dot(valid.T.astype(float))
+            if not skipna:
+                mean[weights.dot((~valid).T.astype(float)) > 0] = np.nan
+    return mean.T.reshape(lead + (weights.shape[0],)).astype(
+        np.result_type(arr.dtype, np.float32), copy=False
+    )
+
+
 @check_latlon_dimnames
 def subset_shape(
     ds: Union[xarray.DataArray, xarray.Dataset],
@@ -606,15 +1033,14 @@ def subset_shape(
                 raster_crs = wgs84
     _check_crs_compatibility(shape_crs=shape_crs, raster_crs=raster_crs)
 
-    # Create mask using the vectorize or spatial join methods.
-    if vectorize:
-        mask_2d = create_mask_vectorize(
-            x_dim=ds_copy.lon, y_dim=ds_copy.lat, poly=poly, wrap_lons=wrap_lons
-        )
-    else:
-        mask_2d = create_mask(
-            x_dim=ds_copy.lon, y_dim=ds_copy.lat, poly=poly, wrap_lons=wrap_lons
-        )
+    # Create mask using the vectorize or spatial join methods, or reuse the one of a previous call.
+    mask_2d = _cached_mask(
+        create_mask_vectorize if vectorize else create_mask,
+        x_dim=ds_copy.lon,
+        y_dim=ds_copy.lat,
+        poly=poly,
+        wrap_lons=wrap_lons,
+    )
 
     if np.all(mask_2d.isnull()):
         raise ValueError(
@@ -646,6 +1072,138 @@ def subset_shape(
     return ds_copy
 
 
+# Polygon masks computed by `subset_shape`, by key, from the least to the most recently used.
+_MASK_CACHE = OrderedDict()
+
+
+def _coords_fingerprint(*coords: xarray.DataArray) -> str:
+    """Hash of the dimensions, data type, shape and values of coordinates."""
+    key = hashlib.sha256()
+    for coord in coords:
+        values = np.ascontiguousarray(coord.values)
+        key.update(repr((coord.dims, values.dtype.str, values.shape)).encode())
+        key.update(values.tobytes())
+    return key.hexdigest()
+
+
+def _lru_store(cache: OrderedDict, key: str, value, size: int):
+    """Store a value as the most recently used of a cache, dropping the least recently used beyond `size` entries."""
+    if size > 0:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def _mask_key(
+    func,
+    x_dim: xarray.DataArray,
+    y_dim: xarray.DataArray,
+    poly: gpd.GeoDataFrame,
+    wrap_lons: bool,
+) -> str:
+    """Hash of everything the mask computed by `func` depends on: the grid, the geometries and their CRS."""
+    key = hashlib.sha256()
+    key.update(repr((func.__name__, wrap_lons, list(poly.index))).encode())
+    key.update(_coords_fingerprint(x_dim, y_dim).encode())
+    for geom in poly.geometry.values:
+        key.update(b"" if geom is None else geom.wkb)
+    key.update(b"" if poly.crs is None else CRS(poly.crs).to_wkt().encode())
+    return key.hexdigest()
+
+
+def _cached_mask(
+    func,
+    *,
+    x_dim: xarray.DataArray,
+    y_dim: xarray.DataArray,
+    poly: gpd.GeoDataFrame,
+    wrap_lons: bool,
+) -> xarray.DataArray:
+    """Return the mask computed by `func`, from the in-memory or on-disk caches if it was computed before.
+
+    The masks are kept in an LRU cache of `mask_cache_size` entries and, if the `mask_cache_dir` option is set, saved
+    in that directory as `.npz` files named after their key. The warnings emitted while computing a mask are stored
+    with it, with their category, and emitted again each time it is reused, under the active warning filters.
+    """
+    size = OPTIONS[MASK_CACHE_SIZE]
+    cache_dir = OPTIONS[MASK_CACHE_DIR]
+    if size == 0 and cache_dir is None:
+        return func(x_dim=x_dim, y_dim=y_dim, poly=poly, wrap_lons=wrap_lons)
+
+    key = _mask_key(func, x_dim, y_dim, poly, wrap_lons)
+    path = None if cache_dir is None else Path(cache_dir) / f"{key}.npz"
+    if key in _MASK_CACHE:
+        _MASK_CACHE.move_to_end(key)
+        mask, messages = _MASK_CACHE[key]
+        _replay_warnings(messages)
+    elif path is not None and path.exists():
+        if x_dim.ndim == 1 and y_dim.ndim == 1:
+            dims = x_dim.dims + y_dim.dims
+            coords = {dims[0]: x_dim.values, dims[1]: y_dim.values}
+        else:
+            dims = x_dim.dims
+            coords = x_dim.coords
+        with np.load(path) as data:
+            mask = xarray.DataArray(data["mask"], dims=dims, coords=coords)
+            messages = [
+                (_warning_category(str(category)), str(message))
+                for category, message in zip(data["categories"], data["warnings"])
+            ]
+        _replay_warnings(messages)
+    else:
+        # The warnings go through the active filters as usual, those shown are also recorded.
+        messages = []
+        showwarning = warnings.showwarning
+
+        def _record(message, category, *args, **kwargs):
+            messages.append((category, str(message)))
+            showwarning(message, category, *args, **kwargs)
+
+        warnings.showwarning = _record
+        try:
+            mask = func(x_dim=x_dim, y_dim=y_dim, poly=poly, wrap_lons=wrap_lons)
+        finally:
+            warnings.showwarning = showwarning
+
+        if path is not None and mask.dtype.kind != "O":
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so that concurrent readers never see a partial file.
+            tmp = path.with_name(f"{key}.{os.getpid()}.tmp.npz")
+            np.savez(
+                tmp,
+                mask=mask.values,
+                categories=np.array(
+                    [f"{c.__module__}.{c.__qualname__}" for c, _ in messages], dtype=str
+                ),
+                warnings=np.array([m for _, m in messages], dtype=str),
+            )
+            os.replace(tmp, path)
+
+    _lru_store(_MASK_CACHE, key, (mask, messages), size)
+    return mask
+
+
+def _replay_warnings(messages):
+    """Emit again the warnings recorded with a cached mask, from the caller of `subset_shape`."""
+    for category, message in messages:
+        warnings.warn(message, category, stacklevel=5)
+
+
+def _warning_category(name: str) -> type:
+    """Warning class from its qualified name, or UserWarning if it cannot be found."""
+    module, _, qualname = name.rpartition(".")
+    try:
+        category = importlib.import_module(module)
+        for attr in qualname.split("."):
+            category = getattr(category, attr)
+    except (ImportError, AttributeError, ValueError):
+        return UserWarning
+    if isinstance(category, type) and issubclass(category, Warning):
+        return category
+    return UserWarning
+
+
 @check_latlon_dimnames
 @check_lons
 def subset_bbox(
@@ -925,22 +1483,26 @@ def subset_gridpoint(
                 dist = None
 
         else:
-            # Calculate the geodesic distance between grid points and the point of interest.
-            dist = distance(da, lon=lon, lat=lat)
-            pts = []
-            dists = []
-            for site in dist[ptdim]:
-                # Find the indices for the closest point
-                inds = np.unravel_index(
-                    dist.sel({ptdim: site}).argmin(), dist.sel({ptdim: site}).shape
-                )
-
-                # Select data from closest point
-                args = {xydim: ind for xydim, ind in zip(dist.dims, inds)}
-                pts.append(da.isel(**args))
-                dists.append(dist.isel(**args))
-            da = xarray.concat(pts, dim=ptdim)
-            dist = xarray.concat(dists, dim=ptdim)
+            # Find the closest grid points of all sites at once, from a spatial index of the grid.
+            lons, lats = xarray.broadcast(da.lon, da.lat)
+            tree = _grid_tree(lons, lats)
+            _, inds = tree.query(_lonlat_to_xyz(lon.values, lat.values))
+            inds = np.unravel_index(inds, lons.shape)
+            args = {
+                xydim: xarray.DataArray(ind, dims=(ptdim,))
+                for xydim, ind in zip(lons.dims, inds)
+            }
+            # Sites first, as when concatenating the points.
+            da = da.isel(**args).transpose(ptdim, ...)
+
+            # Geodesic distance between the sites and their grid point.
+            g = Geod(ellps="WGS84")
+            dist = xarray.DataArray(
+                g.inv(lons.values[inds], lats.values[inds], lon.values, lat.values)[2],
+                dims=(ptdim,),
+                coords=da[ptdim].coords if ptdim in da.coords else None,
+                attrs={"units": "m"},
+            )
     else:
         raise (
             Exception(
@@ -963,6 +1525,33 @@ def subset_gridpoint(
     return da
 
 
+# Spatial indexes of the grids of `subset_gridpoint`, by key, from the least to the most recently used.
+_GRID_TREES = OrderedDict()
+
+
+def _lonlat_to_xyz(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Cartesian coordinates of points on the unit sphere, as an array of shape (n, 3)."""
+    lon = np.radians(np.ravel(lon))
+    lat = np.radians(np.ravel(lat))
+    return np.stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)), axis=1
+    )
+
+
+def _grid_tree(lon: xarray.DataArray, lat: xarray.DataArray) -> cKDTree:
+    """KD-tree of the grid points on the unit sphere, kept for the last `grid_tree_cache_size` grids.
+
+    The nearest neighbour in 3D Cartesian coordinates is the nearest along the great circle, wherever the longitudes
+    wrap.
+    """
+    key = _coords_fingerprint(lon, lat)
+    tree = _GRID_TREES.get(key)
+    if tree is None:
+        tree = cKDTree(_lonlat_to_xyz(lon.values, lat.values))
+    _lru_store(_GRID_TREES, key, tree, OPTIONS[GRID_TREE_CACHE_SIZE])
+    return tree
+
+
 @check_start_end_dates
 def subset_time(
     da: Union[xarray.DataArray, xarray.Dataset],
@@ -1019,15 +1608,22 @@ def subset_time(
     return da.sel(time=slice(start_date, end_date))
 
 
+# Mean radius of the Earth, in meters.
+_EARTH_RADIUS = 6371008.8
+
+
 @convert_lat_lon_to_da
 def distance(
     da: Union[xarray.DataArray, xarray.Dataset],
     *,
     lon: Union[float, Sequence[float], xarray.DataArray],
     lat: Union[float, Sequence[float], xarray.DataArray],
+    method: str = "geodesic",
 ):
     """Return distance to a point in meters.
 
+    The distance is computed lazily, chunk by chunk, if the coordinates of `da` are dask arrays.
+
     Parameters
     ----------
     da : Union[xarray.DataArray, xarray.Dataset]
@@ -1036,6 +1632,9 @@ def distance(
       Longitude coordinate.
     lat : Union[float, Sequence[float], xarray.DataArray]
       Latitude coordinate.
+    method : {'geodesic', 'haversine'}
+      Distance along the geodesic on the WGS84 ellipsoid, or along the great circle of a sphere of the mean Earth
+      radius with the haversine formula. The latter is much faster, but up to 0.5% off.
 
     Returns
     -------
@@ -1050,18 +1649,35 @@ def distance(
     >>> k = d.argmin()
     >>> i, j, _ = np.unravel_index(k, d.shape)
     """
+    funcs = {"geodesic": _geodesic_distance, "haversine": _haversine_distance}
+    if method not in funcs:
+        raise ValueError(
+            f"Unknown distance method `{method}`, expected one of {list(funcs)}."
+        )
     ptdim = lat.dims[0]
 
+    out = xarray.apply_ufunc(
+        funcs[method],
+        da.lon,
+        da.lat,
+        lon,
+        lat,
+        dask="parallelized",
+        output_dtypes=[np.float64],
+    ).transpose(..., ptdim)
+    out.attrs["units"] = "m"
+    return out
+
+
+def _geodesic_distance(lons, lats, lon, lat):
     g = Geod(ellps="WGS84")  # WGS84 ellipsoid - decent globally
+    return g.inv(*np.broadcast_arrays(lons, lats, lon, lat))[2]
 
-    def func(lons, lats, lon, lat):
-        return g.inv(lons, lats, lon, lat)[2]
 
-    out = xarray.apply_ufunc(
-        func,
-        *xarray.broadcast(da.lon.load(), da.lat.load(), lon, lat),
-        input_core_dims=[[ptdim]] * 4,
-        output_core_dims=[[ptdim]],
+def _haversine_distance(lons, lats, lon, lat):
+    lons, lats, lon, lat = (np.radians(x) for x in (lons, lats, lon, lat))
+    h = (
+        np.sin((lat - lats) / 2) ** 2
+        + np.cos(lats) * np.cos(lat) * np.sin((lon - lons) / 2) ** 2
     )
-    out.attrs["units"] = "m"
-    return out
+    return 2 * _EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(h, 1)))